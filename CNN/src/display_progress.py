@@ -61,6 +61,9 @@ class ProgressMeter:
         self.top5 = top5
         self.prefix = prefix
 
+    def set_num_batches(self, num_batches):
+        self.batch_fmtstr = self._get_batch_fmtstr(num_batches)
+
     def reset(self):
         self.batch_time.reset()
         self.data_time.reset()
@@ -0,0 +1,62 @@
+import os
+from importlib import util
+
+import numpy as np
+import torch.utils.data
+from PIL import Image
+
+
+def import_file(full_name, path):
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+procedural = import_file('procedural', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                                    'Rendering_Pipeline', 'src_g', 'procedural.py'))
+
+
+class ProceduralDataset(torch.utils.data.Dataset):
+    """
+    Draws the images of the Geometric dataset on the fly with the procedural generator instead of reading rendered
+    images. Image i has the same combination of attribute values as image i of a rendered dataset with the same traces
+    and NDEA. The images are PIL images, so the transforms of ImageFolder datasets can be used.
+    """
+
+    def __init__(self, attribute_values_filepath, traces, ndea=(), transform=None, resolution=224,
+                 class_names=('Class_0', 'Class_1', 'Class_2', 'Class_3', 'Class_4', 'Class_5'),
+                 colors=((0, 0, 1, 1), (0, 1, 0, 1), (0, 1, 1, 1), (1, 0, 0, 1), (1, 0, 1, 1), (1, 1, 0, 1))):
+        rav = np.load(attribute_values_filepath)
+        self.generator = procedural.ProceduralGenerator(
+            class_names=list(class_names), traces=list(traces), ndea=list(ndea), colors=colors,
+            scales=rav['scales'], light_energies=rav['light_energies'],
+            heights=rav['heights'], betas=rav['betas'], gammas=rav['gammas'], resolution=resolution)
+        self.transform = transform
+        self.classes = list(class_names)
+        self.class_to_idx = {class_name: index for index, class_name in enumerate(self.classes)}
+
+    def __len__(self):
+        return self.generator.total_images
+
+    def __getitem__(self, index):
+        return self.__getitems__([index])[0]
+
+    # used by the DataLoader to draw a whole batch at once
+    def __getitems__(self, indices):
+        images, class_indices = self.generator.generate([int(index) for index in indices])
+        images = (images * 255 + 0.5).astype(np.uint8)
+        samples = []
+        for image, class_index in zip(images, class_indices):
+            image = Image.fromarray(image)
+            if self.transform is not None:
+                image = self.transform(image)
+            samples.append((image, int(class_index)))
+        return samples
+
+
+if __name__ == '__main__':
+    dataset = ProceduralDataset('C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/resources_g/'
+                                'random_attributes_values.npz', traces=['SHAPE', 'TEXTURE'], ndea=['COLOR'])
+    print(str(len(dataset)) + ' images')
+    dataset[0][0].show()
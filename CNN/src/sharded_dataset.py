@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import random
+from importlib import util
+
+import torch.utils.data
+from PIL import Image
+
+
+def import_file(full_name, path):
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+shards = import_file('shards', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                            'Rendering_Pipeline', 'src_common', 'shards.py'))
+
+
+class ShardedDataset(torch.utils.data.IterableDataset):
+    """
+    Reads the samples of tar shards written by the rendering pipeline sequentially. The classes are sorted like in
+    ImageFolder. With shuffle the order of the shards changes every epoch and the samples are mixed in a buffer. The
+    order of the shards only depends on seed and the epoch set by set_epoch, so every loader worker reads other shards.
+    """
+
+    def __init__(self, filepath, transform=None, shuffle=False, buffer_size=1000, seed=0):
+        self.filepath = filepath
+        self.transform = transform
+        self.shuffle = shuffle
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.epoch = 0
+        self.shards = shards.shard_names(filepath)
+
+        self.length = 0
+        class_names = set()
+        for shard in self.shards:
+            index = shards.read_index(filepath, shard)
+            self.length += index['samples']
+            class_names.update(index['classes'])
+        self.classes = sorted(class_names)
+        self.class_to_idx = {class_name: index for index, class_name in enumerate(self.classes)}
+
+    def __len__(self):
+        return self.length
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __samples__(self):
+        worker_info = torch.utils.data.get_worker_info()
+        shard_list = list(self.shards)
+        # all workers shuffle the same way before they take their part of the shards
+        if self.shuffle:
+            random.Random(self.seed + self.epoch).shuffle(shard_list)
+        if worker_info is not None:
+            shard_list = shard_list[worker_info.id::worker_info.num_workers]
+
+        for shard in shard_list:
+            for key, files in shards.read_samples(os.path.join(self.filepath, shard)):
+                metadata = json.loads(files.pop('json'))
+                image = Image.open(io.BytesIO(next(iter(files.values())))).convert('RGB')
+                if self.transform is not None:
+                    image = self.transform(image)
+                yield image, self.class_to_idx[metadata['class_name']]
+
+    def __iter__(self):
+        if not self.shuffle:
+            yield from self.__samples__()
+            return
+
+        buffer = []
+        for sample in self.__samples__():
+            if len(buffer) < self.buffer_size:
+                buffer.append(sample)
+                continue
+            index = random.randrange(self.buffer_size)
+            yield buffer[index]
+            buffer[index] = sample
+        random.shuffle(buffer)
+        yield from buffer
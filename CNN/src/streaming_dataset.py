@@ -0,0 +1,154 @@
+import hashlib
+import io
+import os
+import random
+import tarfile
+import time
+from importlib import util
+
+import torch.utils.data
+from PIL import Image
+
+
+def import_file(full_name, path):
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+manifest = import_file('manifest', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                                'Rendering_Pipeline', 'src_common', 'manifest.py'))
+shards = import_file('shards', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                            'Rendering_Pipeline', 'src_common', 'shards.py'))
+
+
+def split_of(index, validation_percent=0.1, test_percent=0.1, seed=0):
+    # the split only depends on the image index, so an image keeps its split however far the rendering is
+    digest = hashlib.sha256((str(seed) + ':' + str(index)).encode()).digest()
+    position = int.from_bytes(digest[:8], 'big') / 2 ** 64
+    if position < validation_percent:
+        return 'val'
+    if position < validation_percent + test_percent:
+        return 'test'
+    return 'train'
+
+
+class StreamingDataset(torch.utils.data.IterableDataset):
+    """
+    Reads a dataset while it is rendered. New images are taken from the manifest of the rendering pipeline as soon as
+    they are recorded and assigned to train, val or test by a hash of their index, so no Splitter run is needed. An
+    epoch of the train split draws samples_per_epoch samples, every sample from a random class and a random image of
+    this class out of the images available at that time. The val and test splits yield every available image once.
+    Without class_names the classes are the class folders the rendering pipeline creates before the first image.
+    """
+
+    def __init__(self, filepath, split, transform=None, validation_percent=0.1, test_percent=0.1, seed=0,
+                 samples_per_epoch=10000, min_images=None, poll_interval=10.0, class_names=None):
+        if class_names is None:
+            class_names = [entry.name for entry in os.scandir(filepath)
+                           if entry.is_dir() and entry.name != shards.SHARDS_NAME] if os.path.isdir(filepath) else []
+            if not class_names:
+                raise ValueError('No class folders in ' + filepath + ', start the rendering or pass class_names')
+        self.filepath = filepath
+        self.split = split
+        self.transform = transform
+        self.validation_percent = validation_percent
+        self.test_percent = test_percent
+        self.seed = seed
+        self.samples_per_epoch = samples_per_epoch
+        self.min_images = min_images if min_images is not None else len(class_names)
+        self.poll_interval = poll_interval
+        self.classes = sorted(class_names)
+        self.class_to_idx = {class_name: index for index, class_name in enumerate(self.classes)}
+
+        # the manifest connection and the open shards cannot be passed to the DataLoader workers, so every worker
+        # opens its own
+        self.manifest = None
+        self.archives = {}
+        self.last_id = 0
+        self.filenames = {class_name: [] for class_name in self.classes}
+        self.positions = {}
+        self.last_refresh = 0
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['manifest'] = None
+        state['archives'] = {}
+        return state
+
+    def __available__(self):
+        return sum(len(filenames) for filenames in self.filenames.values())
+
+    def __refresh__(self):
+        self.last_refresh = time.time()
+        if self.manifest is None:
+            if not os.path.isfile(os.path.join(self.filepath, manifest.MANIFEST_NAME)):
+                return
+            self.manifest = manifest.Manifest(self.filepath)
+        entries, self.last_id = self.manifest.new_entries(self.last_id)
+        for entry in entries:
+            # a sample of an unknown class would get a wrong label or be lost, so the class names must be complete
+            if entry['class_name'] not in self.filenames:
+                raise ValueError('Image ' + str(entry['index']) + ' has the class ' + entry['class_name'] +
+                                 ' which is not in ' + str(self.classes))
+            if split_of(entry['index'], self.validation_percent, self.test_percent, self.seed) != self.split:
+                continue
+            # an image which was rendered again is replaced
+            if entry['index'] in self.positions:
+                class_name, position = self.positions[entry['index']]
+                self.filenames[class_name][position] = entry['filename']
+            else:
+                self.positions[entry['index']] = (entry['class_name'], len(self.filenames[entry['class_name']]))
+                self.filenames[entry['class_name']].append(entry['filename'])
+
+    def __wait__(self):
+        self.__refresh__()
+        while self.__available__() < self.min_images:
+            print('Waiting for images: ' + str(self.__available__()) + ' of ' + str(self.min_images) + ' in ' +
+                  self.split)
+            time.sleep(self.poll_interval)
+            self.__refresh__()
+
+    def __load__(self, filename, class_name):
+        member = manifest.archive_member(filename)
+        if member is None:
+            image = Image.open(os.path.join(self.filepath, filename))
+        else:
+            if member[0] not in self.archives:
+                self.archives[member[0]] = tarfile.open(os.path.join(self.filepath, member[0]))
+            image = Image.open(io.BytesIO(self.archives[member[0]].extractfile(member[1]).read()))
+        image = image.convert('RGB')
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, self.class_to_idx[class_name]
+
+    def __len__(self):
+        if self.split == 'train':
+            return self.samples_per_epoch
+        self.__refresh__()
+        return self.__available__()
+
+    def __iter__(self):
+        self.__wait__()
+        worker_info = torch.utils.data.get_worker_info()
+        workers, worker = (worker_info.num_workers, worker_info.id) if worker_info is not None else (1, 0)
+
+        if self.split != 'train':
+            samples = sorted((index, class_name, self.filenames[class_name][position])
+                             for index, (class_name, position) in self.positions.items())
+            for index, class_name, filename in samples[worker::workers]:
+                yield self.__load__(filename, class_name)
+            return
+
+        for _ in range(worker, self.samples_per_epoch, workers):
+            if time.time() - self.last_refresh > self.poll_interval:
+                self.__refresh__()
+            class_name = random.choice([class_name for class_name in self.classes if self.filenames[class_name]])
+            yield self.__load__(random.choice(self.filenames[class_name]), class_name)
+
+
+if __name__ == '__main__':
+    dataset = StreamingDataset('G:/Datasets/Planet/Texture/complete', 'train', samples_per_epoch=10)
+    for sample_image, class_index in dataset:
+        print(dataset.classes[class_index], sample_image.size)
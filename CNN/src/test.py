@@ -12,12 +12,14 @@ import torchvision.transforms as transforms
 from sklearn.metrics import confusion_matrix
 from matplotlib import rc
 
+import sharded_dataset
+
 rc('text', usetex=True)
 rc('font', family='Latin Modern Roman', size=11)
 
 
 class Tester:
-    def __init__(self, filepath_model, filepath_data_set):
+    def __init__(self, filepath_model, filepath_data_set, sharded=False):
         self.image_name = str(Path(filepath_model).parent.name) + '___' + str(Path(filepath_data_set).name + '.pdf')
 
         self.batch_size = 64
@@ -29,12 +31,14 @@ class Tester:
 
         normalize = transforms.Normalize(mean=[0.485, 0.456, 0.406],
                                          std=[0.229, 0.224, 0.225])
-        dataset = datasets.ImageFolder(
-            os.path.join(filepath_data_set, 'test'),
-            transforms.Compose([
-                transforms.ToTensor(),
-                normalize,
-            ]))
+        transform = transforms.Compose([
+            transforms.ToTensor(),
+            normalize,
+        ])
+        if sharded:
+            dataset = sharded_dataset.ShardedDataset(os.path.join(filepath_data_set, 'test'), transform)
+        else:
+            dataset = datasets.ImageFolder(os.path.join(filepath_data_set, 'test'), transform)
 
         self.classes = dataset.classes
         self.predictions = []
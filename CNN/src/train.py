@@ -14,10 +14,13 @@ import torchvision.transforms as transforms
 from torch.utils.tensorboard import SummaryWriter
 
 import display_progress
+import sharded_dataset
+import streaming_dataset
 
 
 class Trainer:
-    def __init__(self, data_filepath, dataset_filepath, sigma=None, weights=None):
+    def __init__(self, data_filepath, dataset_filepath, sigma=None, weights=None, sharded=False, streaming=False,
+                 samples_per_epoch=10000):
         self.workers = 0
         self.epochs = 30
         self.batch_size = 64
@@ -26,6 +29,10 @@ class Trainer:
         self.weight_decay = 1e-4
         self.print_freq = 10
         self.sigma = sigma
+        self.sharded = sharded
+        # with streaming dataset_filepath is the folder of a dataset which is still rendered
+        self.streaming = streaming
+        self.samples_per_epoch = samples_per_epoch
         self.dataset_filepath = dataset_filepath
         self.data_filepath = data_filepath
         self.device = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
@@ -68,32 +75,37 @@ class Trainer:
                                          std=[0.229, 0.224, 0.225])
 
         if self.sigma is not None:
-            train_dataset = datasets.ImageFolder(
-                traindir,
-                transforms.Compose([
-                    transforms.RandomHorizontalFlip(),
-                    transforms.ToTensor(),
-                    transforms.Lambda(lambda image: torch.clip(image + self.sigma * torch.randn(image.shape), 0, 1)),
-                    normalize,
-                ]))
+            train_transform = transforms.Compose([
+                transforms.RandomHorizontalFlip(),
+                transforms.ToTensor(),
+                transforms.Lambda(lambda image: torch.clip(image + self.sigma * torch.randn(image.shape), 0, 1)),
+                normalize,
+            ])
         else:
-            train_dataset = datasets.ImageFolder(
-                traindir,
-                transforms.Compose([
-                    transforms.RandomHorizontalFlip(),
-                    transforms.ToTensor(),
-                    normalize,
-                ]))
-
-        val_dataset = datasets.ImageFolder(
-            valdir,
-            transforms.Compose([
+            train_transform = transforms.Compose([
+                transforms.RandomHorizontalFlip(),
                 transforms.ToTensor(),
                 normalize,
-            ]))
+            ])
+        val_transform = transforms.Compose([
+            transforms.ToTensor(),
+            normalize,
+        ])
+
+        if self.streaming:
+            train_dataset = streaming_dataset.StreamingDataset(self.dataset_filepath, 'train', train_transform,
+                                                               samples_per_epoch=self.samples_per_epoch)
+            val_dataset = streaming_dataset.StreamingDataset(self.dataset_filepath, 'val', val_transform)
+        elif self.sharded:
+            train_dataset = sharded_dataset.ShardedDataset(traindir, train_transform, shuffle=True)
+            val_dataset = sharded_dataset.ShardedDataset(valdir, val_transform)
+        else:
+            train_dataset = datasets.ImageFolder(traindir, train_transform)
+            val_dataset = datasets.ImageFolder(valdir, val_transform)
 
+        # the sharded and the streaming dataset shuffle themselves
         self.train_loader = torch.utils.data.DataLoader(
-            train_dataset, batch_size=self.batch_size, shuffle=True,
+            train_dataset, batch_size=self.batch_size, shuffle=not (self.sharded or self.streaming),
             num_workers=self.workers, pin_memory=True)
 
         self.val_loader = torch.utils.data.DataLoader(
@@ -102,12 +114,15 @@ class Trainer:
 
     def train_model(self):
         for epoch in range(self.epochs):
+            if isinstance(self.train_loader.dataset, sharded_dataset.ShardedDataset):
+                self.train_loader.dataset.set_epoch(epoch)
             self.__train_epoch__(epoch)
             self.__validate__(epoch)
             if self.val_progress.top1.avg > self.best_acc1:
                 self.best_acc1 = self.val_progress.top1.avg
                 torch.save(self.model.state_dict(), os.path.join(self.data_filepath, 'model.pth.tar'))
-                if math.isclose(self.best_acc1, 100.0, abs_tol=0.001):
+                # the validation set of a streaming dataset is still growing
+                if math.isclose(self.best_acc1, 100.0, abs_tol=0.001) and not self.streaming:
                     print('100% Accuracy on Validation Set')
                     exit()
 
@@ -148,6 +163,8 @@ class Trainer:
 
     def __validate__(self, epoch):
         self.val_progress.reset()
+        if self.streaming:
+            self.val_progress.set_num_batches(len(self.val_loader))
         self.model.eval()
 
         with torch.no_grad():
@@ -0,0 +1,271 @@
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import util
+
+import numpy as np
+from PIL import Image
+
+
+def import_file(full_name, path):
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+common_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Rendering_Pipeline', 'src_common')
+shards = import_file('shards', os.path.join(common_path, 'shards.py'))
+manifest_module = import_file('manifest', os.path.join(common_path, 'manifest.py'))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tif', '.tiff')
+
+# the image is reduced to 32x32 and the 8x8 lowest frequencies of its DCT give a hash of 64 bits
+IMAGE_SIZE = 32
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+
+def dct_matrix(size):
+    # orthonormal DCT-II, the 2D transform of an image is matrix @ image @ matrix.T
+    frequencies = np.arange(size)
+    matrix = np.cos(np.pi * (2 * frequencies[None, :] + 1) * frequencies[:, None] / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+DCT = dct_matrix(IMAGE_SIZE)
+
+
+def phash(image):
+    # perceptual hash: a bit is set where a low frequency is above the median, so small shifts of the camera, the
+    # light or the scale change only a few bits
+    gray = np.asarray(image.convert('L').resize((IMAGE_SIZE, IMAGE_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (DCT @ gray @ DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    # the DC term is the mean brightness and left out of the median
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming(value, others):
+    # the amount of different bits between one hash and an array of hashes
+    differences = np.uint64(value) ^ np.asarray(others, dtype=np.uint64)
+    return np.unpackbits(differences.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def bands(value, count):
+    # splits a hash into count bands whose widths differ by at most one bit, two hashes with less than count different
+    # bits agree in at least one band. No band is empty, an empty band would match every hash
+    result = []
+    start = 0
+    for band in range(count):
+        width = HASH_BITS // count + (band < HASH_BITS % count)
+        result.append((band, (value >> start) & ((1 << width) - 1)))
+        start += width
+    return result
+
+
+def hash_files(filepaths):
+    # runs in a worker process, an image which cannot be decoded gets None
+    hashes = []
+    for filepath in filepaths:
+        try:
+            with Image.open(filepath) as image:
+                hashes.append(phash(image))
+        except Exception:
+            hashes.append(None)
+    return hashes
+
+
+def hash_shard(shard_filepath):
+    # runs in a worker process, returns the key, the class and the hash of every sample of one shard
+    samples = []
+    for key, files in shards.read_samples(shard_filepath):
+        class_name = json.loads(files['json'])['class_name']
+        images = [extension for extension in files if '.' + extension.lower() in IMAGE_EXTENSIONS]
+        value = None
+        if images:
+            try:
+                with Image.open(io.BytesIO(files[images[0]])) as image:
+                    value = phash(image)
+            except Exception:
+                pass
+        samples.append((key, class_name, value))
+    return samples
+
+
+class Deduplicator:
+    def __init__(self, filepath, threshold=4, balance=True, workers=None, chunk_size=256):
+        # threshold is the largest Hamming distance of two hashes (of 64 bits) which counts as near duplicate. With
+        # balance the classes are cut to the size of the smallest class after the near duplicates were removed
+        self.filepath = filepath
+        self.threshold = threshold
+        self.balance = balance
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+
+    def __hash_folders__(self, executor):
+        names = []
+        for c_class in os.scandir(self.filepath):
+            if not c_class.is_dir() or c_class.name == shards.SHARDS_NAME:
+                continue
+            names += [(c_class.name, c_class.name + '/' + entry.name) for entry in os.scandir(c_class.path)
+                      if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS]
+        chunks = [names[start:start + self.chunk_size] for start in range(0, len(names), self.chunk_size)]
+        futures = [executor.submit(hash_files, [os.path.join(self.filepath, name) for _, name in chunk])
+                   for chunk in chunks]
+        samples = []
+        for chunk, future in zip(chunks, futures):
+            for (class_name, name), value in zip(chunk, future.result()):
+                stem = os.path.splitext(os.path.basename(name))[0]
+                samples.append((class_name, name, int(stem) if stem.isdigit() else None, value))
+            self.__progress__(len(samples), len(names))
+        return samples
+
+    def __hash_shards__(self, executor):
+        shards_filepath = os.path.join(self.filepath, shards.SHARDS_NAME)
+        shard_list = shards.shard_names(shards_filepath)
+        futures = [executor.submit(hash_shard, os.path.join(shards_filepath, shard)) for shard in shard_list]
+        samples = []
+        for number, (shard, future) in enumerate(zip(shard_list, futures)):
+            for key, class_name, value in future.result():
+                samples.append((class_name, shards.SHARDS_NAME + '/' + shard + '/' + key,
+                                int(key) if key.isdigit() else None, value))
+            self.__progress__(number + 1, len(futures), 'shards')
+        return samples
+
+    @staticmethod
+    def __progress__(done, total, unit='images'):
+        print('\rHashed ' + str(done) + '/' + str(total) + ' ' + unit, end='' if done < total else '\n')
+
+    def __deduplicate_class__(self, samples):
+        # the images are visited in index order and an image is kept if no kept image is within the threshold. The
+        # kept images are indexed by the bands of their hashes, so only images which agree in a band are compared
+        count = self.threshold + 1
+        table = {}
+        kept_names = []
+        kept_hashes = []
+        removed = []
+        for name, value in samples:
+            candidates = sorted({position for band in bands(value, count) for position in table.get(band, ())})
+            if candidates:
+                distances = hamming(value, [kept_hashes[position] for position in candidates])
+                closest = int(np.argmin(distances))
+                if distances[closest] <= self.threshold:
+                    removed.append([name, kept_names[candidates[closest]], int(distances[closest])])
+                    continue
+            for band in bands(value, count):
+                table.setdefault(band, []).append(len(kept_names))
+            kept_names.append(name)
+            kept_hashes.append(value)
+        return kept_names, removed
+
+    @staticmethod
+    def __balance__(kept, size):
+        # evenly spaced images are kept, so the attribute values of the class stay covered
+        if len(kept) <= size:
+            return kept, []
+        positions = set(np.linspace(0, len(kept) - 1, size).round().astype(int).tolist()) if size > 0 else set()
+        return ([name for position, name in enumerate(kept) if position in positions],
+                [name for position, name in enumerate(kept) if position not in positions])
+
+    def deduplicate(self, report_filepath=None):
+        if self.threshold + 1 > HASH_BITS:
+            raise ValueError('threshold must be smaller than ' + str(HASH_BITS))
+        start_time = time.time()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            samples = self.__hash_folders__(executor)
+            if os.path.isdir(os.path.join(self.filepath, shards.SHARDS_NAME)):
+                samples += self.__hash_shards__(executor)
+
+        classes = {}
+        unreadable = []
+        for class_name, name, index, value in sorted(
+                samples, key=lambda sample: (sample[2] is None, sample[2] if sample[2] is not None else 0, sample[1])):
+            if value is None:
+                unreadable.append(name)
+            else:
+                classes.setdefault(class_name, []).append((name, value))
+
+        kept = {}
+        duplicates = {}
+        for class_name, class_samples in sorted(classes.items()):
+            kept[class_name], duplicates[class_name] = self.__deduplicate_class__(class_samples)
+        unbalanced = {}
+        if self.balance and kept:
+            size = min(len(names) for names in kept.values())
+            for class_name in kept:
+                kept[class_name], unbalanced[class_name] = self.__balance__(kept[class_name], size)
+
+        report = {
+            'filepath': self.filepath,
+            'threshold': self.threshold,
+            'images': len(samples),
+            'seconds': round(time.time() - start_time, 1),
+            'counts': {class_name: len(class_samples) for class_name, class_samples in classes.items()},
+            'kept': kept,
+            'duplicates': duplicates,
+            'balance': unbalanced,
+            'unreadable': unreadable,
+        }
+        self.print_report(report)
+        if report_filepath is not None:
+            with open(report_filepath, 'w') as file:
+                json.dump(report, file, indent=1)
+        return report
+
+    def prune(self, report, duplicates_filepath, pruned_shards_filepath=None, max_size=1 << 30):
+        # the removed images of the class folders are moved into the class folders of duplicates_filepath and marked
+        # as pruned in the manifest, so a resumed render does not render them again and the Scanner does not miss
+        # them. Shards cannot be changed, so their kept samples are written into new shards in pruned_shards_filepath
+        removed = {name for class_duplicates in report['duplicates'].values() for name, _, _ in class_duplicates}
+        removed.update(name for names in report['balance'].values() for name in names)
+        moved = []
+        for name in sorted(removed):
+            if name.startswith(shards.SHARDS_NAME + '/'):
+                continue
+            os.makedirs(os.path.join(duplicates_filepath, os.path.dirname(name)), exist_ok=True)
+            os.rename(os.path.join(self.filepath, name), os.path.join(duplicates_filepath, name))
+            moved.append(name)
+
+        if os.path.isfile(os.path.join(self.filepath, manifest_module.MANIFEST_NAME)):
+            stems = [os.path.splitext(os.path.basename(name))[0] for name in moved]
+            dataset_manifest = manifest_module.Manifest(self.filepath)
+            dataset_manifest.prune(int(stem) for stem in stems if stem.isdigit())
+            dataset_manifest.close()
+
+        shards_filepath = os.path.join(self.filepath, shards.SHARDS_NAME)
+        if not os.path.isdir(shards_filepath):
+            return
+        if pruned_shards_filepath is None:
+            print('The dataset has shards, they are only pruned with pruned_shards_filepath')
+            return
+        writer = shards.ShardWriter(pruned_shards_filepath, max_size=max_size)
+        for shard in shards.shard_names(shards_filepath):
+            for key, files in shards.read_samples(os.path.join(shards_filepath, shard)):
+                if shards.SHARDS_NAME + '/' + shard + '/' + key not in removed:
+                    writer.write(key, json.loads(files['json'])['class_name'], files)
+        writer.close()
+
+    @staticmethod
+    def print_report(report):
+        print('Hashed ' + str(report['images']) + ' images in ' + str(report['seconds']) + ' s, threshold ' +
+              str(report['threshold']) + ' bits')
+        for class_name, count in sorted(report['counts'].items()):
+            print('  ' + class_name + ': ' + str(count) + ' -> ' + str(len(report['kept'][class_name])) + ' (' +
+                  str(len(report['duplicates'][class_name])) + ' near duplicates, ' +
+                  str(len(report['balance'].get(class_name, []))) + ' for balance)')
+        for class_name, class_duplicates in sorted(report['duplicates'].items()):
+            for name, original, distance in class_duplicates[:3]:
+                print('  ' + name + ' is ' + str(distance) + ' bits from ' + original)
+        if report['unreadable']:
+            print(str(len(report['unreadable'])) + ' images could not be read, e.g. ' +
+                  ', '.join(report['unreadable'][:5]))
+
+
+if __name__ == '__main__':
+    deduplicator = Deduplicator('G:/Datasets/Planet/Texture/complete', threshold=4)
+    dataset_report = deduplicator.deduplicate('G:/Datasets/Planet/Texture_duplicates.json')
+    deduplicator.prune(dataset_report, 'G:/Datasets/Planet/Texture_duplicates')
@@ -0,0 +1,311 @@
+import bisect
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import util
+
+import numpy as np
+from PIL import Image
+
+
+def import_file(full_name, path):
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+common_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Rendering_Pipeline', 'src_common')
+shards = import_file('shards', os.path.join(common_path, 'shards.py'))
+manifest_module = import_file('manifest', os.path.join(common_path, 'manifest.py'))
+sampling = import_file('sampling', os.path.join(common_path, 'sampling.py'))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tif', '.tiff', '.exr')
+
+
+def check_image(image, std_threshold):
+    # returns the problem of a decoded image or None, a failed render is black, transparent or one flat color
+    array = np.asarray(image)
+    if array.ndim == 2:
+        array = array[..., None]
+    if array.shape[-1] in (2, 4) and array[..., -1].max() == 0:
+        return 'transparent', 'alpha is 0 everywhere'
+    color = array[..., :3] if array.shape[-1] >= 3 else array[..., :1]
+    if color.max() == 0:
+        return 'black', 'all pixels are 0'
+    deviation = float(color.std())
+    if deviation < std_threshold:
+        return 'constant', 'standard deviation ' + str(round(deviation, 3))
+    return None
+
+
+def decode(source, std_threshold):
+    try:
+        with Image.open(source) as image:
+            # load decodes all pixels, verify alone misses truncated image data
+            image.load()
+            if image.mode not in ('L', 'LA', 'RGB', 'RGBA', 'I;16', 'I'):
+                image = image.convert('RGBA')
+            return check_image(image, std_threshold)
+    except Exception as error:
+        return 'corrupt', type(error).__name__ + ': ' + str(error)
+
+
+def scan_files(filepaths, std_threshold):
+    # runs in a worker process, only the problems are sent back
+    problems = []
+    for filepath in filepaths:
+        problem = decode(filepath, std_threshold)
+        if problem is not None:
+            problems.append((filepath,) + problem)
+    return len(filepaths), problems
+
+
+def scan_shard(shard_filepath, std_threshold):
+    # runs in a worker process, returns the indices per class and the problems of one shard
+    problems = []
+    indices = {}
+    samples = 0
+    try:
+        for key, files in shards.read_samples(shard_filepath):
+            samples += 1
+            name = os.path.basename(shard_filepath) + '/' + key
+            try:
+                class_name = json.loads(files['json'])['class_name']
+            except Exception as error:
+                problems.append((name, 'corrupt', 'metadata: ' + type(error).__name__ + ': ' + str(error)))
+                continue
+            if key.isdigit():
+                indices.setdefault(class_name, []).append(int(key))
+            images = [extension for extension in files if '.' + extension.lower() in IMAGE_EXTENSIONS]
+            if not images:
+                problems.append((name, 'corrupt', 'no image in sample'))
+                continue
+            problem = decode(io.BytesIO(files[images[0]]), std_threshold)
+            if problem is not None:
+                problems.append((name + '.' + images[0],) + problem)
+    except Exception as error:
+        problems.append((os.path.basename(shard_filepath), 'corrupt', type(error).__name__ + ': ' + str(error)))
+    return samples, indices, problems
+
+
+class Scanner:
+    def __init__(self, filepath, expected_totals=None, workers=None, std_threshold=1.0, chunk_size=256):
+        # expected_totals is a dictionary of the form {class name: amount of images}, without it the totals are taken
+        # from the sample of the dataset if it was sampled. std_threshold is the standard deviation of the pixel
+        # values (0 to 255) below which an image counts as constant
+        self.filepath = filepath
+        self.expected_totals = expected_totals
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.std_threshold = std_threshold
+        self.chunk_size = chunk_size
+
+    def __list_images__(self):
+        images = {}
+        for c_class in os.scandir(self.filepath):
+            if not c_class.is_dir() or c_class.name == shards.SHARDS_NAME:
+                continue
+            images[c_class.name] = [entry.name for entry in os.scandir(c_class.path)
+                                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS]
+        return images
+
+    @staticmethod
+    def __indices__(file_names):
+        return sorted(int(os.path.splitext(name)[0]) for name in file_names if os.path.splitext(name)[0].isdigit())
+
+    def __scan_folders__(self, executor, images):
+        filepaths = [os.path.join(self.filepath, class_name, name)
+                     for class_name, names in images.items() for name in names]
+        chunks = [filepaths[start:start + self.chunk_size] for start in range(0, len(filepaths), self.chunk_size)]
+        problems = []
+        scanned = 0
+        futures = [executor.submit(scan_files, chunk, self.std_threshold) for chunk in chunks]
+        for future in futures:
+            count, chunk_problems = future.result()
+            scanned += count
+            problems.extend((os.path.relpath(filepath, self.filepath), kind, detail)
+                            for filepath, kind, detail in chunk_problems)
+            self.__progress__(scanned, len(filepaths))
+        return problems
+
+    def __scan_shards__(self, executor):
+        shards_filepath = os.path.join(self.filepath, shards.SHARDS_NAME)
+        futures = [executor.submit(scan_shard, os.path.join(shards_filepath, shard), self.std_threshold)
+                   for shard in shards.shard_names(shards_filepath)]
+        indices = {}
+        problems = []
+        for number, future in enumerate(futures):
+            samples, shard_indices, shard_problems = future.result()
+            for class_name, class_indices in shard_indices.items():
+                indices.setdefault(class_name, []).extend(class_indices)
+            problems.extend((os.path.join(shards.SHARDS_NAME, name), kind, detail)
+                            for name, kind, detail in shard_problems)
+            self.__progress__(number + 1, len(futures), 'shards')
+        return {class_name: sorted(class_indices) for class_name, class_indices in indices.items()}, problems
+
+    @staticmethod
+    def __progress__(done, total, unit='images'):
+        print('\rScanned ' + str(done) + '/' + str(total) + ' ' + unit, end='' if done < total else '\n')
+
+    def __sampled_totals__(self, indices):
+        # the images of a sampled dataset are numbered class after class, so the index ranges of the classes follow
+        # from the amount of sampled combinations per class
+        samples = sampling.load_sample(self.filepath)
+        if samples is None:
+            return None, []
+        offsets = [0]
+        for class_samples in samples:
+            offsets.append(offsets[-1] + len(class_samples))
+        names = {}
+        misplaced = []
+        for class_name, class_indices in indices.items():
+            for index in class_indices:
+                class_index = bisect.bisect_right(offsets, index) - 1
+                if index >= offsets[-1]:
+                    misplaced.append((class_name, index, 'index beyond the sample of ' + str(offsets[-1]) + ' images'))
+                elif names.setdefault(class_index, class_name) != class_name:
+                    misplaced.append((class_name, index, 'index belongs to class ' + names[class_index]))
+        totals = {names.get(class_index, 'class ' + str(class_index)): len(class_samples)
+                  for class_index, class_samples in enumerate(samples)}
+        return totals, misplaced
+
+    @staticmethod
+    def __gaps__(class_indices):
+        # the indices of a class are one consecutive range, so every hole between the first and the last index is a
+        # missing image
+        gaps = []
+        for previous, index in zip(class_indices, class_indices[1:]):
+            if index - previous > 1:
+                gaps.append((previous + 1, index - 1))
+        return gaps
+
+    def __read_manifest__(self):
+        # returns the recorded and the pruned indices, or None if the dataset has no manifest
+        if not os.path.isfile(os.path.join(self.filepath, manifest_module.MANIFEST_NAME)):
+            return None
+        manifest = manifest_module.Manifest(self.filepath)
+        try:
+            return set(manifest.entries()), manifest.pruned()
+        finally:
+            manifest.close()
+
+    @staticmethod
+    def __compare_manifest__(indices, recorded, pruned):
+        present = {index for class_indices in indices.values() for index in class_indices}
+        return {'missing': sorted(recorded - present), 'unrecorded': sorted(present - recorded),
+                'pruned': sorted(pruned)}
+
+    def scan(self, report_filepath=None):
+        start_time = time.time()
+        images = self.__list_images__()
+        indices = {class_name: self.__indices__(names) for class_name, names in images.items()}
+        sharded = os.path.isdir(os.path.join(self.filepath, shards.SHARDS_NAME))
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            problems = self.__scan_folders__(executor, images)
+            if sharded:
+                shard_indices, shard_problems = self.__scan_shards__(executor)
+                problems.extend(shard_problems)
+                for class_name, class_indices in shard_indices.items():
+                    indices[class_name] = sorted(indices.get(class_name, []) + class_indices)
+
+        # images pruned by the Deduplicator count as present for the totals and the gaps
+        recorded = self.__read_manifest__()
+        pruned = {}
+        for index, class_name in (recorded[1].items() if recorded is not None else ()):
+            pruned.setdefault(class_name, []).append(index)
+
+        counts = {class_name: len(class_indices) for class_name, class_indices in indices.items()}
+        for class_name, names in images.items():
+            # files without an index as name are counted too
+            counts[class_name] += len(names) - len(self.__indices__(names))
+        expected_totals, misplaced = (dict(self.expected_totals), []) if self.expected_totals is not None \
+            else self.__sampled_totals__(indices)
+        mismatches = {}
+        if expected_totals is not None:
+            for class_name in sorted(set(expected_totals) | set(counts)):
+                expected = expected_totals.get(class_name, 0)
+                found = counts.get(class_name, 0) + len(pruned.get(class_name, []))
+                if expected != found:
+                    mismatches[class_name] = {'expected': expected, 'found': found}
+
+        gaps = {}
+        for class_name, class_indices in indices.items():
+            class_gaps = self.__gaps__(sorted(class_indices + pruned.get(class_name, [])))
+            if class_gaps:
+                gaps[class_name] = class_gaps
+        duplicates = {}
+        seen = {}
+        for class_name, class_indices in indices.items():
+            for index in class_indices:
+                if index in seen:
+                    duplicates.setdefault(index, [seen[index]]).append(class_name)
+                seen[index] = class_name
+
+        report = {
+            'filepath': self.filepath,
+            'images': sum(counts.values()),
+            'seconds': round(time.time() - start_time, 1),
+            'counts': counts,
+            'expected': expected_totals,
+            'mismatches': mismatches,
+            'gaps': gaps,
+            'duplicates': {str(index): class_names for index, class_names in duplicates.items()},
+            'misplaced': misplaced,
+            'manifest': self.__compare_manifest__(indices, *recorded) if recorded is not None else None,
+            'problems': sorted(problems),
+        }
+        self.print_report(report)
+        if report_filepath is not None:
+            with open(report_filepath, 'w') as file:
+                json.dump(report, file, indent=1)
+        return not (report['problems'] or mismatches or report['gaps'] or duplicates or misplaced or (
+                report['manifest'] is not None and report['manifest']['missing']))
+
+    @staticmethod
+    def print_report(report):
+        print('Scanned ' + str(report['images']) + ' images in ' + str(report['seconds']) + ' s')
+        for class_name, count in sorted(report['counts'].items()):
+            line = '  ' + class_name + ': ' + str(count)
+            if class_name in report['mismatches']:
+                line += ' (expected ' + str(report['mismatches'][class_name]['expected']) + ')'
+            print(line)
+        for class_name, mismatch in sorted(report['mismatches'].items()):
+            if class_name not in report['counts']:
+                print('  ' + class_name + ': 0 (expected ' + str(mismatch['expected']) + ')')
+        if report['expected'] is None:
+            print('No expected totals given and the dataset was not sampled, only gaps are checked')
+
+        kinds = {}
+        for _, kind, _ in report['problems']:
+            kinds[kind] = kinds.get(kind, 0) + 1
+        if kinds:
+            print('Problems: ' + ', '.join(str(count) + ' ' + kind for kind, count in sorted(kinds.items())))
+            for filepath, kind, detail in report['problems'][:20]:
+                print('  ' + kind + ' ' + filepath + ': ' + detail)
+            if len(report['problems']) > 20:
+                print('  ...')
+        for class_name, gaps in sorted(report['gaps'].items()):
+            print('Missing indices of ' + class_name + ': ' + ', '.join(
+                str(first) if first == last else str(first) + '-' + str(last) for first, last in gaps[:10]) +
+                  (', ...' if len(gaps) > 10 else ''))
+        for index, class_names in report['duplicates'].items():
+            print('Index ' + index + ' exists in ' + ', '.join(class_names))
+        for class_name, index, detail in report['misplaced'][:20]:
+            print('Misplaced ' + class_name + '/' + str(index) + ': ' + detail)
+        if report['manifest'] is not None:
+            for key, description in (('missing', 'recorded in the manifest but missing'),
+                                     ('unrecorded', 'not recorded in the manifest'),
+                                     ('pruned', 'pruned by the Deduplicator')):
+                if report['manifest'][key]:
+                    print(str(len(report['manifest'][key])) + ' images ' + description + ', e.g. ' +
+                          ', '.join(str(index) for index in report['manifest'][key][:10]))
+        if not (kinds or report['mismatches'] or report['gaps'] or report['duplicates'] or report['misplaced']):
+            print('No problems found')
+
+
+if __name__ == '__main__':
+    scanner = Scanner('G:/Datasets/Geometric2/Shape_Texture')
+    scanner.scan('G:/Datasets/Geometric2/Shape_Texture_scan.json')
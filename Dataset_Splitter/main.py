@@ -1,7 +1,23 @@
+import json
 import os
+from importlib import util
+
 import numpy as np
 
 
+def import_file(full_name, path):
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+shards = import_file('shards', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Rendering_Pipeline',
+                                            'src_common', 'shards.py'))
+manifest = import_file('manifest', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                                                'Rendering_Pipeline', 'src_common', 'manifest.py'))
+
+
 class Splitter:
     def __init__(self, filepath):
         self.filepath = filepath
@@ -36,6 +52,55 @@ class Splitter:
 
         os.rename(self.filepath, os.path.join(os.path.dirname(self.filepath), 'train'))
 
+    def __class_offsets__(self, shard_list):
+        # the images of a class have consecutive global indices, so the smallest index of a class is its offset. It is
+        # taken from the manifest of the dataset folder or, if there is none, from a first pass over the shards
+        dataset_filepath = os.path.dirname(self.filepath)
+        if os.path.isfile(os.path.join(dataset_filepath, manifest.MANIFEST_NAME)):
+            dataset_manifest = manifest.Manifest(dataset_filepath)
+            samples = [(entry['class_name'], index) for index, entry in dataset_manifest.entries().items()]
+            dataset_manifest.close()
+        else:
+            samples = [(json.loads(files['json'])['class_name'], int(key)) for shard in shard_list
+                       for key, files in shards.read_samples(os.path.join(self.filepath, shard))]
+        offsets = {}
+        for class_name, index in samples:
+            offsets[class_name] = min(index, offsets.get(class_name, index))
+        return offsets
+
+    def split_shards(self, validation_class_indices, test_class_indices, max_size=1 << 30):
+        # the shards are read sequentially and the samples are written into new shards in the folders train, val and
+        # test next to the folder of the shards. The class indices are positions inside a class, the position of a
+        # sample is its key (the global image index) minus the offset of its class, so the order of the shards and
+        # missing samples do not matter
+        class_names = set()
+        shard_list = shards.shard_names(self.filepath)
+        for shard in shard_list:
+            class_names.update(shards.read_index(self.filepath, shard)['classes'])
+        class_names = sorted(class_names)
+        offsets = self.__class_offsets__(shard_list)
+
+        writers = {split: shards.ShardWriter(os.path.join(os.path.dirname(self.filepath), split), max_size=max_size)
+                   for split in ('train', 'val', 'test')}
+        validation_sets = [set(indices) for indices in validation_class_indices]
+        test_sets = [set(indices) for indices in test_class_indices]
+
+        for shard in shard_list:
+            for key, files in shards.read_samples(os.path.join(self.filepath, shard)):
+                class_name = json.loads(files['json'])['class_name']
+                class_index = class_names.index(class_name)
+                position = int(key) - offsets[class_name]
+                if position in validation_sets[class_index]:
+                    split = 'val'
+                elif position in test_sets[class_index]:
+                    split = 'test'
+                else:
+                    split = 'train'
+                writers[split].write(key, class_name, files)
+
+        for writer in writers.values():
+            writer.close()
+
 
 if __name__ == '__main__':
     splitter = Splitter('G:/Datasets/Planet/LightDirection_No_Clouds/complete')
@@ -0,0 +1,214 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+# The folder of the benchmark results, a result is named after the pipeline, the host and the commit
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+
+# The render settings of a benchmark, they make the scene small so a run takes minutes and not hours
+REFERENCE_SETTINGS = {'quality': 'draft', 'resolution_percentage': 25, 'seed': 0}
+
+
+def git_commit(directory):
+    """
+    :param directory: A folder inside the git repository
+    :return: The hash of the checked out commit, with the suffix -dirty if there are uncommitted changes, or None if
+        git is not available
+    :rtype: str
+    """
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=directory, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        changes = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=directory,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if changes else '')
+
+
+def environment(blender_version, blend_filepath):
+    """
+    Describes where a benchmark ran, so results of different hosts, Blender versions or scenes are not mistaken for a
+    regression.
+
+    :param blender_version: The version string of Blender
+    :param blend_filepath: The path of the benchmarked blend file
+    :return: A JSON serializable description
+    :rtype: dict
+    """
+
+    sha256 = hashlib.sha256()
+    if blend_filepath and os.path.isfile(blend_filepath):
+        with open(blend_filepath, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                sha256.update(chunk)
+    return {'host': socket.gethostname(), 'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'python': platform.python_version(), 'blender': blender_version,
+            'blend': os.path.basename(blend_filepath) if blend_filepath else None,
+            'blend_sha256': sha256.hexdigest() if blend_filepath else None,
+            'commit': git_commit(os.path.dirname(os.path.abspath(__file__))), 'time': time.time()}
+
+
+def summarize(seconds):
+    """
+    :param seconds: A list of measured durations
+    :return: A dictionary with the median, mean, minimum, maximum and standard deviation and the amount of measurements
+    :rtype: dict
+    """
+
+    return {'median': statistics.median(seconds), 'mean': statistics.fmean(seconds), 'min': min(seconds),
+            'max': max(seconds), 'stdev': statistics.stdev(seconds) if len(seconds) > 1 else 0.0,
+            'count': len(seconds)}
+
+
+def result_filepath(pipeline, result_environment, directory=None):
+    """
+    :param pipeline: The name of the pipeline, e.g. geometric
+    :param result_environment: The environment returned by environment
+    :param directory: The folder of the results, None uses RESULTS_PATH
+    :return: The default path of a result
+    :rtype: str
+    """
+
+    commit = (result_environment['commit'] or 'unknown')[:12]
+    return os.path.join(directory if directory is not None else RESULTS_PATH,
+                        pipeline + '_' + result_environment['host'] + '_' + commit + '.json')
+
+
+def save_result(filepath, result):
+    """
+    Saves a benchmark result as JSON.
+
+    :param filepath: The path of the file
+    :param result: A dictionary with the keys pipeline, environment, settings and metrics, where metrics has the form
+        {metric name: summary returned by summarize}
+    """
+
+    if os.path.dirname(filepath):
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w') as file:
+        json.dump(result, file, indent=1, sort_keys=True)
+
+
+def load_result(filepath):
+    """
+    :param filepath: The path of a result saved by save_result
+    :return: The result
+    :rtype: dict
+    """
+
+    with open(filepath) as file:
+        return json.load(file)
+
+
+def compare(baseline, current, threshold=0.1, min_seconds=0.01):
+    """
+    Compares the medians of the metrics of two results. A metric regressed if its median grew by more than threshold
+    and by more than min_seconds, so very short phases do not trigger on noise.
+
+    :param baseline: The result to compare against
+    :param current: The new result
+    :param threshold: The allowed relative slowdown, 0.1 is 10 %
+    :param min_seconds: The allowed absolute slowdown in seconds
+    :return: A list of dictionaries with the keys metric, baseline, current, ratio and status (regression,
+        improvement, unchanged, new or removed), ordered by the ratio
+    :rtype: list of dict
+    """
+
+    rows = []
+    for metric in sorted(set(baseline['metrics']) | set(current['metrics'])):
+        if metric not in current['metrics']:
+            rows.append({'metric': metric, 'baseline': baseline['metrics'][metric]['median'], 'current': None,
+                         'ratio': None, 'status': 'removed'})
+            continue
+        if metric not in baseline['metrics']:
+            rows.append({'metric': metric, 'baseline': None, 'current': current['metrics'][metric]['median'],
+                         'ratio': None, 'status': 'new'})
+            continue
+        old, new = baseline['metrics'][metric]['median'], current['metrics'][metric]['median']
+        ratio = new / old if old > 0 else float('inf') if new > 0 else 1.0
+        if ratio > 1 + threshold and new - old > min_seconds:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold) and old - new > min_seconds:
+            status = 'improvement'
+        else:
+            status = 'unchanged'
+        rows.append({'metric': metric, 'baseline': old, 'current': new, 'ratio': ratio, 'status': status})
+    return sorted(rows, key=lambda row: -row['ratio'] if row['ratio'] is not None else 0)
+
+
+def differences(baseline, current):
+    """
+    :param baseline: The result to compare against
+    :param current: The new result
+    :return: The keys of the environment and the settings which differ, a comparison across them is not a regression
+        of the code alone
+    :rtype: list of str
+    """
+
+    keys = ['blender', 'blend_sha256', 'host', 'cpu_count']
+    changed = [key for key in keys if baseline['environment'].get(key) != current['environment'].get(key)]
+    if baseline['settings'] != current['settings']:
+        changed.append('settings')
+    return changed
+
+
+def report(baseline, current, rows):
+    """
+    :param baseline: The result to compare against
+    :param current: The new result
+    :param rows: The rows returned by compare
+    :return: A readable comparison
+    :rtype: str
+    """
+
+    lines = ['Benchmark ' + current['pipeline'] + ': ' + str((baseline['environment']['commit'] or 'unknown')[:12]) +
+             ' -> ' + str((current['environment']['commit'] or 'unknown')[:12])]
+    for key in differences(baseline, current):
+        old, new = (baseline['settings'], current['settings']) if key == 'settings' else (
+            baseline['environment'].get(key), current['environment'].get(key))
+        lines.append('Warning: ' + key + ' differs (' + str(old) + ' -> ' + str(new) + ')')
+    for row in rows:
+        if row['status'] in ('new', 'removed'):
+            lines.append('  ' + row['metric'] + ': ' + row['status'])
+        elif row['status'] != 'unchanged' or row['metric'] == 'sequence':
+            lines.append('  ' + row['metric'] + ': ' + str(round(row['baseline'], 4)) + ' s -> ' +
+                         str(round(row['current'], 4)) + ' s (' + ('+' if row['ratio'] >= 1 else '') +
+                         str(round(100 * (row['ratio'] - 1), 1)) + ' %) ' + row['status'])
+    regressions = sum(row['status'] == 'regression' for row in rows)
+    lines.append(str(regressions) + ' regressions, ' + str(sum(row['status'] == 'improvement' for row in rows)) +
+                 ' improvements, ' + str(sum(row['status'] == 'unchanged' for row in rows)) + ' unchanged')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    Compares two benchmark results from the command line, e.g. python benchmark.py old.json new.json --threshold 0.1.
+
+    :param argv: The arguments, None uses sys.argv
+    :return: 1 if a metric regressed and 0 otherwise
+    :rtype: int
+    """
+
+    parser = argparse.ArgumentParser(prog='benchmark', description='compares two render benchmark results')
+    parser.add_argument('baseline', help='path of the result to compare against')
+    parser.add_argument('current', help='path of the new result')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed relative slowdown, 0.1 is 10 %%')
+    parser.add_argument('--min-seconds', type=float, default=0.01, help='allowed absolute slowdown in seconds')
+    arguments = parser.parse_args(argv)
+    baseline, current = load_result(arguments.baseline), load_result(arguments.current)
+    rows = compare(baseline, current, arguments.threshold, arguments.min_seconds)
+    print(report(baseline, current, rows))
+    return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
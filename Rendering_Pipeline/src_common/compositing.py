@@ -0,0 +1,90 @@
+import numpy as np
+
+# The outputs of the Render Layers node which are read for a recoloring, Blender 4 renamed the diffuse passes
+RECOLOR_PASSES = {'combined': ('Image',), 'diffuse_direct': ('Diffuse Direct', 'DiffDir'),
+                  'diffuse_indirect': ('Diffuse Indirect', 'DiffInd'), 'ramp_weight': ('ramp_weight',)}
+
+# The light group of the lights whose energy is swept
+LIGHT_GROUP = 'sweep'
+
+# The outputs of the Render Layers node which are read for a relighting
+RELIGHT_PASSES = {'combined': ('Image',), 'light_group': ('Combined_' + LIGHT_GROUP, LIGHT_GROUP)}
+
+# The outputs of the Render Layers node which are read for compositing over a pre-rendered background
+COMPOSITE_PASSES = {'combined': ('Image',)}
+
+
+def over(foreground, background):
+    """
+    Composites a render with a transparent film over a background with the Porter-Duff over operator.
+
+    :param foreground: The pixels of the form (height, width, 4) with linear premultiplied RGBA
+    :param background: The pixels of the background of the same form
+    :return: The composited pixels
+    :rtype: numpy.ndarray
+    """
+
+    result = foreground.astype(np.float32, copy=True)
+    result += (1 - foreground[..., 3:4]) * background
+    return result
+
+
+def relight(combined, light_group, ratio):
+    """
+    Changes the energy of the lights of a light group in a rendered image. The light of a group scales linearly with
+    its energy, so the contribution of the group in the combined pass is replaced by the light group pass times the
+    ratio of the energies. The alpha stays the same.
+
+    :param combined: The combined pass as array of the form (height, width, 4) with linear premultiplied RGBA
+    :param light_group: The pass of the light group of the form (height, width, channels)
+    :param ratio: The new energy divided by the energy in the render
+    :return: The relit combined pass
+    :rtype: numpy.ndarray
+    """
+
+    result = combined.astype(np.float32, copy=True)
+    result[..., :3] += (ratio - 1) * light_group[..., :3]
+    np.maximum(result[..., :3], 0, out=result[..., :3])
+    return result
+
+
+def light_scale(relit, combined):
+    """
+    :param relit: The relit combined pass
+    :param combined: The combined pass of the render
+    :return: How much brighter every channel of every pixel became by the relighting, 1 where the render is black
+    :rtype: numpy.ndarray
+    """
+
+    return np.divide(relit[..., :3], combined[..., :3], out=np.ones_like(relit[..., :3]),
+                     where=combined[..., :3] > 1e-6)
+
+
+def recolor(combined, diffuse_direct, diffuse_indirect, weight, old_color, new_color, scale=None):
+    """
+    Changes the color of the first element of a color ramp in a rendered image. The color ramp is linear in the colors
+    of its elements, so the albedo of a pixel changes by the weight of the element times the color difference and the
+    pixel by this change times the diffuse light which reached it. Light which was reflected by the recolored object
+    onto itself still has the old color, the error of this is shown by compare_sweeps of the Render class.
+
+    :param combined: The combined pass as array of the form (height, width, 4) with linear premultiplied RGBA
+    :param diffuse_direct: The diffuse direct pass of the form (height, width, channels)
+    :param diffuse_indirect: The diffuse indirect pass of the form (height, width, channels)
+    :param weight: The weight of the recolored element of the form (height, width), 0 where the object is not visible
+    :param old_color: The RGB(A) color of the element in the render
+    :param new_color: The RGB(A) color of the element in the result
+    :param scale: How much brighter the diffuse light became by a relighting of the same image, see light_scale. The
+        passes do not tell which part of the diffuse light comes from the light group, so this is an approximation
+    :return: The recolored combined pass
+    :rtype: numpy.ndarray
+    """
+
+    difference = np.asarray(new_color, dtype=np.float32)[:3] - np.asarray(old_color, dtype=np.float32)[:3]
+    light = diffuse_direct[..., :3] + diffuse_indirect[..., :3]
+    if scale is not None:
+        light = light * scale
+    result = combined.astype(np.float32, copy=True)
+    result[..., :3] += light * weight[..., None] * difference
+    np.maximum(result[..., :3], 0, out=result[..., :3])
+    return result
+
@@ -0,0 +1,224 @@
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import time
+
+# The folder of the CPU profiles, every host gets its own file named after its host name
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cpu_profiles')
+
+
+def profile_filepath(directory=None):
+    """
+    :param directory: The folder of the profiles, None uses PROFILES_PATH
+    :return: The path of the CPU profile of this host
+    :rtype: str
+    """
+
+    return os.path.join(directory if directory is not None else PROFILES_PATH, socket.gethostname() + '.json')
+
+
+def load_profile(directory=None):
+    """
+    Loads the CPU profile of this host written by CpuTuner.
+
+    :param directory: The folder of the profiles, None uses PROFILES_PATH
+    :return: A dictionary with the keys instances, threads and tile_size or None if this host was not tuned
+    :rtype: dict
+    """
+
+    filepath = profile_filepath(directory)
+    if not os.path.isfile(filepath):
+        return None
+    with open(filepath) as file:
+        profile = json.load(file)
+    # a profile copied from a host with another CPU does not fit
+    if profile.get('cpu_count') != os.cpu_count():
+        return None
+    return profile
+
+
+def best_settings(instances=None, directory=None):
+    """
+    Looks up the fastest settings of the CPU profile of this host.
+
+    :param instances: The amount of Blender instances which run at the same time, None returns the fastest amount
+    :param directory: The folder of the profiles, None uses PROFILES_PATH
+    :return: A dictionary with the keys instances, threads and tile_size or None if this host was not tuned
+    :rtype: dict
+    """
+
+    profile = load_profile(directory)
+    if profile is None:
+        return None
+    if instances is None:
+        return {key: profile[key] for key in ('instances', 'threads', 'tile_size')}
+    results = [result for result in profile['results'] if result['instances'] == instances]
+    if results:
+        best = max(results, key=lambda result: result['images_per_second'])
+        return {key: best[key] for key in ('instances', 'threads', 'tile_size')}
+    # an amount of instances which was not measured shares the threads
+    return {'instances': instances, 'threads': max(1, os.cpu_count() // instances), 'tile_size': profile['tile_size']}
+
+
+def save_profile(profile, directory=None):
+    """
+    Saves the CPU profile of this host.
+
+    :param profile: A dictionary with at least the keys instances, threads and tile_size
+    :param directory: The folder of the profiles, None uses PROFILES_PATH
+    """
+
+    filepath = profile_filepath(directory)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath + '.tmp', 'w') as file:
+        json.dump(dict(profile, host=socket.gethostname(), cpu_count=os.cpu_count(),
+                       date=time.strftime('%Y-%m-%d %H:%M:%S')), file, indent=4)
+    os.replace(filepath + '.tmp', filepath)
+
+
+class CpuTuner:
+    """
+    Finds the fastest CPU settings of this host for a dataset. Each tested combination of tile size, threads and
+    concurrent Blender instances is measured by starting the instances in the background with --benchmark. Every
+    instance renders a sample of images spread over the dataset, the timing starts when all instances finished their
+    first render, so loading the scene and compiling the kernels are not measured. First the tile size is tuned with a
+    single instance using all threads, then the amount of instances and threads with the best tile size. The best
+    settings are saved as profile of this host, which enable_cpu of Render and Farm load automatically.
+    """
+
+    def __init__(self, blender_filepath, blend_filepath, script_filepath, images=8, tile_sizes=(32, 64, 128, 256),
+                 instances=(1, 2, 4), thread_counts=None, script_arguments=None, profile_directory=None):
+        """
+        Initializes an instance of CpuTuner.
+
+        :param blender_filepath: The path of the Blender executable
+        :param blend_filepath: The path of the blend file which contains the scene
+        :param script_filepath: The path of main.py of the pipeline
+        :param images: The amount of images each instance renders per combination
+        :param tile_sizes: The tested tile sizes
+        :param instances: The tested amounts of concurrent Blender instances
+        :param thread_counts: The tested total amounts of threads of all instances, None tests all logical cores and
+            half of them (the physical cores if the CPU uses hyper-threading)
+        :param script_arguments: Further arguments passed to main.py, e.g. ['--job', job_filepath]
+        :param profile_directory: The folder of the profiles, None uses PROFILES_PATH
+        """
+
+        self.blender_filepath = blender_filepath
+        self.blend_filepath = blend_filepath
+        self.script_filepath = script_filepath
+        self.images = images
+        self.tile_sizes = tile_sizes
+        self.instances = instances
+        cpu_count = os.cpu_count()
+        self.thread_counts = thread_counts if thread_counts is not None else sorted({cpu_count, max(1, cpu_count // 2)})
+        self.script_arguments = script_arguments if script_arguments is not None else []
+        self.profile_directory = profile_directory
+        self.results = []
+
+    def __benchmark__(self, instances, threads, tile_size):
+        """
+        Measures the throughput of a combination.
+
+        :param instances: The amount of concurrent Blender instances
+        :param threads: The render threads per instance
+        :param tile_size: The tile size
+        :return: The images per second of all instances together or 0 if an instance failed
+        :rtype: float
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            start_filepath = os.path.join(directory, 'start')
+            result_filepaths = [os.path.join(directory, 'instance_' + str(index) + '.json')
+                                for index in range(instances)]
+            processes = []
+            for index, result_filepath in enumerate(result_filepaths):
+                with open(os.path.join(directory, 'instance_' + str(index) + '.log'), 'w') as log:
+                    processes.append(subprocess.Popen(
+                        [self.blender_filepath, self.blend_filepath, '--background', '--python', self.script_filepath,
+                         '--',
+                         '--benchmark', str(self.images),
+                         '--benchmark-result', result_filepath,
+                         '--benchmark-start', start_filepath,
+                         '--threads', str(threads),
+                         '--tile-size', str(tile_size)] + self.script_arguments,
+                        stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL))
+
+            # every instance signals that it is ready, then all start rendering at the same time
+            while not all(os.path.exists(filepath + '.ready') for filepath in result_filepaths):
+                if any(process.poll() is not None for process in processes):
+                    break
+                time.sleep(0.1)
+            start_time = time.time()
+            open(start_filepath, 'w').close()
+            for process in processes:
+                process.wait()
+
+            for index, process in enumerate(processes):
+                if process.returncode != 0 or not os.path.isfile(result_filepaths[index]):
+                    print('Instance ' + str(index) + ' failed, the end of its log was:')
+                    with open(os.path.join(directory, 'instance_' + str(index) + '.log')) as log:
+                        print(log.read()[-2000:])
+                    return 0
+            images = 0
+            end_time = start_time
+            for filepath in result_filepaths:
+                with open(filepath) as file:
+                    result = json.load(file)
+                images += result['images']
+                end_time = max(end_time, result['end'])
+        return images / (end_time - start_time)
+
+    def __measure__(self, instances, threads, tile_size):
+        """
+        Measures a combination once and prints the result.
+
+        :param instances: The amount of concurrent Blender instances
+        :param threads: The render threads per instance
+        :param tile_size: The tile size
+        :return: The images per second of all instances together
+        :rtype: float
+        """
+
+        for result in self.results:
+            if (result['instances'], result['threads'], result['tile_size']) == (instances, threads, tile_size):
+                return result['images_per_second']
+        images_per_second = self.__benchmark__(instances, threads, tile_size)
+        self.results.append({'instances': instances, 'threads': threads, 'tile_size': tile_size,
+                             'images_per_second': images_per_second})
+        print('{:>9} {:>7} {:>9} {:>12.3f}'.format(instances, threads, tile_size, images_per_second))
+        return images_per_second
+
+    def tune(self):
+        """
+        Measures the combinations and saves the fastest one as profile of this host.
+
+        :return: The saved profile
+        :rtype: dict
+        """
+
+        self.results = []
+        print('Instances Threads Tile size     Images/s')
+        tile_size = max(self.tile_sizes, key=lambda size: self.__measure__(1, max(self.thread_counts), size))
+        for instances in self.instances:
+            for thread_count in self.thread_counts:
+                if thread_count >= instances:
+                    self.__measure__(instances, thread_count // instances, tile_size)
+
+        best = max(self.results, key=lambda result: result['images_per_second'])
+        if best['images_per_second'] <= 0:
+            raise RuntimeError('No combination could be measured')
+        profile = dict(best, results=self.results)
+        save_profile(profile, self.profile_directory)
+        print('\nBest: ' + str(best['instances']) + ' instances with ' + str(best['threads']) + ' threads and tile '
+              'size ' + str(best['tile_size']) + ', saved to ' + profile_filepath(self.profile_directory))
+        return profile
+
+
+if __name__ == '__main__':
+    tuner = CpuTuner(blender_filepath='C:/Program Files/Blender Foundation/Blender 3.5/blender.exe',
+                     blend_filepath='C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/resources_g/'
+                                    'geometric.blend',
+                     script_filepath='C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/src_g/main.py')
+    tuner.tune()
@@ -0,0 +1,192 @@
+import bisect
+from collections import namedtuple
+
+Combination = namedtuple('Combination', ['index', 'class_index', 'values'])
+Combination.__doc__ = """
+A combination of attribute values for one image.
+
+:param index: The global index of the image
+:param class_index: The index of the class the image belongs to
+:param values: A dictionary of the form {attribute name: value index}, the camera perspective is stored with the keys
+    camera_height, camera_beta and camera_gamma
+"""
+
+CAMERA_ATTRIBUTES = ('camera_height', 'camera_beta', 'camera_gamma')
+
+
+class Enumerator:
+    """
+    Maps the global index of an image to its combination of attribute values in closed form. The images are ordered
+    like the recursive walk used to be: the classes one after another, inside a class the DEA attributes like the
+    digits of a mixed radix number with the first attribute changing least often and the camera perspective (height,
+    beta, gamma) as the fastest digits. The NDEA attributes form a second mixed radix number which counts up with every
+    image of a class. Every time it overflows the NDEA attribute which changes fastest is rotated.
+    """
+
+    def __init__(self, dea_sizes, ndea_sizes, camera_sizes):
+        """
+        Initializes an instance of Enumerator.
+
+        :param dea_sizes: For every class a list of tuples of the form (attribute name, number of values) with the DEA
+            and trace attributes in enumeration order
+        :param ndea_sizes: For every class a list of tuples of the form (attribute name, number of values) with the
+            NDEA attributes in rotation order
+        :param camera_sizes: A tuple of the form (number of heights, number of betas, number of gammas)
+        """
+
+        self.dea_sizes = dea_sizes
+        self.ndea_sizes = ndea_sizes
+        self.camera_sizes = camera_sizes
+
+        number_of_positions = camera_sizes[0] * camera_sizes[1] * camera_sizes[2]
+        self.class_totals = []
+        for sizes in dea_sizes:
+            class_total = number_of_positions
+            for _, size in sizes:
+                class_total *= size
+            self.class_totals.append(class_total)
+
+        self.class_offsets = [0]
+        for class_total in self.class_totals:
+            self.class_offsets.append(self.class_offsets[-1] + class_total)
+        self.total_images = self.class_offsets[-1]
+
+    def class_range(self, class_index):
+        """
+        :param class_index: The index of the class
+        :return: The index of the first image of the class and the index after its last image
+        :rtype: tuple of int
+        """
+
+        return self.class_offsets[class_index], self.class_offsets[class_index + 1]
+
+    def value_sizes(self, class_index):
+        """
+        :param class_index: The index of the class
+        :return: A dictionary of the form {attribute name: number of values} including the camera attributes
+        :rtype: dict
+        """
+
+        sizes = dict(self.dea_sizes[class_index])
+        sizes.update(self.ndea_sizes[class_index])
+        sizes.update(zip(CAMERA_ATTRIBUTES, self.camera_sizes))
+        return sizes
+
+    def combination(self, index):
+        """
+        Computes the combination of attribute values for an image.
+
+        :param index: The global index of the image
+        :return: The combination of the image
+        :rtype: Combination
+        """
+
+        if index < 0 or index >= self.total_images:
+            raise IndexError('image index ' + str(index) + ' out of range')
+        class_index = bisect.bisect_right(self.class_offsets, index) - 1
+        class_image = index - self.class_offsets[class_index]
+        values = {}
+
+        rest = class_image
+        camera_values = []
+        for size in reversed(self.camera_sizes):
+            camera_values.append(rest % size)
+            rest //= size
+        for name, size in reversed(self.dea_sizes[class_index]):
+            values[name] = rest % size
+            rest //= size
+
+        ndea_sizes = self.ndea_sizes[class_index]
+        if ndea_sizes:
+            period = 1
+            for _, size in ndea_sizes:
+                period *= size
+            rotation = class_image // period
+            rest = class_image % period
+            for offset in range(len(ndea_sizes)):
+                name, size = ndea_sizes[(rotation + offset) % len(ndea_sizes)]
+                values[name] = rest % size
+                rest //= size
+
+        for name, value in zip(CAMERA_ATTRIBUTES, reversed(camera_values)):
+            values[name] = value
+        return Combination(index, class_index, values)
+
+    def ordered(self, indices, order):
+        """
+        Sorts images so that the attributes change in the given order while rendering. Inside a class the first
+        attribute of the order changes least often, attributes missing from the order and the index decide ties. The
+        index of an image and therefore its file stay the same, only the order in which the images are rendered changes.
+
+        :param indices: An iterable of image indices
+        :param order: A list of attribute names
+        :return: The sorted list of indices
+        :rtype: list of int
+        """
+
+        def key(index):
+            combination = self.combination(index)
+            return (combination.class_index,) + tuple(combination.values[name] for name in order) + (index,)
+
+        return sorted(indices, key=key)
+
+    def interleaved(self, indices, block_size=1):
+        """
+        Interleaves the classes: block_size images of every class are taken in turn, so every class has about the same
+        amount of rendered images at any time. The order inside a class is kept, larger blocks change the class and
+        with it every attribute less often.
+
+        :param indices: An iterable of image indices
+        :param block_size: The amount of consecutive images of one class
+        :return: The interleaved list of indices
+        :rtype: list of int
+        """
+
+        classes = {}
+        for index in indices:
+            classes.setdefault(bisect.bisect_right(self.class_offsets, index) - 1, []).append(index)
+        queues = [classes[class_index] for class_index in sorted(classes)]
+        interleaved = []
+        for start in range(0, max((len(queue) for queue in queues), default=0), block_size):
+            for queue in queues:
+                interleaved += queue[start:start + block_size]
+        return interleaved
+
+
+class SampledEnumerator(Enumerator):
+    """
+    An Enumerator of a sample of the combinations instead of all combinations, so the size of the dataset grows with
+    the sample and not with the product of the attribute sizes. The images of a class are numbered in the order of its
+    sampled combinations, the classes one after another like in Enumerator.
+    """
+
+    def __init__(self, enumerator, samples):
+        """
+        Initializes an instance of SampledEnumerator.
+
+        :param enumerator: The Enumerator of all combinations
+        :param samples: For every class a list of dictionaries of the form {attribute name: value index}, see
+            sample_class in sampling.py
+        """
+
+        super().__init__(enumerator.dea_sizes, enumerator.ndea_sizes, enumerator.camera_sizes)
+        self.samples = samples
+        self.class_totals = [len(class_samples) for class_samples in samples]
+        self.class_offsets = [0]
+        for class_total in self.class_totals:
+            self.class_offsets.append(self.class_offsets[-1] + class_total)
+        self.total_images = self.class_offsets[-1]
+
+    def combination(self, index):
+        """
+        Looks up the sampled combination of an image.
+
+        :param index: The global index of the image
+        :return: The combination of the image
+        :rtype: Combination
+        """
+
+        if index < 0 or index >= self.total_images:
+            raise IndexError('image index ' + str(index) + ' out of range')
+        class_index = bisect.bisect_right(self.class_offsets, index) - 1
+        return Combination(index, class_index, dict(self.samples[class_index][index - self.class_offsets[class_index]]))
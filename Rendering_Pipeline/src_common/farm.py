@@ -0,0 +1,202 @@
+import os
+import subprocess
+import time
+from importlib import util
+
+
+def import_file(full_name, path):
+    """
+    Imports a python file.
+
+    :param full_name: The name of the file
+    :param path: The path to the file
+    :return: The module
+    """
+
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+common_path = os.path.dirname(os.path.abspath(__file__))
+
+cpu_tuning = import_file('cpu_tuning', os.path.join(common_path, 'cpu_tuning.py'))
+job_spec = import_file('job_spec', os.path.join(common_path, 'job_spec.py'))
+work_queue = import_file('work_queue', os.path.join(common_path, 'work_queue.py'))
+
+
+class Farm:
+    """
+    The class Farm coordinates several headless Blender workers which render one dataset together. Each worker runs
+    main.py of a pipeline, claims image index ranges from a shared WorkQueue and renders them. Workers which crash get
+    their leases released and are restarted as long as work is left. With a job file the datasets of the job are
+    rendered one after another, each with its own queue. Without workers and threads the settings of the CPU profile
+    of this host written by CpuTuner are used.
+    """
+
+    def __init__(self, blender_filepath, blend_filepath, script_filepath, queue_filepath, workers=None,
+                 range_size=50, lease_time=600, threads=None, max_restarts=3, script_arguments=None, job_filepath=None,
+                 tile_size=None):
+        """
+        Initializes an instance of Farm.
+
+        :param blender_filepath: The path of the Blender executable
+        :param blend_filepath: The path of the blend file which contains the scene
+        :param script_filepath: The path of main.py of the pipeline
+        :param queue_filepath: The path of the queue database, the worker logs are saved next to it
+        :param workers: The amount of Blender instances, None uses the CPU profile or a single instance without one
+        :param range_size: The amount of images per claimed range
+        :param lease_time: Seconds until the lease of an unresponsive worker expires
+        :param threads: Render threads per worker, 0 lets Cycles decide and None uses the CPU profile
+        :param max_restarts: How often a crashed worker is restarted
+        :param script_arguments: Further arguments passed to main.py
+        :param job_filepath: The path of a job file, the queue of each dataset is saved next to queue_filepath with
+            the index of the dataset appended
+        :param tile_size: The tile size of CPU workers, None uses the CPU profile
+        """
+
+        settings = cpu_tuning.best_settings(workers)
+        if settings is not None:
+            workers = settings['instances'] if workers is None else workers
+            threads = settings['threads'] if threads is None else threads
+            tile_size = settings['tile_size'] if tile_size is None else tile_size
+
+        self.blender_filepath = blender_filepath
+        self.blend_filepath = blend_filepath
+        self.script_filepath = script_filepath
+        self.queue_filepath = queue_filepath
+        self.workers = workers if workers is not None else 1
+        self.range_size = range_size
+        self.lease_time = lease_time
+        self.threads = threads if threads is not None else 0
+        self.tile_size = tile_size if tile_size is not None else 0
+        self.max_restarts = max_restarts
+        self.script_arguments = script_arguments if script_arguments is not None else []
+        self.job_filepath = job_filepath
+
+        self.queue = None
+        self.dataset_queue_filepath = queue_filepath
+        self.dataset_arguments = []
+        self.processes = {}
+        self.restarts = {}
+
+    def __start_worker__(self, worker):
+        """
+        Starts a headless Blender instance as worker.
+
+        :param worker: The name of the worker
+        """
+
+        log_filepath = os.path.join(os.path.dirname(os.path.abspath(self.dataset_queue_filepath)), worker + '.log')
+        with open(log_filepath, 'a') as log:
+            self.processes[worker] = subprocess.Popen(
+                [self.blender_filepath, self.blend_filepath, '--background', '--python', self.script_filepath, '--',
+                 '--queue', self.dataset_queue_filepath,
+                 '--worker', worker,
+                 '--range-size', str(self.range_size),
+                 '--lease-time', str(self.lease_time),
+                 '--threads', str(self.threads),
+                 '--tile-size', str(self.tile_size)] + self.dataset_arguments + self.script_arguments,
+                stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+
+    def __print_progress__(self, start_time):
+        """
+        Prints the state of the queue and the current throughput.
+
+        :param start_time: The time the farm was started
+        """
+
+        progress = self.queue.progress()
+        done = progress.get(work_queue.WorkQueue.DONE, (0, 0))[1] or 0
+        total = sum(images or 0 for _, images in progress.values())
+        elapsed = time.time() - start_time
+        print('Images: ' + str(done) + '\\' + str(total) + ' | Workers: ' + str(len(self.processes)) +
+              ' | Images/h: ' + str(round(done / elapsed * 3600)) + ' | ' +
+              ', '.join(state + ': ' + str(ranges) for state, (ranges, _) in sorted(progress.items())))
+
+    def run(self, poll_interval=10):
+        """
+        Starts all workers and supervises them until no work is left. With a job file this is repeated for every
+        dataset of the job.
+
+        :param poll_interval: Seconds between two checks of the workers
+        :return: True if all ranges were rendered and False if some ranges failed
+        :rtype: bool
+        """
+
+        if self.job_filepath is None:
+            return self.__run_queue__(self.queue_filepath, [], poll_interval)
+
+        finished = True
+        for index, dataset in enumerate(job_spec.load_job(self.job_filepath)):
+            print('\nDataset ' + dataset['filepath'])
+            queue_filepath = os.path.splitext(self.queue_filepath)[0] + '_' + str(index) + '.sqlite'
+            if not self.__run_queue__(queue_filepath, ['--job', self.job_filepath, '--dataset', str(index)],
+                                      poll_interval):
+                finished = False
+        return finished
+
+    def __run_queue__(self, queue_filepath, dataset_arguments, poll_interval):
+        """
+        Starts all workers for one queue and supervises them until no work is left.
+
+        :param queue_filepath: The path of the queue database
+        :param dataset_arguments: Arguments passed to main.py which select the dataset
+        :param poll_interval: Seconds between two checks of the workers
+        :return: True if all ranges were rendered and False if some ranges failed
+        :rtype: bool
+        """
+
+        self.queue = work_queue.WorkQueue(queue_filepath, self.lease_time)
+        self.dataset_queue_filepath = queue_filepath
+        self.dataset_arguments = dataset_arguments
+        start_time = time.time()
+        for index in range(self.workers):
+            worker = 'worker_' + str(index)
+            self.restarts[worker] = 0
+            self.__start_worker__(worker)
+
+        while self.processes:
+            time.sleep(poll_interval)
+            for worker, process in list(self.processes.items()):
+                if process.poll() is None:
+                    continue
+                del self.processes[worker]
+                released = self.queue.release(worker)
+                # a worker which exits normally found no pending range, the leases of the other workers are theirs
+                if process.returncode == 0:
+                    continue
+                print('\n' + worker + ' exited with code ' + str(process.returncode) + ', released ' +
+                      str(released) + ' ranges.')
+                if self.queue.has_work():
+                    if self.restarts[worker] < self.max_restarts:
+                        self.restarts[worker] += 1
+                        self.__start_worker__(worker)
+                    else:
+                        print('\n' + worker + ' was restarted too often and stays down.')
+            self.__print_progress__(start_time)
+
+        # a queue which was never filled, like by a dry run, has no ranges left
+        progress = self.queue.progress()
+        if any(state != work_queue.WorkQueue.DONE for state in progress):
+            print('\nRanges not rendered: ' + str({state: ranges for state, (ranges, _) in progress.items()
+                                                   if state != work_queue.WorkQueue.DONE}))
+            self.queue.close()
+            return False
+        self.queue.close()
+        return True
+
+
+if __name__ == '__main__':
+    farm = Farm(blender_filepath='C:/Program Files/Blender Foundation/Blender 3.5/blender.exe',
+                blend_filepath='C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/resources_g/geometric.blend',
+                script_filepath='C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/src_g/main.py',
+                queue_filepath='G:/Datasets/Geometric2/Shape_Texture_queue.sqlite',
+                workers=4,
+                threads=os.cpu_count() // 4)
+
+    if farm.run():
+        print('\nDataset finished')
+    else:
+        print('\nCreation of dataset was not finished.')
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def psnr(image, reference, max_value=1.0):
+    """
+    Computes the peak signal-to-noise ratio of an image compared to a reference.
+
+    :param image: An array of the form (height, width, channels)
+    :param reference: An array of the same shape as image
+    :param max_value: The highest possible pixel value
+    :return: The PSNR in dB, infinite for identical images
+    :rtype: float
+    """
+
+    mse = np.mean((np.asarray(image, dtype=np.float64) - np.asarray(reference, dtype=np.float64)) ** 2)
+    if mse == 0:
+        return float('inf')
+    return float(10 * np.log10(max_value ** 2 / mse))
+
+
+def box_filter(image, size):
+    """
+    Averages all windows of size x size pixels with an integral image.
+
+    :param image: A two-dimensional array
+    :param size: The side length of the window
+    :return: The averages of all windows which lie completely inside the image
+    :rtype: numpy.ndarray
+    """
+
+    integral = np.pad(np.cumsum(np.cumsum(image, axis=0), axis=1), ((1, 0), (1, 0)))
+    return (integral[size:, size:] - integral[:-size, size:] - integral[size:, :-size] + integral[:-size, :-size]) \
+        / size ** 2
+
+
+def luminance(image):
+    """
+    :param image: An array of the form (height, width, channels) with at least three channels
+    :return: The Rec. 709 luminance of the image
+    :rtype: numpy.ndarray
+    """
+
+    image = np.asarray(image, dtype=np.float64)
+    return 0.2126 * image[..., 0] + 0.7152 * image[..., 1] + 0.0722 * image[..., 2]
+
+
+def ssim(image, reference, max_value=1.0, window=7):
+    """
+    Computes the mean structural similarity of the luminance of an image compared to a reference with a uniform
+    window.
+
+    :param image: An array of the form (height, width, channels)
+    :param reference: An array of the same shape as image
+    :param max_value: The highest possible pixel value
+    :param window: The side length of the window
+    :return: The SSIM between -1 and 1, 1 for identical images
+    :rtype: float
+    """
+
+    x = luminance(image)
+    y = luminance(reference)
+    c1 = (0.01 * max_value) ** 2
+    c2 = (0.03 * max_value) ** 2
+    mean_x = box_filter(x, window)
+    mean_y = box_filter(y, window)
+    # sample covariances like the reference implementation of Wang et al.
+    correction = window ** 2 / (window ** 2 - 1)
+    variance_x = (box_filter(x * x, window) - mean_x ** 2) * correction
+    variance_y = (box_filter(y * y, window) - mean_y ** 2) * correction
+    covariance = (box_filter(x * y, window) - mean_x * mean_y) * correction
+    ssim_map = ((2 * mean_x * mean_y + c1) * (2 * covariance + c2)) / \
+        ((mean_x ** 2 + mean_y ** 2 + c1) * (variance_x + variance_y + c2))
+    return float(np.mean(ssim_map))
@@ -0,0 +1,102 @@
+import json
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Values used for every dataset which does not set them, the section [defaults] of a job file overrides them
+DEFAULTS = {
+    'class_names': ['Class_0', 'Class_1', 'Class_2', 'Class_3', 'Class_4', 'Class_5'],
+    'colors': [[0, 0, 1, 1], [0, 1, 0, 1], [0, 1, 1, 1], [1, 0, 0, 1], [1, 0, 1, 1], [1, 1, 0, 1]],
+    'ndea': [],
+    'quality': None,
+    'batch_size': 1,
+    'cost_aware': False,
+    'sharded': False,
+    'trace_filepath': None,
+    'overwrite': False,
+    'warm_up': False,
+    'device': 'OPTIX',
+    'dry_run': False,
+    'dry_run_workers': 1,
+    'budget': None,
+    'sampling': 'lhs',
+    'seed': 0,
+    'async_write': False,
+    'write_workers': 4,
+    'cache_filepath': None,
+    'proxy_filepath': None,
+    'proxy_oversampling': 2.0,
+    'recolor': False,
+    'relight': False,
+    'interleave': 0,
+}
+
+# Values of keys which only one pipeline knows, the other pipelines reject them
+PIPELINE_DEFAULTS = {
+    'geometric': {},
+    'planet': {
+        'composite_background': False,
+    },
+}
+
+REQUIRED = ('filepath', 'traces', 'attribute_values')
+
+
+def load_job(filepath, pipeline=None):
+    """
+    Loads a job file which lists several datasets to render one after another. The file is TOML (needs Python 3.11 or
+    tomli) or JSON and contains an optional table defaults and a list datasets, e.g.
+
+        [defaults]
+        attribute_values = 'C:/bachelorthesis/Rendering_Pipeline/resources_g/random_attributes_values.npz'
+        ndea = ['COLOR']
+
+        [[datasets]]
+        filepath = 'G:/Datasets/Geometric2/Shape'
+        traces = ['SHAPE']
+
+    Every dataset needs filepath, traces (names of the attributes) and attribute_values (the npz file of the random
+    attribute values), the other keys are listed in DEFAULTS. device can be empty to render on the CPU. With dry_run
+    a dataset is only planned (see plan of Render) for dry_run_workers workers instead of rendered. With budget at
+    most budget combinations per class are sampled. The keys of PIPELINE_DEFAULTS are only accepted by their pipeline.
+
+    :param filepath: The path of the job file
+    :param pipeline: The name of the pipeline which renders the job ('geometric' or 'planet') or None to accept the
+        keys of every pipeline
+    :return: A list of dictionaries with all keys of every dataset
+    :rtype: list of dict
+    """
+
+    if filepath.endswith('.toml'):
+        if tomllib is None:
+            raise ValueError('Reading ' + filepath + ' needs Python 3.11 or tomli, use a JSON job file instead')
+        with open(filepath, 'rb') as file:
+            job = tomllib.load(file)
+    else:
+        with open(filepath) as file:
+            job = json.load(file)
+
+    known = dict(DEFAULTS)
+    for name, pipeline_defaults in PIPELINE_DEFAULTS.items():
+        if pipeline is None or name == pipeline:
+            known.update(pipeline_defaults)
+    defaults = dict(known)
+    defaults.update(job.get('defaults', {}))
+    datasets = []
+    for index, dataset in enumerate(job.get('datasets', [])):
+        merged = dict(defaults)
+        merged.update(dataset)
+        missing = [key for key in REQUIRED if key not in merged]
+        unknown = [key for key in merged if key not in known and key not in REQUIRED]
+        if missing or unknown:
+            raise ValueError('Dataset ' + str(index) + ' of ' + filepath + ' is invalid, missing: ' +
+                             str(missing) + ', unknown: ' + str(unknown))
+        datasets.append(merged)
+    if not datasets:
+        raise ValueError('No datasets in ' + filepath)
+    return datasets
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tarfile
+import time
+
+MANIFEST_NAME = 'manifest.sqlite'
+
+
+def file_hash(filepath):
+    """
+    Computes the SHA-256 hash of a file.
+
+    :param filepath: The path of the file
+    :return: The hash as hexadecimal string
+    :rtype: str
+    """
+
+    sha256 = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def json_value(value):
+    """
+    Converts an attribute value into a value which can be serialized as JSON. Blender materials and objects are
+    represented by their name.
+
+    :param value: The attribute value
+    :return: The converted value
+    """
+
+    if hasattr(value, 'name'):
+        return value.name
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, (tuple, list)):
+        return [json_value(element) for element in value]
+    return value
+
+
+def is_manifest_file(filename):
+    """
+    :param filename: The name of a file in the dataset folder
+    :return: True if the file belongs to the manifest and False otherwise
+    :rtype: bool
+    """
+
+    return filename.startswith(MANIFEST_NAME)
+
+
+def archive_member(filename):
+    """
+    Splits the path of a file which is stored inside a tar shard.
+
+    :param filename: The path of an image relative to the dataset folder
+    :return: A tuple of the form (path of the shard, name of the member) or None if the image is a normal file
+    :rtype: tuple of str
+    """
+
+    parts = filename.replace('\\', '/').split('/')
+    for index, part in enumerate(parts[:-1]):
+        if part.endswith('.tar'):
+            return os.path.join(*parts[:index + 1]), '/'.join(parts[index + 1:])
+    return None
+
+
+class Manifest:
+    """
+    An append-only record of all rendered images of a dataset. Every entry contains the global index of an image, its
+    class, the path relative to the dataset folder, the attribute values, the file size and the SHA-256 hash of the
+    file. An image is only recorded after it was completely written, so half written files are never part of the
+    manifest. If an image is rendered again the latest entry is valid. Images which were removed from the dataset on
+    purpose, like near duplicates, are marked as pruned and left out of the entries.
+    """
+
+    def __init__(self, filepath):
+        """
+        Initializes an instance of Manifest and creates the database if it does not exist.
+
+        :param filepath: The path of the dataset folder
+        """
+
+        self.filepath = filepath
+        self.connection = sqlite3.connect(os.path.join(filepath, MANIFEST_NAME), timeout=60, isolation_level=None)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS images (id INTEGER PRIMARY KEY AUTOINCREMENT, image_index INTEGER, '
+            'class_name TEXT, filename TEXT, value_indices TEXT, attributes TEXT, file_size INTEGER, sha256 TEXT, '
+            'rendered_at REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS image_index ON images (image_index)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS pruned (image_index INTEGER PRIMARY KEY, class_name TEXT, pruned_at REAL)')
+
+    def record(self, index, class_name, filename, value_indices, attributes, file_size=None, sha256=None):
+        """
+        Records a completely written image. Images stored inside a tar shard are recorded with the path of the shard
+        followed by the name of the member and must be given with their size and hash.
+
+        :param index: The global index of the image
+        :param class_name: The name of the class of the image
+        :param filename: The path of the image relative to the dataset folder
+        :param value_indices: A dictionary of the form {attribute name: value index}
+        :param attributes: A dictionary of the form {attribute name: value}, the values must be JSON serializable
+        :param file_size: The size of the image, read from the file if None
+        :param sha256: The hash of the image, computed from the file if None
+        """
+
+        image_filepath = os.path.join(self.filepath, filename)
+        if file_size is None:
+            file_size = os.path.getsize(image_filepath)
+        if sha256 is None:
+            sha256 = file_hash(image_filepath)
+        self.connection.execute(
+            'INSERT INTO images (image_index, class_name, filename, value_indices, attributes, file_size, sha256, '
+            'rendered_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (index, class_name, filename, json.dumps(value_indices), json.dumps(attributes),
+             file_size, sha256, time.time()))
+
+    def entries(self, indices=None):
+        """
+        Returns the latest entry of every recorded image without accessing the image files.
+
+        :param indices: An optional iterable of image indices to which the result is restricted
+        :return: A dictionary of the form {image index: entry} where entry is a dictionary of the columns
+        :rtype: dict
+        """
+
+        wanted = set(indices) if indices is not None else None
+        if wanted is None:
+            lower, upper = 0, float('inf')
+        elif wanted:
+            lower, upper = min(wanted), max(wanted)
+        else:
+            return {}
+        cursor = self.connection.execute(
+            'SELECT image_index, class_name, filename, value_indices, attributes, file_size, sha256, rendered_at '
+            'FROM images WHERE id IN (SELECT MAX(id) FROM images WHERE image_index BETWEEN ? AND ? '
+            'GROUP BY image_index) AND image_index NOT IN (SELECT image_index FROM pruned)', (lower, upper))
+        entries = {}
+        for index, class_name, filename, value_indices, attributes, file_size, sha256, rendered_at in cursor:
+            if wanted is None or index in wanted:
+                entries[index] = {'index': index, 'class_name': class_name, 'filename': filename,
+                                  'value_indices': json.loads(value_indices), 'attributes': json.loads(attributes),
+                                  'file_size': file_size, 'sha256': sha256, 'rendered_at': rendered_at}
+        return entries
+
+    def new_entries(self, after=0):
+        """
+        Returns the entries recorded since an earlier call, so a reader can follow a dataset while it is rendered
+        without reading the whole manifest again.
+
+        :param after: The row id returned by the previous call, 0 returns every entry
+        :return: A tuple of the form (list of entries in recording order, row id of the last entry)
+        :rtype: tuple
+        """
+
+        cursor = self.connection.execute(
+            'SELECT id, image_index, class_name, filename, value_indices, attributes, file_size, sha256, rendered_at '
+            'FROM images WHERE id > ? AND image_index NOT IN (SELECT image_index FROM pruned) ORDER BY id', (after,))
+        entries = []
+        for row_id, index, class_name, filename, value_indices, attributes, file_size, sha256, rendered_at in cursor:
+            entries.append({'index': index, 'class_name': class_name, 'filename': filename,
+                            'value_indices': json.loads(value_indices), 'attributes': json.loads(attributes),
+                            'file_size': file_size, 'sha256': sha256, 'rendered_at': rendered_at})
+            after = row_id
+        return entries, after
+
+    def query(self, class_name=None, **attributes):
+        """
+        Finds recorded images by their class and attribute values, e.g. query(color=[0, 0, 1, 1]).
+
+        :param class_name: The name of the class or None for all classes
+        :param attributes: Attribute values the images must have
+        :return: A list of the matching entries ordered by index
+        :rtype: list of dict
+        """
+
+        return [entry for _, entry in sorted(self.entries().items())
+                if (class_name is None or entry['class_name'] == class_name)
+                and all(entry['attributes'].get(name) == value for name, value in attributes.items())]
+
+    def summary(self):
+        """
+        :return: A dictionary of the form {class name: number of recorded images}
+        :rtype: dict
+        """
+
+        summary = {}
+        for entry in self.entries().values():
+            summary[entry['class_name']] = summary.get(entry['class_name'], 0) + 1
+        return summary
+
+    def is_valid(self, entry, verify):
+        """
+        Checks whether the file of an entry is still intact.
+
+        :param entry: An entry of the manifest
+        :param verify: 'size' compares the file size and 'hash' additionally compares the hash
+        :return: True if the file exists and matches the entry and False otherwise
+        :rtype: bool
+        """
+
+        member = archive_member(entry['filename'])
+        if member is not None:
+            return self.__is_valid_member__(entry, member, verify)
+        image_filepath = os.path.join(self.filepath, entry['filename'])
+        try:
+            if os.path.getsize(image_filepath) != entry['file_size']:
+                return False
+        except OSError:
+            return False
+        return verify != 'hash' or file_hash(image_filepath) == entry['sha256']
+
+    def __is_valid_member__(self, entry, member, verify):
+        """
+        Checks whether an image inside a tar shard is still intact. Only the hash check reads the shard.
+
+        :param entry: An entry of the manifest
+        :param member: A tuple of the form (path of the shard, name of the member)
+        :param verify: 'size' checks that the shard exists and 'hash' additionally compares the hash of the image
+        :return: True if the image matches the entry and False otherwise
+        :rtype: bool
+        """
+
+        shard_filepath = os.path.join(self.filepath, member[0])
+        if not os.path.isfile(shard_filepath):
+            return False
+        if verify != 'hash':
+            return True
+        try:
+            with tarfile.open(shard_filepath) as archive:
+                data = archive.extractfile(member[1]).read()
+        except (KeyError, tarfile.TarError):
+            return False
+        return len(data) == entry['file_size'] and hashlib.sha256(data).hexdigest() == entry['sha256']
+
+    def prune(self, indices):
+        """
+        Marks recorded images as pruned, they are no longer part of the entries and are not rendered again on resume.
+
+        :param indices: An iterable of the indices of the images which were removed from the dataset
+        """
+
+        indices = list(indices)
+        entries = self.entries(indices)
+        now = time.time()
+        self.connection.executemany('INSERT OR REPLACE INTO pruned VALUES (?, ?, ?)',
+                                    [(index, entries[index]['class_name'], now) for index in indices
+                                     if index in entries])
+
+    def pruned(self):
+        """
+        :return: A dictionary of the form {image index: class name} of the pruned images
+        :rtype: dict
+        """
+
+        return dict(self.connection.execute('SELECT image_index, class_name FROM pruned'))
+
+    def missing_indices(self, indices, verify='size'):
+        """
+        Determines which images still have to be rendered.
+
+        :param indices: An iterable of all image indices which should exist
+        :param verify: None trusts the manifest, 'size' checks the file sizes and 'hash' the hashes of all files
+        :return: A sorted list of the indices which are not recorded or whose files are missing or corrupt, pruned
+            images are not missing
+        :rtype: list of int
+        """
+
+        indices = list(indices)
+        entries = self.entries(indices)
+        pruned = self.pruned()
+        return sorted(index for index in indices if index not in pruned and (
+            index not in entries or (verify is not None and not self.is_valid(entries[index], verify))))
+
+    def close(self):
+        """
+        Closes the connection to the database.
+        """
+
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    manifest = Manifest('G:/Datasets/Geometric2/Shape_Texture')
+    for name, count in sorted(manifest.summary().items()):
+        print(name + ': ' + str(count))
@@ -0,0 +1,260 @@
+import hashlib
+import io
+import os
+import struct
+import threading
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+FILE_FORMATS = ('PNG', 'WEBP')
+
+WrittenImage = namedtuple('WrittenImage', ['key', 'filepath', 'data', 'size', 'sha256'])
+WrittenImage.__doc__ = """
+An image which was encoded by an AsyncWriter.
+
+:param key: The key given when the image was submitted
+:param filepath: The path of the written file or None if the image was only encoded
+:param data: The encoded image if it was only encoded, otherwise None
+:param size: The size of the encoded image in bytes
+:param sha256: The SHA-256 hash of the encoded image
+"""
+
+
+def srgb_oetf(linear):
+    """
+    Converts linear values into sRGB values like the Standard view transform of Blender.
+
+    :param linear: An array of linear values
+    :return: The sRGB values from 0 to 1
+    :rtype: numpy.ndarray
+    """
+
+    linear = np.clip(linear, 0, 1)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+
+
+def to_image(pixels, width, height, color_mode='RGBA', color_depth='8'):
+    """
+    Converts the pixels of a Blender image (linear, premultiplied alpha, bottom row first) into an image as saved by
+    Blender with the Standard view transform. The dither noise Blender adds when saving is not added.
+
+    :param pixels: The flat float RGBA pixels
+    :param width: The width of the image
+    :param height: The height of the image
+    :param color_mode: 'RGB' or 'RGBA'
+    :param color_depth: '8' or '16'
+    :return: The image as array of the form (height, width, channels) with the type uint8 or uint16
+    :rtype: numpy.ndarray
+    """
+
+    rgba = np.asarray(pixels, dtype=np.float32).reshape(height, width, 4)[::-1]
+    if color_mode == 'RGB':
+        image = srgb_oetf(rgba[..., :3])
+    elif color_mode == 'RGBA':
+        alpha = rgba[..., 3:]
+        # the file stores straight alpha
+        color = np.divide(rgba[..., :3], alpha, out=np.zeros_like(rgba[..., :3]), where=alpha > 0)
+        image = np.concatenate((srgb_oetf(color), np.clip(alpha, 0, 1)), axis=-1)
+    else:
+        raise ValueError('Unsupported color mode ' + str(color_mode))
+    if color_depth == '16':
+        return (image * 65535 + 0.5).astype(np.uint16)
+    return (image * 255 + 0.5).astype(np.uint8)
+
+
+def encode_png(image, compression=6):
+    """
+    Encodes an image as PNG. Every row is stored with the Up filter.
+
+    :param image: An array of the form (height, width, channels) with 1, 3 or 4 channels and the type uint8 or uint16
+    :param compression: The zlib compression level from 0 to 9
+    :return: The PNG file
+    :rtype: bytes
+    """
+
+    height, width, channels = image.shape
+    bit_depth = 16 if image.dtype == np.uint16 else 8
+    rows = np.ascontiguousarray(image.astype('>u2') if bit_depth == 16 else image).view(np.uint8).reshape(height, -1)
+    filtered = rows.copy()
+    filtered[1:] -= rows[:-1]
+    raw = np.concatenate((np.full((height, 1), 2, dtype=np.uint8), filtered), axis=1).tobytes()
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, bit_depth, {1: 0, 3: 2, 4: 6}[channels], 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw, compression)) +
+            chunk(b'IEND', b''))
+
+
+def encode_webp(image, quality=90):
+    """
+    Encodes an 8 bit image as WebP, needs Pillow.
+
+    :param image: An array of the form (height, width, channels) with 3 or 4 channels and the type uint8
+    :param quality: The quality from 0 to 100, 100 is lossless
+    :return: The WebP file
+    :rtype: bytes
+    """
+
+    if Image is None:
+        raise ValueError('Writing WebP images needs Pillow')
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, 'WEBP', quality=quality, lossless=quality >= 100)
+    return buffer.getvalue()
+
+
+class AsyncWriter:
+    """
+    Encodes and writes images in background threads while the next image is rendered. zlib and Pillow release the GIL,
+    so the threads run in parallel to Blender. At most max_pending images wait at the same time, further submits block
+    until an image is written (backpressure). The written files are synced to the disk in batches of fsync_every
+    files, an image is only reported by done after its batch was synced, so it can be recorded safely.
+    """
+
+    def __init__(self, workers=4, max_pending=16, fsync_every=32, file_format='PNG', compression=6, quality=90):
+        """
+        Initializes an instance of AsyncWriter.
+
+        :param workers: The amount of threads
+        :param max_pending: The maximal amount of submitted images which are not written yet
+        :param fsync_every: The amount of files which are synced together
+        :param file_format: 'PNG' or 'WEBP'
+        :param compression: The zlib compression level of PNG images from 0 to 9
+        :param quality: The quality of WebP images from 0 to 100
+        """
+
+        if file_format not in FILE_FORMATS:
+            raise ValueError('Unsupported file format ' + str(file_format))
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.Semaphore(max_pending)
+        self.lock = threading.Lock()
+        self.fsync_every = fsync_every
+        self.file_format = file_format
+        self.compression = compression
+        self.quality = quality
+        self.futures = set()
+        self.unsynced = []
+        self.finished = []
+        self.error = None
+
+    def submit(self, key, image, filepath=None):
+        """
+        Encodes and writes an image in the background. Blocks while max_pending images are waiting.
+
+        :param key: Any value returned with the image by done
+        :param image: An image returned by to_image
+        :param filepath: The path of the file, None only encodes the image and returns the data
+        """
+
+        self.__raise_error__()
+        self.slots.acquire()
+        future = self.executor.submit(self.__write__, key, image, filepath)
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+
+    def __write__(self, key, image, filepath):
+        """
+        Encodes and writes an image, runs in a background thread.
+
+        :param key: The key of the image
+        :param image: The image
+        :param filepath: The path of the file or None
+        """
+
+        try:
+            if self.file_format == 'PNG':
+                data = encode_png(image, self.compression)
+            else:
+                data = encode_webp(image, self.quality)
+            written = WrittenImage(key, filepath, data if filepath is None else None, len(data),
+                                   hashlib.sha256(data).hexdigest())
+            if filepath is None:
+                with self.lock:
+                    self.finished.append(written)
+                return
+
+            # a crash never leaves a truncated file under the final name
+            with open(filepath + '.tmp', 'wb') as file:
+                file.write(data)
+            os.replace(filepath + '.tmp', filepath)
+            batch = []
+            with self.lock:
+                self.unsynced.append(written)
+                if len(self.unsynced) >= self.fsync_every:
+                    batch, self.unsynced = self.unsynced, []
+            self.__sync__(batch)
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.slots.release()
+
+    def __sync__(self, batch):
+        """
+        Syncs written files to the disk and hands them to done.
+
+        :param batch: A list of WrittenImage
+        """
+
+        for written in batch:
+            descriptor = os.open(written.filepath, os.O_RDWR)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+        with self.lock:
+            self.finished.extend(batch)
+
+    def __raise_error__(self):
+        """
+        Raises the error of a failed background write in the calling thread.
+        """
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError('Writing an image failed') from error
+
+    def done(self):
+        """
+        :return: The images which were written and synced since the last call
+        :rtype: list of WrittenImage
+        """
+
+        self.__raise_error__()
+        with self.lock:
+            finished, self.finished = self.finished, []
+        return finished
+
+    def flush(self):
+        """
+        Waits until all submitted images are written and syncs the remaining files.
+
+        :return: The images which were written and synced since the last call of done
+        :rtype: list of WrittenImage
+        """
+
+        wait(list(self.futures))
+        with self.lock:
+            batch, self.unsynced = self.unsynced, []
+        self.__sync__(batch)
+        return self.done()
+
+    def close(self):
+        """
+        Writes all submitted images and stops the threads.
+
+        :return: The images which were written and synced since the last call of done
+        :rtype: list of WrittenImage
+        """
+
+        finished = self.flush()
+        self.executor.shutdown()
+        return finished
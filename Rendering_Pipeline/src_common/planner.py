@@ -0,0 +1,110 @@
+import datetime
+import os
+import shutil
+
+
+def format_bytes(size):
+    """
+    :param size: A size in bytes
+    :return: The size with the largest fitting unit, e.g. 1.5 GB
+    :rtype: str
+    """
+
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if abs(size) < 1024 or unit == 'TB':
+            return str(round(size, 1)) + ' ' + unit
+        size /= 1024
+
+
+def stratified_indices(enumerator, number_of_images):
+    """
+    Picks image indices spread evenly over every class, so each class is represented in the sample even if the classes
+    have very different sizes.
+
+    :param enumerator: The Enumerator of the dataset
+    :param number_of_images: The amount of images of the sample, at least one per class
+    :return: A sorted list of image indices
+    :rtype: list of int
+    """
+
+    per_class = max(1, number_of_images // len(enumerator.class_totals))
+    indices = set()
+    for class_index, class_total in enumerate(enumerator.class_totals):
+        start, _ = enumerator.class_range(class_index)
+        # the middle of each of per_class equal parts of the class
+        parts = min(per_class, class_total)
+        indices.update(start + int((part + 0.5) * class_total / parts) for part in range(parts))
+    return sorted(indices)
+
+
+def breakdown(enumerator, class_names, roles):
+    """
+    Creates a table with the amount of images and the amount of values of every attribute per class.
+
+    :param enumerator: The Enumerator of the dataset
+    :param class_names: A list of the class names
+    :param roles: A dictionary of the form {attribute name: role}, e.g. trace, DEA or NDEA
+    :return: The table
+    :rtype: str
+    """
+
+    names = list(enumerator.value_sizes(0))
+    header = ['Class', 'Images'] + [name + ' (' + roles.get(name, 'camera') + ')' for name in names]
+    rows = [[class_names[class_index], str(class_total)] +
+            [str(enumerator.value_sizes(class_index)[name]) for name in names]
+            for class_index, class_total in enumerate(enumerator.class_totals)]
+    rows.append(['Total', str(enumerator.total_images)] + [''] * len(names))
+    widths = [max(len(row[column]) for row in [header] + rows) for column in range(len(header))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+                     for row in [header] + rows)
+
+
+def free_space(filepath):
+    """
+    :param filepath: A path, which does not need to exist yet
+    :return: The free bytes of the drive of the path
+    :rtype: int
+    """
+
+    filepath = os.path.abspath(filepath)
+    while not os.path.exists(filepath):
+        filepath = os.path.dirname(filepath)
+    return shutil.disk_usage(filepath).free
+
+
+def projection(images, seconds, sizes, workers, free_bytes):
+    """
+    Projects the measurements of a sample onto the remaining images of a dataset.
+
+    :param images: The amount of images to render
+    :param seconds: A list of the render seconds of the sampled images
+    :param sizes: A list of the file sizes in bytes of the sampled images
+    :param workers: The amount of workers rendering at the same time, each as fast as the measured one
+    :param free_bytes: The free bytes of the drive of the dataset
+    :return: A dictionary with the keys images, seconds_per_image, bytes_per_image, workers, seconds, bytes,
+        free_bytes and fits
+    :rtype: dict
+    """
+
+    seconds_per_image = sum(seconds) / len(seconds)
+    bytes_per_image = sum(sizes) / len(sizes)
+    return {'images': images, 'seconds_per_image': seconds_per_image, 'bytes_per_image': bytes_per_image,
+            'workers': workers, 'seconds': images * seconds_per_image / workers, 'bytes': images * bytes_per_image,
+            'free_bytes': free_bytes, 'fits': images * bytes_per_image <= free_bytes}
+
+
+def report(plan):
+    """
+    :param plan: A dictionary returned by projection
+    :return: The projected render time and disk usage as text
+    :rtype: str
+    """
+
+    text = ('Images: ' + str(plan['images']) + ' | ' + str(round(plan['seconds_per_image'], 2)) + ' s/image | ' +
+            format_bytes(plan['bytes_per_image']) + '/image\n' +
+            'Render time with ' + str(plan['workers']) + ' worker(s): ' +
+            str(datetime.timedelta(seconds=round(plan['seconds']))) +
+            '\nDisk usage: ' + format_bytes(plan['bytes']) + ' of ' + format_bytes(plan['free_bytes']) + ' free')
+    if not plan['fits']:
+        text += '\nThe dataset does not fit on the drive!'
+    return text
@@ -0,0 +1,195 @@
+import datetime
+import json
+import time
+from contextlib import contextmanager
+
+PHASES = ('scene_update', 'depsgraph_update', 'cache', 'render', 'background', 'write', 'record')
+
+
+def format_seconds(seconds):
+    """
+    :param seconds: A duration in seconds
+    :return: The duration in the form h:mm:ss
+    :rtype: str
+    """
+
+    return str(datetime.timedelta(seconds=round(seconds)))
+
+
+def export_chrome_trace(trace_filepath, chrome_filepath):
+    """
+    Converts a trace written by Profiler into the Chrome trace format, which can be opened with chrome://tracing or
+    Perfetto. Every image is shown as one slice with its phases below it.
+
+    :param trace_filepath: The path of the JSONL trace
+    :param chrome_filepath: The path of the JSON file which is written
+    """
+
+    events = []
+    with open(trace_filepath) as file:
+        for line in file:
+            image = json.loads(line)
+            events.append({'name': 'image ' + str(image['index']), 'cat': image['class_name'], 'ph': 'X',
+                           'ts': image['start'] * 1e6, 'dur': image['duration'] * 1e6, 'pid': 0, 'tid': 0,
+                           'args': {'images': image['images'], 'changed': image['changed']}})
+            for name, (start, duration) in image['phases'].items():
+                events.append({'name': name, 'cat': 'phase', 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+                               'pid': 0, 'tid': 0})
+    with open(chrome_filepath, 'w') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+
+class Profiler:
+    """
+    Measures how long each phase of rendering an image takes. Every image (or keyframe batch) is written as one line of
+    a JSONL trace and a status line with the images per second, the estimated remaining time and the slowest attribute
+    transitions is printed periodically.
+    """
+
+    def __init__(self, report_interval=30):
+        """
+        Initializes an instance of Profiler.
+
+        :param report_interval: The seconds between two status lines
+        """
+
+        self.report_interval = report_interval
+        self.trace = None
+        self.remaining = {}
+        self.start_time = self.last_report = time.time()
+        self.images = 0
+        self.class_progress = {}
+        self.phase_totals = {}
+        self.transitions = {}
+        self.current = None
+
+    def start(self, remaining, trace_filepath=None):
+        """
+        Starts the measurement of a rendering run.
+
+        :param remaining: A dictionary of the form {class name: images to render}
+        :param trace_filepath: The path of the JSONL trace, None writes no trace
+        """
+
+        self.close()
+        self.trace = open(trace_filepath, 'a') if trace_filepath is not None else None
+        self.remaining = dict(remaining)
+        self.start_time = self.last_report = time.time()
+        self.images = 0
+        self.class_progress = {}
+        self.phase_totals = {}
+        self.transitions = {}
+
+    def start_image(self, index, class_name, images=1):
+        """
+        Starts the measurement of an image or a keyframe batch.
+
+        :param index: The index of the (first) image
+        :param class_name: The name of the class of the image
+        :param images: The amount of images rendered together
+        """
+
+        self.current = {'index': index, 'class_name': class_name, 'images': images, 'start': time.time(),
+                        'phases': {}}
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measures a phase of the current image, used as with profiler.phase('render'): ...
+
+        :param name: The name of the phase
+        """
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - start
+            if self.current is not None:
+                self.current['phases'][name] = (start, duration)
+            self.phase_totals[name] = self.phase_totals.get(name, 0) + duration
+
+    def end_image(self, changed):
+        """
+        Finishes the measurement of the current image, writes it to the trace and prints a status line if the report
+        interval passed.
+
+        :param changed: The names of the attributes which changed for this image
+        """
+
+        image = self.current
+        self.current = None
+        image['duration'] = time.time() - image['start']
+        image['changed'] = list(changed)
+        if self.trace is not None:
+            self.trace.write(json.dumps(image) + '\n')
+            self.trace.flush()
+
+        self.images += image['images']
+        if image['class_name'] in self.remaining:
+            self.remaining[image['class_name']] = max(0, self.remaining[image['class_name']] - image['images'])
+        first_start, images = self.class_progress.get(image['class_name'], (image['start'], 0))
+        self.class_progress[image['class_name']] = (first_start, images + image['images'])
+        transition = '+'.join(changed) if changed else 'none'
+        count, seconds = self.transitions.get(transition, (0, 0))
+        self.transitions[transition] = (count + image['images'], seconds + image['duration'])
+
+        if time.time() - self.last_report >= self.report_interval:
+            self.last_report = time.time()
+            print('\n' + self.status())
+
+    def status(self):
+        """
+        :return: A line with the images per second, the estimated remaining time of the run and of each unfinished
+            class which is being rendered and the three slowest transitions
+        :rtype: str
+        """
+
+        now = time.time()
+        elapsed = now - self.start_time
+        rate = self.images / elapsed if elapsed > 0 else 0
+        line = str(self.images) + ' images | ' + str(round(rate, 2)) + ' images/s'
+        remaining = sum(self.remaining.values())
+        if rate > 0 and remaining > 0:
+            line += ' | ETA ' + format_seconds(remaining / rate)
+            # the order of the classes depends on interleave, the cost-aware order and the sweeps, so every class is
+            # estimated from its own rate since its first image. Classes which were not started yet have no rate
+            estimates = []
+            for class_name, class_remaining in self.remaining.items():
+                first_start, images = self.class_progress.get(class_name, (now, 0))
+                if class_remaining > 0 and images > 0 and now > first_start:
+                    estimates.append(class_name + ' ' + format_seconds(class_remaining * (now - first_start) / images))
+            if estimates:
+                line += ' (' + ', '.join(estimates) + ')'
+        slowest = sorted(self.transitions.items(), key=lambda item: -item[1][1] / item[1][0])[:3]
+        if slowest:
+            line += ' | slowest ' + ', '.join(transition + ' ' + str(round(seconds / count, 2)) + 's'
+                                              for transition, (count, seconds) in slowest)
+        return line
+
+    def summary(self):
+        """
+        :return: The share of each phase in the measured time
+        :rtype: str
+        """
+
+        total = sum(self.phase_totals.values())
+        if total <= 0:
+            return 'No images measured'
+        names = [name for name in PHASES if name in self.phase_totals] + sorted(
+            name for name in self.phase_totals if name not in PHASES)
+        return 'Phases: ' + ', '.join(name + ' ' + format_seconds(self.phase_totals[name]) + ' (' +
+                                      str(round(100 * self.phase_totals[name] / total, 1)) + '%)' for name in names)
+
+    def close(self):
+        """
+        Closes the trace.
+        """
+
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+
+if __name__ == '__main__':
+    export_chrome_trace('G:/Datasets/Geometric2/trace.jsonl', 'G:/Datasets/Geometric2/trace_chrome.json')
@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+QualityProfile = namedtuple('QualityProfile', ['samples_factor', 'adaptive_threshold', 'denoise', 'max_bounces',
+                                               'diffuse_bounces', 'glossy_bounces', 'time_limit'])
+QualityProfile.__doc__ = """
+A set of Cycles options which are applied together.
+
+:param samples_factor: Factor for the base samples of a pipeline
+:param adaptive_threshold: Noise threshold of the adaptive sampling, 0 disables adaptive sampling
+:param denoise: Whether the OpenImageDenoise denoiser is used
+:param max_bounces: The maximal amount of light bounces
+:param diffuse_bounces: The maximal amount of diffuse bounces
+:param glossy_bounces: The maximal amount of glossy bounces
+:param time_limit: Seconds after which the sampling of an image is stopped, 0 disables the limit
+"""
+
+# production uses the defaults of Blender apart from the samples
+PROFILES = {
+    'draft': QualityProfile(samples_factor=0.25, adaptive_threshold=0.05, denoise=True, max_bounces=4,
+                            diffuse_bounces=2, glossy_bounces=2, time_limit=5),
+    'production': QualityProfile(samples_factor=1, adaptive_threshold=0.01, denoise=True, max_bounces=12,
+                                 diffuse_bounces=4, glossy_bounces=4, time_limit=0),
+    'reference': QualityProfile(samples_factor=8, adaptive_threshold=0, denoise=False, max_bounces=32,
+                                diffuse_bounces=16, glossy_bounces=16, time_limit=0),
+}
+
+# The Cycles options which a profile sets
+SETTINGS = ('samples', 'use_adaptive_sampling', 'adaptive_threshold', 'use_denoising', 'denoiser', 'max_bounces',
+            'diffuse_bounces', 'glossy_bounces', 'time_limit')
+
+
+def save_settings(scene):
+    """
+    :param scene: The Blender scene
+    :return: A dictionary with the current values of the Cycles options in SETTINGS
+    :rtype: dict
+    """
+
+    return {name: getattr(scene.cycles, name) for name in SETTINGS}
+
+
+def restore_settings(scene, settings):
+    """
+    Sets the Cycles options of a scene back to values returned by save_settings.
+
+    :param scene: The Blender scene
+    :param settings: The saved values
+    """
+
+    for name, value in settings.items():
+        setattr(scene.cycles, name, value)
+
+
+def apply_profile(scene, name, base_samples):
+    """
+    Sets the Cycles options of a scene to a quality profile.
+
+    :param scene: The Blender scene
+    :param name: The name of the profile in PROFILES
+    :param base_samples: The samples of the pipeline which are scaled by the samples factor of the profile
+    """
+
+    profile = PROFILES[name]
+    cycles = scene.cycles
+    cycles.samples = max(1, round(base_samples * profile.samples_factor))
+    cycles.use_adaptive_sampling = profile.adaptive_threshold > 0
+    if profile.adaptive_threshold > 0:
+        cycles.adaptive_threshold = profile.adaptive_threshold
+    cycles.use_denoising = profile.denoise
+    if profile.denoise:
+        cycles.denoiser = 'OPENIMAGEDENOISE'
+    cycles.max_bounces = profile.max_bounces
+    cycles.diffuse_bounces = profile.diffuse_bounces
+    cycles.glossy_bounces = profile.glossy_bounces
+    cycles.time_limit = profile.time_limit
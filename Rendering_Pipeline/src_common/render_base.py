@@ -0,0 +1,1860 @@
+import bisect
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from importlib import util
+
+import bpy
+import numpy as np
+
+
+def import_file(full_name, path):
+    """
+    Imports a python file.
+
+    :param full_name: The name of the file
+    :param path: The path to the file
+    :return: The module
+    """
+
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+common_path = os.path.dirname(os.path.abspath(__file__))
+
+enumerator_module = import_file('enumerator', os.path.join(common_path, 'enumerator.py'))
+manifest_module = import_file('manifest', os.path.join(common_path, 'manifest.py'))
+quality_module = import_file('quality', os.path.join(common_path, 'quality.py'))
+image_metrics_module = import_file('image_metrics', os.path.join(common_path, 'image_metrics.py'))
+scene_state_module = import_file('scene_state', os.path.join(common_path, 'scene_state.py'))
+shards_module = import_file('shards', os.path.join(common_path, 'shards.py'))
+profiler_module = import_file('profiler', os.path.join(common_path, 'profiler.py'))
+cpu_tuning_module = import_file('cpu_tuning', os.path.join(common_path, 'cpu_tuning.py'))
+planner_module = import_file('planner', os.path.join(common_path, 'planner.py'))
+sampling_module = import_file('sampling', os.path.join(common_path, 'sampling.py'))
+pixels_module = import_file('pixels', os.path.join(common_path, 'pixels.py'))
+render_cache_module = import_file('render_cache', os.path.join(common_path, 'render_cache.py'))
+benchmark_module = import_file('benchmark', os.path.join(common_path, 'benchmark.py'))
+texture_proxies_module = import_file('texture_proxies', os.path.join(common_path, 'texture_proxies.py'))
+compositing_module = import_file('compositing', os.path.join(common_path, 'compositing.py'))
+
+# The highest frame number Blender supports, images with a higher index are always rendered as single stills
+MAX_FRAME = 1048574
+
+
+class RenderBase:
+    """
+    The rendering shared by the Render classes of both pipelines. A pipeline sets the class attributes below, creates
+    its classes and overrides __ramp_materials__ and __swept_lights__, without them recolor and relight keep every
+    image as rendered. A pipeline which renders its background alone also overrides __composites_background__,
+    __show_background__ and __background_pixels__.
+    """
+
+    # The name of the pipeline in the results of the benchmarks and in PIPELINE_DEFAULTS of src_common/job_spec.py
+    PIPELINE = None
+    # The samples of the scene without a quality profile, the samples of a profile are relative to them
+    BASE_SAMPLES = 100
+    # The attributes in enumeration order with the method of Class which sets a value and the name of the list of
+    # values, the attributes which swap materials and the attributes which change the geometry of the scene
+    ATTRIBUTES = {}
+    STATIC_ATTRIBUTES = ()
+    GEOMETRY_ATTRIBUTES = ()
+
+    def __init__(self, filepath, class_names, traces, ndea, camera, batch_size=1, quality=None,
+                 cost_aware=False, sharded=False, trace_filepath=None, interactive=True, overwrite=False,
+                 warm_up=False, budget=None, sampling='lhs', seed=0, async_write=False, write_workers=4,
+                 cache_filepath=None, proxy_filepath=None, proxy_oversampling=2.0, recolor=False,
+                 relight=False, interleave=0):
+        """
+        Initializes an instance of RenderBase. The traces and ndea should not have the same elements otherwise
+        they are used as ndea.
+
+        :param filepath: The path where the dataset should be saved
+        :param class_names: A list of the class names which define the amount of classes
+        :param traces: A list of the attributes wanted as traces
+        :param ndea: A list of the attributes wanted as non dataset extending attributes
+        :param camera: The camera of the scene
+        :param batch_size: The maximal amount of consecutive images which are keyframed and rendered as one animation,
+            1 renders every image as a single still
+        :param quality: The name of the quality profile (draft, production or reference), None keeps the Cycles
+            settings of the scene and only sets the samples
+        :param cost_aware: Whether the change costs of the attributes are calibrated before rendering and the images
+            are rendered in the order which changes the expensive attributes least often
+        :param sharded: Whether the images are moved into tar shards of about 1 GB in the folder shards instead of
+            being kept as one file per image
+        :param trace_filepath: The path of a JSONL file to which the phase timings of every image are appended, None
+            writes no trace
+        :param interactive: Whether the user is asked before the rendering starts and before contents are deleted.
+            Without interaction an existing dataset is resumed, unless overwrite is set
+        :param overwrite: Whether the contents at filepath are deleted without interaction
+        :param warm_up: Whether every material is rendered once before the rendering starts, see warm_up_materials
+        :param budget: The maximal amount of images per class, the combinations of a larger class are sampled. None
+            renders all combinations
+        :param sampling: The sampling method, 'lhs' (Latin hypercube) or 'stratified', see sample_class in
+            src_common/sampling.py
+        :param seed: The seed of the sampling, the same seed draws the same combinations
+        :param async_write: Whether the images are encoded and written in background threads while the next image is
+            rendered, see __open_writer__
+        :param write_workers: The amount of background threads encoding and writing images
+        :param cache_filepath: The path of a render cache shared by all datasets, an image whose scene state was
+            already rendered is linked from the cache instead of being rendered. None renders every image
+        :param proxy_filepath: The path of a folder in which downscaled proxies of the image textures are cached, the
+            proxies replace the textures when the classes are initialized. None uses the full resolution textures
+        :param proxy_oversampling: The texels per pixel of a proxy at the closest camera position
+        :param recolor: Whether images which only differ in their color are rendered once with extra passes and the
+            other colors are computed from the passes, see __render_sweep_group__
+        :param relight: Whether images which only differ in their light energy are rendered once with a light group
+            pass and the other energies are computed from the pass, see __render_sweep_group__
+        :param interleave: The amount of consecutive images of one class when the classes are rendered in turn, so a
+            dataset which is read while it is rendered stays balanced, see interleaved in src_common/enumerator.py. 0
+            renders the classes one after another
+        """
+
+        self.filepath = filepath
+        self.class_names = class_names
+        self.traces = traces
+        self.ndea = ndea
+        self.dea_attributes = []
+        self.ndea_attributes = []
+
+        self.scene = bpy.context.scene
+        self.camera = camera
+        self.scene_state = scene_state_module.SceneState()
+        self.camera.scene_state = self.scene_state
+
+        self.classes = []
+
+        self.scene.render.engine = 'CYCLES'
+        self.base_samples = self.BASE_SAMPLES
+        self.scene.cycles.samples = self.base_samples
+        self.scene_settings = quality_module.save_settings(self.scene)
+        self.quality = None
+        if quality is not None:
+            self.set_quality(quality)
+
+        self.scene.render.resolution_x = 224
+        self.scene.render.resolution_y = 224
+
+        self.current_class = None
+        self.applied = {}
+        self.pending = []
+        self.manifest = None
+
+        self.batch_size = batch_size
+        self.cost_aware = cost_aware
+        self.sharded = sharded
+        self.shard_writer = None
+        self.trace_filepath = trace_filepath
+        self.interactive = interactive
+        self.overwrite = overwrite
+        self.warm_up = warm_up
+        self.budget = budget
+        self.sampling = sampling
+        self.seed = seed
+        self.samples = None
+        self.async_write = async_write
+        self.write_workers = write_workers
+        self.writer = None
+        self.cache_filepath = cache_filepath
+        self.cache = None
+        self.cache_extra = None
+        self.cache_keys = {}
+        self.proxy_filepath = proxy_filepath
+        self.proxy_oversampling = proxy_oversampling
+        self.texture_proxies = []
+        self.recolor = recolor
+        self.relight = relight
+        self.interleave = interleave
+        self.background_renders = None
+        self.pass_output = None
+        self.pass_directory = None
+        self.profiler = profiler_module.Profiler()
+        self.traversal_order = None
+        self.enumerator = None
+        self.total_images = 0
+
+    def __texels_needed__(self, scene_object, scale=None):
+        """
+        Computes the edge length a texture on an object needs so that one texel is at most 1 / proxy_oversampling
+        pixels at the closest camera position. The length on the object which one unit of the texture coordinates
+        spans is taken from the area of the mesh and of its UV map, without UV map the texture is assumed to span the
+        largest dimension of the object (generated coordinates).
+
+        :param scene_object: A mesh object which shows the texture
+        :param scale: The largest scale the object gets, None uses the current scale of the object
+        :return: The needed edge length in texels
+        :rtype: float
+        """
+
+        mesh = scene_object.data
+        world_scale = scale if scale is not None else max(scene_object.matrix_world.to_scale())
+        factor = world_scale / max(scene_object.matrix_world.to_scale())
+        radius = max(scene_object.dimensions) * factor / 2
+        if mesh.uv_layers.active is not None and len(mesh.polygons) > 0:
+            uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+            mesh.uv_layers.active.data.foreach_get('uv', uvs)
+            loop_starts = np.empty(len(mesh.polygons), dtype=np.int64)
+            loop_totals = np.empty(len(mesh.polygons), dtype=np.int64)
+            mesh.polygons.foreach_get('loop_start', loop_starts)
+            mesh.polygons.foreach_get('loop_total', loop_totals)
+            areas = np.empty(len(mesh.polygons), dtype=np.float32)
+            mesh.polygons.foreach_get('area', areas)
+            uv_area = texture_proxies_module.uv_area(uvs, loop_starts, loop_totals)
+            length_per_uv = np.sqrt(float(areas.sum()) / uv_area) * world_scale if uv_area > 0 else 2 * radius
+        else:
+            length_per_uv = 2 * radius
+
+        camera_data = self.scene.camera.data
+        resolution = max(self.scene.render.resolution_x, self.scene.render.resolution_y) * \
+            self.scene.render.resolution_percentage / 100
+        closest = float('inf')
+        # gamma rotates around the vertical axis, only the heights and betas change the distance
+        for height_index in range(len(self.camera.heights)):
+            for beta_index in range(len(self.camera.betas)):
+                self.camera.set_perspective(height_index, beta_index, 0)
+                bpy.context.view_layer.update()
+                distance = (self.scene.camera.matrix_world.translation - scene_object.matrix_world.translation).length
+                closest = min(closest, max(distance - radius, camera_data.clip_start))
+        pixels = texture_proxies_module.pixels_per_unit(closest, resolution, camera_data.type, camera_data.angle,
+                                                        camera_data.ortho_scale)
+        return texture_proxies_module.texels_needed(length_per_uv, pixels, self.proxy_oversampling)
+
+    def __use_texture_proxies__(self, carriers):
+        """
+        Replaces the image textures of the materials by downscaled proxies which are just large enough for the output
+        resolution and the closest camera position. The proxies are saved in proxy_filepath under the hash of the
+        original texture and their size, so they are only created once. Textures which cannot be reduced are kept.
+
+        :param carriers: A list of tuples of the form (material, objects which get the material, largest scale of the
+            objects or None if they are not scaled)
+        """
+
+        os.makedirs(self.proxy_filepath, exist_ok=True)
+        needed = {}
+        densities = {}
+        for material, objects, scale in carriers:
+            for scene_object in objects:
+                if (scene_object.name, scale) not in densities:
+                    densities[scene_object.name, scale] = self.__texels_needed__(scene_object, scale)
+            texels = max(densities[scene_object.name, scale] for scene_object in objects)
+            for node in material.node_tree.nodes:
+                if node.type == 'TEX_IMAGE' and node.image is not None and node.image.source == 'FILE':
+                    needed.setdefault(node.image.name, [node.image, 0, []])
+                    needed[node.image.name][1] = max(needed[node.image.name][1], texels)
+                    needed[node.image.name][2].append(node)
+        self.current_class = None
+        self.applied = {}
+
+        original_bytes = proxy_bytes = 0
+        for image, texels, nodes in needed.values():
+            width, height = image.size
+            if width == 0 or height == 0:
+                continue
+            proxy_width, proxy_height = texture_proxies_module.proxy_size(width, height, texels)
+            memory_size = texture_proxies_module.memory_size
+            original_bytes += memory_size(width, height, image.channels, image.is_float)
+            proxy_bytes += memory_size(proxy_width, proxy_height, image.channels, image.is_float)
+            if (proxy_width, proxy_height) == (width, height):
+                continue
+            key = texture_proxies_module.source_key(data=image.packed_file.data) if image.packed_file is not None \
+                else texture_proxies_module.source_key(bpy.path.abspath(image.filepath))
+            filepath = texture_proxies_module.proxy_filepath(self.proxy_filepath, image.name, key, proxy_width,
+                                                             proxy_height, '.exr' if image.is_float else '.png')
+            if not os.path.isfile(filepath):
+                proxy = image.copy()
+                proxy.scale(proxy_width, proxy_height)
+                proxy.filepath_raw = filepath
+                proxy.file_format = 'OPEN_EXR' if image.is_float else 'PNG'
+                proxy.save()
+                bpy.data.images.remove(proxy)
+            # reading the size loaded the original texture, only the proxy stays in memory
+            image.buffers_free()
+            proxy = bpy.data.images.load(filepath, check_existing=True)
+            proxy.colorspace_settings.name = image.colorspace_settings.name
+            proxy.alpha_mode = image.alpha_mode
+            for node in nodes:
+                node.image = proxy
+                self.texture_proxies.append((node, image, proxy))
+        print('\nTexture proxies: ' + str(len({proxy.name for _, _, proxy in self.texture_proxies})) + ' of ' +
+              str(len(needed)) + ' textures reduced, ' + planner_module.format_bytes(original_bytes) + ' -> ' +
+              planner_module.format_bytes(proxy_bytes) + ' in memory')
+
+    def __swap_texture_proxies__(self, use_proxies):
+        """
+        Switches the image nodes between the proxies and the original textures.
+
+        :param use_proxies: Whether the proxies or the original textures are used
+        """
+
+        for node, image, proxy in self.texture_proxies:
+            node.image = proxy if use_proxies else image
+
+    def compare_texture_proxies(self, number_of_images=12, min_psnr=40.0):
+        """
+        Checks the fidelity of the texture proxies: a sample of combinations spread over every class is rendered with
+        the proxies and with the original textures into a temporary folder and compared with PSNR and SSIM. The
+        proxies are used again afterwards.
+
+        :param number_of_images: The amount of sampled combinations
+        :param min_psnr: The PSNR in dB below which a proxy render counts as too different
+        :return: A dictionary of the form {image index: (PSNR, SSIM)}
+        :rtype: dict
+        """
+
+        if not self.texture_proxies:
+            print('\nNo texture proxies are used.')
+            return {}
+        combinations = [self.enumerator.combination(index)
+                        for index in planner_module.stratified_indices(self.enumerator, number_of_images)]
+        extension = self.scene.render.file_extension
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, use_proxies in (('proxy', True), ('original', False)):
+                self.__swap_texture_proxies__(use_proxies)
+                self.current_class = None
+                for combination in combinations:
+                    self.__apply_combination__(combination)
+                    self.scene.render.filepath = os.path.join(directory, name, str(combination.index))
+                    bpy.ops.render.render(write_still=True)
+            self.__swap_texture_proxies__(True)
+            self.current_class = None
+            for combination in combinations:
+                image = read_image(os.path.join(directory, 'proxy', str(combination.index) + extension))
+                original = read_image(os.path.join(directory, 'original', str(combination.index) + extension))
+                results[combination.index] = (image_metrics_module.psnr(image[..., :3], original[..., :3]),
+                                              image_metrics_module.ssim(image, original))
+
+        worst = min(results, key=lambda index: results[index][0])
+        print('\nTexture proxies compared to the original textures: mean PSNR ' +
+              str(round(float(np.mean([psnr for psnr, _ in results.values()])), 2)) + ' dB, mean SSIM ' +
+              str(round(float(np.mean([ssim for _, ssim in results.values()])), 4)) + ', worst image ' + str(worst) +
+              ' with ' + str(round(results[worst][0], 2)) + ' dB')
+        too_different = [index for index, (psnr, _) in results.items() if psnr < min_psnr]
+        if too_different:
+            print('Below ' + str(min_psnr) + ' dB: ' + ', '.join(str(index) for index in too_different) +
+                  ', increase proxy_oversampling')
+        return results
+
+    def __set_total_images__(self):
+        """
+        Sets total_images to the total amount of images the dataset will contain and creates the enumerator which maps
+        the index of an image to its attribute values. With a budget the combinations of every class are sampled. Must
+        be called after the classes are fully initialized.
+        """
+
+        self.enumerator = enumerator_module.Enumerator(
+            [self.__attribute_sizes__(c_class, self.dea_attributes) for c_class in self.classes],
+            [self.__attribute_sizes__(c_class, self.ndea_attributes) for c_class in self.classes],
+            (len(self.camera.heights), len(self.camera.betas), len(self.camera.gammas)))
+        if self.budget is not None:
+            self.samples = [sampling_module.sample_class(self.enumerator, class_index, self.budget, self.sampling,
+                                                         self.seed) for class_index in range(len(self.classes))]
+            self.enumerator = enumerator_module.SampledEnumerator(self.enumerator, self.samples)
+        self.total_images = self.enumerator.total_images
+
+    def __attribute_sizes__(self, c_class, attributes):
+        """
+        Counts the values of the given attributes of a class.
+
+        :param c_class: The class
+        :param attributes: A list of attributes
+        :return: A list of tuples of the form (attribute name, number of values)
+        :rtype: list of tuple
+        """
+
+        return [(attribute.name.lower(), len(getattr(c_class, self.ATTRIBUTES[attribute][1])))
+                for attribute in attributes]
+
+    def __ask__(self, question, answer):
+        """
+        Asks the user a question. Without interaction the given answer is printed and used instead.
+
+        :param question: The question
+        :param answer: The answer used without interaction
+        :return: The answer
+        :rtype: str
+        """
+
+        if self.interactive:
+            return input(question)
+        print(question + answer)
+        return answer
+
+    def __delete_contents__(self):
+        """
+        Deletes all contents at the filepath.
+
+        :return: True when deletion was successful and False otherwise
+        :rtype: bool
+        """
+
+        for filename in os.listdir(self.filepath):
+            file_path = os.path.join(self.filepath, filename)
+            try:
+                if os.path.isfile(file_path) or os.path.islink(file_path):
+                    os.unlink(file_path)
+                elif os.path.isdir(file_path):
+                    shutil.rmtree(file_path)
+            except Exception as e:
+                print('Failed to delete %s. Reason: %s' % (file_path, e))
+                return False
+        return True
+
+    def __create_folder_structure__(self):
+        """
+        Creates the needed folder structure at the filepath location. If the needed structure is already existent the
+        user can resume an unfinished dataset or delete all contents at the filepath location.
+
+        :return: True if the data structure was successfully created and the dataset is not already complete and False
+            is returned otherwise
+        :rtype: bool
+        """
+
+        if os.path.exists(self.filepath) and os.path.isdir(self.filepath):
+            contents = [content for content in os.listdir(self.filepath)
+                        if not manifest_module.is_manifest_file(content) and
+                        content not in (shards_module.SHARDS_NAME, sampling_module.SAMPLE_NAME)]
+            if contents:
+                if sorted(self.class_names) == sorted(contents):
+                    user_input = self.__ask__(
+                        '\nFolder ' + self.filepath + ' is not empty. But order structure was found '
+                                                      '[Stop(S), Use existing Content(C), Delete Content(D)]:  ',
+                        'D' if self.overwrite else 'C')
+                    if user_input == 'C':
+                        # the indices of the images only match if the combinations were sampled the same way
+                        if sampling_module.load_sample(self.filepath) != self.samples:
+                            print('\nThe existing images were rendered with other sampled combinations, delete the '
+                                  'content or use the same budget, sampling and seed.')
+                            return False
+                        self.manifest = manifest_module.Manifest(self.filepath)
+                        if not self.manifest.entries():
+                            self.__record_existing_images__()
+                        self.pending = self.manifest.missing_indices(range(self.total_images))
+                        if not self.pending:
+                            print("\nDataset is already complete")
+                            return False
+                        print('\nImages missing or corrupt: ' + str(len(self.pending)) + '\\' + str(
+                            self.total_images) + '.')
+                        return True
+                else:
+                    user_input = self.__ask__(
+                        '\nFolder ' + self.filepath + ' is not empty [Stop(S), Delete Content(D)]:  ',
+                        'D' if self.overwrite else 'S')
+                if user_input == 'D':
+                    if not self.__delete_contents__():
+                        print('\nDeletion was not successful.')
+                        return False
+                else:
+                    return False
+        else:
+            os.mkdir(self.filepath)
+        for class_name in self.class_names:
+            os.mkdir(os.path.join(self.filepath, class_name))
+        if self.samples is not None:
+            sampling_module.save_sample(self.filepath, self.samples, self.budget, self.sampling, self.seed)
+        self.manifest = manifest_module.Manifest(self.filepath)
+        self.pending = list(range(self.total_images))
+        return True
+
+    def __record_existing_images__(self):
+        """
+        Records all images of a dataset which was rendered without a manifest. The existing images are trusted, so a
+        corrupt last image must be deleted manually.
+        """
+
+        print('\nNo manifest found, recording existing images.')
+        for index in range(self.total_images):
+            combination = self.enumerator.combination(index)
+            if os.path.isfile(os.path.join(self.filepath, self.__image_filename__(combination))):
+                self.__record__(combination)
+
+    def __image_filename__(self, combination):
+        """
+        :param combination: The combination of an image
+        :return: The path of the image relative to filepath
+        :rtype: str
+        """
+
+        return os.path.join(self.classes[combination.class_index].name,
+                            str(combination.index) + self.scene.render.file_extension)
+
+    def __attribute_values__(self, combination):
+        """
+        Looks up the values of a combination. Materials and objects are represented by their name.
+
+        :param combination: The combination of an image
+        :return: A dictionary of the form {attribute name: value} which can be serialized as JSON
+        :rtype: dict
+        """
+
+        c_class = self.classes[combination.class_index]
+        attributes = {}
+        for attribute, (_, values_name) in self.ATTRIBUTES.items():
+            value = getattr(c_class, values_name)[combination.values[attribute.name.lower()]]
+            # textures are stored together with their color ramp
+            if isinstance(value, tuple) and hasattr(value[0], 'name'):
+                value = value[0]
+            attributes[attribute.name.lower()] = manifest_module.json_value(value)
+        for name, values in zip(enumerator_module.CAMERA_ATTRIBUTES,
+                                (self.camera.heights, self.camera.betas, self.camera.gammas)):
+            attributes[name] = manifest_module.json_value(values[combination.values[name]])
+        return attributes
+
+    def enable_gpus(self, device_type):
+        """
+        Enables all GPUs of a specific device type and sets tile size.
+
+        :param device_type: One of the following: ('CUDA', 'OPTIX', 'HIP', 'ONEAPI')
+        """
+
+        self.scene.cycles.device = 'GPU'
+        self.scene.cycles.tile_size = 256
+        bpy.context.preferences.addons['cycles'].preferences.compute_device_type = device_type
+        bpy.context.preferences.addons['cycles'].preferences.get_devices()
+
+    def enable_cpu(self, threads=None, tile_size=None):
+        """
+        Renders on the CPU. The settings which are not given are taken from the CPU profile of this host, which is
+        written by CpuTuner (src_common/cpu_tuning.py). Without a profile Cycles decides.
+
+        :param threads: The amount of render threads, 0 lets Cycles decide
+        :param tile_size: The tile size
+        """
+
+        self.scene.cycles.device = 'CPU'
+        settings = cpu_tuning_module.best_settings(instances=1)
+        if settings is not None:
+            threads = settings['threads'] if threads is None else threads
+            tile_size = settings['tile_size'] if tile_size is None else tile_size
+            print('CPU profile: ' + str(threads) + ' threads, tile size ' + str(tile_size))
+        if threads is not None:
+            self.set_threads(threads)
+        if tile_size is not None:
+            self.scene.cycles.tile_size = tile_size
+
+    def set_quality(self, quality):
+        """
+        Applies a quality profile which sets samples, adaptive sampling, denoising, bounces and time limit together.
+        The samples of the profile are relative to base_samples.
+
+        :param quality: The name of the quality profile (draft, production or reference), None restores the Cycles
+            settings the scene had when the Render was created
+        """
+
+        if quality is None:
+            quality_module.restore_settings(self.scene, self.scene_settings)
+        else:
+            quality_module.apply_profile(self.scene, quality, self.base_samples)
+        self.quality = quality
+
+    def compare_quality_profiles(self, number_of_images=12, profiles=('draft', 'production'), reference='reference'):
+        """
+        Renders a sample of combinations spread over the whole dataset with every profile and the reference profile
+        into a temporary folder. Prints the seconds per image of each profile and the PSNR and SSIM compared to the
+        reference renders. The previous quality profile is restored afterwards.
+
+        :param number_of_images: The amount of sampled combinations
+        :param profiles: The names of the compared quality profiles
+        :param reference: The name of the reference quality profile
+        :return: A dictionary of the form {profile: (seconds per image, mean PSNR, mean SSIM)}
+        :rtype: dict
+        """
+
+        quality = self.quality
+        indices = np.unique(np.linspace(0, self.total_images - 1, number_of_images).round().astype(int))
+        combinations = [self.enumerator.combination(index) for index in indices]
+        seconds = {}
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            # the first render compiles the kernels and loads the scene, it should not be timed
+            self.__apply_combination__(combinations[0])
+            self.scene.render.filepath = os.path.join(directory, 'warm_up')
+            bpy.ops.render.render(write_still=True)
+            for profile in (reference,) + tuple(profiles):
+                self.set_quality(profile)
+                start_time = time.time()
+                for combination in combinations:
+                    self.__apply_combination__(combination)
+                    self.scene.render.filepath = os.path.join(directory, profile, str(combination.index))
+                    bpy.ops.render.render(write_still=True)
+                seconds[profile] = (time.time() - start_time) / len(combinations)
+
+            extension = self.scene.render.file_extension
+            print('\nProfile      s/image   PSNR    SSIM')
+            for profile in (reference,) + tuple(profiles):
+                psnrs = []
+                ssims = []
+                for combination in combinations:
+                    image = read_image(os.path.join(directory, profile, str(combination.index) + extension))
+                    reference_image = read_image(
+                        os.path.join(directory, reference, str(combination.index) + extension))
+                    psnrs.append(image_metrics_module.psnr(image[..., :3], reference_image[..., :3]))
+                    ssims.append(image_metrics_module.ssim(image, reference_image))
+                results[profile] = (seconds[profile], float(np.mean(psnrs)), float(np.mean(ssims)))
+                print('{:<12} {:>7.2f} {:>6.2f} {:>7.4f}'.format(profile, *results[profile]))
+        self.set_quality(quality)
+        return results
+
+    def plan(self, number_of_images=24, workers=1, quality=None, images=None):
+        """
+        Prints the amount of images per class with the amount of values of every attribute and renders a sample of
+        images spread evenly over all classes into a temporary folder. The measured seconds and bytes per image are
+        projected onto the whole dataset, so a dataset which would take too long or does not fit on the drive can be
+        changed before the rendering starts. The first image is rendered once beforehand so that loading the scene is
+        not measured.
+
+        :param number_of_images: The amount of sampled images, at least one per class
+        :param workers: The amount of workers rendering at the same time, each as fast as this instance
+        :param quality: The name of the quality profile to measure, None uses the current one
+        :param images: The amount of images to render, None uses all images of the dataset
+        :return: A dictionary with the projection, see projection in src_common/planner.py
+        :rtype: dict
+        """
+
+        roles = {attribute.name.lower(): 'NDEA' if attribute in self.ndea_attributes else
+                 'trace' if attribute in self.traces else 'DEA' for attribute in self.ATTRIBUTES}
+        print('\n' + planner_module.breakdown(self.enumerator, self.class_names, roles))
+
+        saved_quality = self.quality
+        if quality is not None:
+            self.set_quality(quality)
+        combinations = [self.enumerator.combination(index)
+                        for index in planner_module.stratified_indices(self.enumerator, number_of_images)]
+        seconds = []
+        sizes = []
+        with tempfile.TemporaryDirectory() as directory:
+            self.__apply_combination__(combinations[0])
+            self.scene.render.filepath = os.path.join(directory, 'warm_up')
+            bpy.ops.render.render(write_still=True)
+            for combination in combinations:
+                start_time = time.time()
+                self.__apply_combination__(combination)
+                self.scene.render.filepath = os.path.join(directory, str(combination.index))
+                bpy.ops.render.render(write_still=True)
+                seconds.append(time.time() - start_time)
+                sizes.append(os.path.getsize(self.scene.render.filepath + self.scene.render.file_extension))
+        self.set_quality(saved_quality)
+
+        projection = planner_module.projection(self.total_images if images is None else images, seconds, sizes,
+                                               workers, planner_module.free_space(self.filepath))
+        print('\nQuality: ' + str(self.quality) + ' | Sample: ' + str(len(combinations)) + ' images\n' +
+              planner_module.report(projection))
+        return projection
+
+    def __apply_combination__(self, combination):
+        """
+        Sets the scene to a combination of attribute values. Only the values which differ from the previously applied
+        combination are set, when the class changes all values are set. Persistent render data is enabled while the
+        geometry does not change.
+
+        :param combination: The combination of attribute values
+        :return: The names of the changed attributes, starting with class if the class changed
+        :rtype: list of str
+        """
+
+        c_class = self.classes[combination.class_index]
+        class_changed = c_class is not self.current_class
+        if class_changed:
+            self.__reset_class__(c_class)
+            self.current_class = c_class
+            self.applied = {}
+        changed = [attribute for attribute in self.ATTRIBUTES
+                   if self.applied.get(attribute.name.lower()) != combination.values[attribute.name.lower()]]
+        for attribute in changed:
+            self.ATTRIBUTES[attribute][0](c_class, combination.values[attribute.name.lower()])
+        # persistent data keeps the synchronized scene between renders, it is dropped when the geometry changes
+        self.scene_state.set(self.scene.render, 'use_persistent_data',
+                             not any(attribute in self.GEOMETRY_ATTRIBUTES for attribute in changed))
+        camera_changed = any(self.applied.get(name) != combination.values[name]
+                             for name in enumerator_module.CAMERA_ATTRIBUTES)
+        if camera_changed:
+            self.camera.set_perspective(*[combination.values[name] for name in enumerator_module.CAMERA_ATTRIBUTES])
+        self.applied = combination.values
+        return (['class'] * class_changed + [attribute.name.lower() for attribute in changed] +
+                ['camera'] * camera_changed)
+
+    def __reset_class__(self, c_class):
+        """
+        Resets the scene before the values of another class are applied.
+
+        :param c_class: The class which is applied next
+        """
+
+        c_class.reset()
+
+    def __render_image__(self, combination):
+        """
+        Renders the image of a combination, saves it in the folder of its class with the index as name and records it
+        in the manifest. The scene update, the depsgraph update, the rendering, the writing and the recording are
+        measured separately by the profiler. With the background writer the image is only handed over and recorded
+        later. With the render cache an image of an already rendered scene state is taken from the cache. If the
+        background is composited, only the foreground is rendered and composited over the render of the background.
+
+        :param combination: The combination of the image
+        """
+
+        self.profiler.start_image(combination.index, self.classes[combination.class_index].name)
+        with self.profiler.phase('scene_update'):
+            changed = self.__apply_combination__(combination)
+        with self.profiler.phase('depsgraph_update'):
+            bpy.context.view_layer.update()
+        if self.cache is not None:
+            with self.profiler.phase('cache'):
+                cached = self.__fetch_cached__(combination)
+            if cached:
+                self.profiler.end_image(changed + ['cached'])
+                return
+        if self.background_renders is not None:
+            with self.profiler.phase('render'):
+                passes = self.__render_passes__()
+            with self.profiler.phase('background'):
+                background = self.__background_pixels__(combination)
+            with self.profiler.phase('write'):
+                pixels = passes['combined']
+                if background is not None:
+                    pixels = compositing_module.over(pixels, background)
+                self.__write_pixels__(combination, pixels)
+        else:
+            with self.profiler.phase('render'):
+                bpy.ops.render.render()
+            with self.profiler.phase('write'):
+                if self.writer is not None:
+                    self.writer.submit(combination, self.__render_pixels__(), None if self.shard_writer is not None
+                                       else os.path.join(self.filepath, self.__image_filename__(combination)))
+                else:
+                    bpy.data.images['Render Result'].save_render(
+                        os.path.join(self.filepath, self.__image_filename__(combination)), scene=self.scene)
+        with self.profiler.phase('record'):
+            if self.writer is not None:
+                for written in self.writer.done():
+                    self.__record__(written.key, written)
+            elif self.background_renders is None:
+                self.__record__(combination)
+        self.profiler.end_image(changed)
+
+    def __render_batch__(self, combinations):
+        """
+        Keyframes consecutive combinations of the same class on consecutive frames and renders them with one animation
+        render. The frame number is the index of the image, so the images are saved with the same names as single
+        stills. The combinations must not differ in the values of the static attributes.
+
+        :param combinations: A list of combinations with consecutive indices
+        """
+
+        self.profiler.start_image(combinations[0].index, self.classes[combinations[0].class_index].name,
+                                  len(combinations))
+        changed = ['batch']
+        with self.profiler.phase('scene_update'):
+            preferences = bpy.context.preferences.edit
+            interpolation = preferences.keyframe_new_interpolation_type
+            preferences.keyframe_new_interpolation_type = 'CONSTANT'
+            for combination in combinations:
+                changed += [name for name in self.__apply_combination__(combination) if name not in changed]
+                self.current_class.insert_keyframes(combination.index)
+                self.camera.insert_keyframes(combination.index)
+            preferences.keyframe_new_interpolation_type = interpolation
+
+        # the animation render writes every frame itself, so rendering and writing are measured together. Batches do
+        # not use the render cache, but an image linked from the cache must not be overwritten in place
+        if self.cache is not None:
+            for combination in combinations:
+                image_filepath = os.path.join(self.filepath, self.__image_filename__(combination))
+                if os.path.exists(image_filepath):
+                    os.remove(image_filepath)
+        frame_start, frame_end = self.scene.frame_start, self.scene.frame_end
+        self.scene.frame_start = combinations[0].index
+        self.scene.frame_end = combinations[-1].index
+        self.scene.render.filepath = os.path.join(self.filepath, self.current_class.name, '#')
+        with self.profiler.phase('render'):
+            bpy.ops.render.render(animation=True)
+        self.scene.frame_start, self.scene.frame_end = frame_start, frame_end
+
+        # the animation render leaves the properties at the values of the frame it returns to, so everything is set
+        # again for the next image
+        self.current_class.clear_keyframes()
+        self.camera.clear_keyframes()
+        self.scene_state.invalidate()
+        self.current_class = None
+        with self.profiler.phase('record'):
+            for combination in combinations:
+                self.__record__(combination)
+        self.profiler.end_image(changed)
+
+    def __record__(self, combination, written=None):
+        """
+        Records the rendered image of a combination in the manifest. When rendering into shards the image file is moved
+        into the current shard together with its attribute values and recorded once the shard is completed.
+
+        :param combination: The combination of the image
+        :param written: The WrittenImage if the image was written by the background writer, its size and hash are used
+            instead of reading the file again
+        """
+
+        class_name = self.classes[combination.class_index].name
+        key = self.cache_keys.pop(combination.index, None)
+        if key is not None:
+            if written is not None and written.data is not None:
+                self.cache.store(key, written.sha256, data=written.data, extension=self.scene.render.file_extension)
+            else:
+                image_filepath = os.path.join(self.filepath, self.__image_filename__(combination))
+                self.cache.store(key, written.sha256 if written is not None else manifest_module.file_hash(
+                    image_filepath), image_filepath)
+        if self.shard_writer is None:
+            self.manifest.record(combination.index, class_name, self.__image_filename__(combination),
+                                 combination.values, self.__attribute_values__(combination),
+                                 *((written.size, written.sha256) if written is not None else ()))
+            return
+
+        if written is not None:
+            image = written.data
+        else:
+            image_filepath = os.path.join(self.filepath, self.__image_filename__(combination))
+            with open(image_filepath, 'rb') as file:
+                image = file.read()
+            os.remove(image_filepath)
+        metadata = {'index': combination.index, 'class_name': class_name, 'value_indices': combination.values,
+                    'attributes': self.__attribute_values__(combination)}
+        for sample in self.shard_writer.write(str(combination.index), class_name, {
+                self.scene.render.file_extension[1:]: image, 'json': json.dumps(metadata).encode()}):
+            self.__record_shard_sample__(sample)
+
+    def __fetch_cached__(self, combination):
+        """
+        Looks up the applied scene state in the render cache. On a hit the cached image is linked into the dataset (or
+        added to the shard) and recorded, otherwise the state key is kept so the image is stored in the cache when it
+        is recorded. The key is the hash of the rendered objects with their transforms, materials, color ramps and
+        lights, the camera, the render options of the quality profile, the blend file and the Blender version.
+
+        :param combination: The combination of the applied scene state
+        :return: True if the image was taken from the cache and False if it must be rendered
+        :rtype: bool
+        """
+
+        if self.cache_extra is None:
+            self.cache_extra = {'blend': manifest_module.file_hash(bpy.data.filepath) if bpy.data.filepath else '',
+                                'blender': bpy.app.version_string, 'base_samples': self.base_samples}
+        key = render_cache_module.state_key(render_cache_module.scene_fingerprint(
+            self.scene, dict(self.cache_extra, quality=self.quality)))
+        image_filepath = os.path.join(self.filepath, self.__image_filename__(combination))
+        if self.shard_writer is None:
+            cached = self.cache.fetch(key, image_filepath)
+            if cached is not None:
+                self.__record__(combination, pixels_module.WrittenImage(combination, image_filepath, None, *cached))
+                return True
+        else:
+            cached = self.cache.lookup(key)
+            if cached is not None:
+                with open(cached[0], 'rb') as file:
+                    data = file.read()
+                self.__record__(combination, pixels_module.WrittenImage(combination, None, data, *cached[1:]))
+                return True
+
+        self.cache_keys[combination.index] = key
+        # an image linked from the cache must not be overwritten in place
+        if os.path.exists(image_filepath):
+            os.remove(image_filepath)
+        return False
+
+    def __record_shard_sample__(self, sample):
+        """
+        Records an image of a completed shard in the manifest.
+
+        :param sample: The ShardSample of the image
+        """
+
+        combination = self.enumerator.combination(int(sample.key))
+        extension = self.scene.render.file_extension
+        file_size, sha256 = sample.files[extension[1:]]
+        self.manifest.record(combination.index, sample.class_name,
+                             os.path.join(shards_module.SHARDS_NAME, sample.shard, sample.key + extension),
+                             combination.values, self.__attribute_values__(combination), file_size, sha256)
+
+    def __open_shards__(self, prefix='shard'):
+        """
+        Starts writing into shards if sharded output is enabled.
+
+        :param prefix: The prefix of the shard names, must be unique for every process rendering the dataset
+        """
+
+        if self.sharded:
+            self.shard_writer = shards_module.ShardWriter(os.path.join(self.filepath, shards_module.SHARDS_NAME),
+                                                          prefix)
+
+    def __close_shards__(self):
+        """
+        Completes the current shard and records its images.
+        """
+
+        if self.shard_writer is not None:
+            for sample in self.shard_writer.close():
+                self.__record_shard_sample__(sample)
+            self.shard_writer = None
+
+    def __open_cache__(self):
+        """
+        Opens the render cache if a cache_filepath is given.
+        """
+
+        if self.cache_filepath is not None:
+            self.cache = render_cache_module.RenderCache(self.cache_filepath)
+
+    def __close_cache__(self):
+        """
+        Prints the hits and misses of the render cache and closes its index.
+        """
+
+        if self.cache is not None:
+            print('\n' + self.cache.report())
+            self.cache.close()
+            self.cache = None
+
+    def __open_writer__(self):
+        """
+        Starts the background writer if asynchronous writing is enabled. The pixels of the render result are not
+        accessible from Python, so they are read from a Viewer node of the compositor which is added to the scene. The
+        images are encoded like Blender saves them, which needs PNG or WebP images and the Standard view transform,
+        otherwise the images are still written by Blender. The compression of PNG images and the quality of WebP images
+        are taken from the output settings of the scene.
+        """
+
+        if not self.async_write:
+            return
+        settings = self.scene.render.image_settings
+        if not self.__can_encode__():
+            print('\nAsynchronous writing needs PNG or WebP images (WebP only with Pillow) in RGB or RGBA and the '
+                  'Standard view transform, the images are written by Blender.')
+            return
+
+        self.scene.use_nodes = True
+        self.scene.render.use_compositing = True
+        tree = self.scene.node_tree
+        viewer = tree.nodes.get('Async Viewer')
+        if viewer is None:
+            composite = next((node for node in tree.nodes if node.type == 'COMPOSITE'), None)
+            if composite is not None and composite.inputs['Image'].is_linked:
+                source = composite.inputs['Image'].links[0].from_socket
+            else:
+                layers = next((node for node in tree.nodes if node.type == 'R_LAYERS'), None)
+                if layers is None:
+                    layers = tree.nodes.new('CompositorNodeRLayers')
+                source = layers.outputs['Image']
+                if composite is None:
+                    composite = tree.nodes.new('CompositorNodeComposite')
+                tree.links.new(source, composite.inputs['Image'])
+            viewer = tree.nodes.new('CompositorNodeViewer')
+            viewer.name = 'Async Viewer'
+            viewer.use_alpha = True
+            tree.links.new(source, viewer.inputs['Image'])
+        tree.nodes.active = viewer
+
+        # Blender maps the compression percentage to the zlib level the same way
+        self.writer = pixels_module.AsyncWriter(self.write_workers, file_format=settings.file_format,
+                                                compression=int(settings.compression / 11.1111),
+                                                quality=settings.quality)
+
+    def __can_encode__(self):
+        """
+        :return: True if images can be encoded like Blender saves them (see to_image in src_common/pixels.py), which
+            needs PNG or WebP images (WebP only with Pillow) in RGB or RGBA and the Standard view transform
+        :rtype: bool
+        """
+
+        settings = self.scene.render.image_settings
+        view = self.scene.view_settings
+        return (settings.file_format in pixels_module.FILE_FORMATS and settings.color_mode in ('RGB', 'RGBA') and
+                (settings.file_format != 'WEBP' or pixels_module.Image is not None) and
+                (view.view_transform, view.look, view.exposure, view.gamma) == ('Standard', 'None', 0, 1))
+
+    def __write_pixels__(self, combination, combined):
+        """
+        Saves an image which was computed from passes instead of being rendered. With the background writer the image
+        is only handed over and recorded later, otherwise it is encoded, written and recorded at once.
+
+        :param combination: The combination of the image
+        :param combined: The linear premultiplied RGBA pixels of the form (height, width, 4) with the bottom row first
+        """
+
+        settings = self.scene.render.image_settings
+        height, width = combined.shape[:2]
+        image = pixels_module.to_image(combined, width, height, settings.color_mode, settings.color_depth)
+        image_filepath = os.path.join(self.filepath, self.__image_filename__(combination))
+        if self.writer is not None:
+            self.writer.submit(combination, image, None if self.shard_writer is not None else image_filepath)
+            return
+        if settings.file_format == 'PNG':
+            data = pixels_module.encode_png(image, int(settings.compression / 11.1111))
+        else:
+            data = pixels_module.encode_webp(image, settings.quality)
+        written = pixels_module.WrittenImage(combination, None, data, len(data), hashlib.sha256(data).hexdigest())
+        if self.shard_writer is None:
+            with open(image_filepath + '.tmp', 'wb') as file:
+                file.write(data)
+            os.replace(image_filepath + '.tmp', image_filepath)
+            written = written._replace(filepath=image_filepath, data=None)
+        self.__record__(combination, written)
+
+    def __ramp_materials__(self):
+        """
+        :return: A list of tuples of the form (material, color ramp) with every material whose color ramp is set by
+            the color attribute, none by default
+        :rtype: list of tuple
+        """
+
+        return []
+
+    @staticmethod
+    def __add_ramp_weight__(material, color_ramp):
+        """
+        Adds a copy of the color ramp to the material which is white at the first element and black at the other
+        elements and writes it into the AOV ramp_weight. Its value is the weight of the first element in the color of
+        the original ramp, the element whose color is set by the color attribute.
+
+        :param material: The material
+        :param color_ramp: The color ramp of the material
+        """
+
+        tree = material.node_tree
+        if tree.nodes.get('Ramp Weight') is not None:
+            return
+        ramp_node = next(node for node in tree.nodes if getattr(node, 'color_ramp', None) == color_ramp)
+        weight_node = tree.nodes.new('ShaderNodeValToRGB')
+        weight_node.name = 'Ramp Weight'
+        weight = weight_node.color_ramp
+        weight.interpolation = color_ramp.interpolation
+        weight.color_mode = color_ramp.color_mode
+        elements = sorted(color_ramp.elements, key=lambda element: element.position)
+        weight.elements[0].position = elements[0].position
+        weight.elements[-1].position = elements[-1].position
+        for element in elements[1:-1]:
+            weight.elements.new(element.position)
+        for element, weight_element in zip(elements, weight.elements):
+            weight_element.color = (1, 1, 1, 1) if element == color_ramp.elements[0] else (0, 0, 0, 1)
+
+        if ramp_node.inputs['Fac'].is_linked:
+            tree.links.new(ramp_node.inputs['Fac'].links[0].from_socket, weight_node.inputs['Fac'])
+        else:
+            weight_node.inputs['Fac'].default_value = ramp_node.inputs['Fac'].default_value
+        aov = tree.nodes.new('ShaderNodeOutputAOV')
+        aov.name = 'Ramp Weight AOV'
+        aov.aov_name = 'ramp_weight'
+        tree.links.new(weight_node.outputs['Color'], aov.inputs['Color'])
+
+    def __swept_lights__(self):
+        """
+        :return: The lights whose energy is set by the lighting attribute, none by default
+        :rtype: list
+        """
+
+        return []
+
+    def __sweep_attributes__(self):
+        """
+        :return: The names of the attributes whose values are computed from passes instead of being rendered
+        :rtype: list of str
+        """
+
+        return ['color'] * self.recolor + ['lighting'] * self.relight
+
+    def __open_passes__(self):
+        """
+        Prepares the rendering of passes if recolor or relight is set or the background is composited. For recolor
+        the AOV ramp_weight is added to the materials with a color ramp and the diffuse light passes are enabled, for
+        relight the swept lights are put into the light group of compositing.LIGHT_GROUP and for the compositing the
+        background is hidden, see __show_background__. A File Output node of the compositor saves the passes as 32 bit
+        EXR files into a temporary folder, it is muted while normal images are rendered. The images computed from the
+        passes are encoded like Blender saves them, so the conditions of __can_encode__ must be met, otherwise every
+        image is rendered.
+        """
+
+        if not (self.__sweep_attributes__() or self.__composites_background__()) or self.pass_output is not None:
+            return
+        if not self.__can_encode__():
+            print('\nRecoloring, relighting and compositing need PNG or WebP images (WebP only with Pillow) in RGB or '
+                  'RGBA and the Standard view transform, every image is rendered.')
+            return
+
+        view_layer = bpy.context.view_layer
+        passes = {}
+        if self.recolor:
+            for material, color_ramp in self.__ramp_materials__():
+                self.__add_ramp_weight__(material, color_ramp)
+            if 'ramp_weight' not in view_layer.aovs:
+                aov = view_layer.aovs.add()
+                aov.name = 'ramp_weight'
+                aov.type = 'COLOR'
+            view_layer.use_pass_diffuse_direct = True
+            view_layer.use_pass_diffuse_indirect = True
+            passes.update(compositing_module.RECOLOR_PASSES)
+        if self.relight:
+            if compositing_module.LIGHT_GROUP not in view_layer.lightgroups:
+                view_layer.lightgroups.add(name=compositing_module.LIGHT_GROUP)
+            for light in self.__swept_lights__():
+                light.lightgroup = compositing_module.LIGHT_GROUP
+            passes.update(compositing_module.RELIGHT_PASSES)
+        if self.__composites_background__():
+            self.__show_background__(False)
+            self.background_renders = {}
+            passes.update(compositing_module.COMPOSITE_PASSES)
+
+        self.scene.use_nodes = True
+        self.scene.render.use_compositing = True
+        tree = self.scene.node_tree
+        layers = next((node for node in tree.nodes if node.type == 'R_LAYERS'), None)
+        if layers is None:
+            layers = tree.nodes.new('CompositorNodeRLayers')
+        if not any(node.type == 'COMPOSITE' for node in tree.nodes):
+            tree.links.new(layers.outputs['Image'], tree.nodes.new('CompositorNodeComposite').inputs['Image'])
+        output = tree.nodes.get('Pass Output')
+        if output is None:
+            output = tree.nodes.new('CompositorNodeOutputFile')
+            output.name = 'Pass Output'
+        output.format.file_format = 'OPEN_EXR'
+        output.format.color_mode = 'RGBA'
+        output.format.color_depth = '32'
+        output.file_slots.clear()
+        for name, sockets in passes.items():
+            output.file_slots.new(name)
+            tree.links.new(next(layers.outputs[socket] for socket in sockets if socket in layers.outputs),
+                           output.inputs[name])
+        self.pass_directory = tempfile.mkdtemp(prefix='passes_')
+        output.base_path = self.pass_directory
+        output.mute = True
+        self.pass_output = output
+
+    def __render_passes__(self):
+        """
+        Renders the applied combination with the File Output node of the passes.
+
+        :return: A dictionary of the form {pass name: array of the form (height, width, 4) with the bottom row first}
+        :rtype: dict
+        """
+
+        self.pass_output.mute = False
+        bpy.ops.render.render()
+        self.pass_output.mute = True
+        passes = {}
+        for slot in self.pass_output.file_slots:
+            pass_filepath = os.path.join(self.pass_directory, slot.path + '%04d' % self.scene.frame_current + '.exr')
+            passes[slot.path] = read_image(pass_filepath)
+            os.remove(pass_filepath)
+        return passes
+
+    def __close_passes__(self):
+        """
+        Removes the temporary folder of the passes and shows the background again. The nodes stay in the scene and are
+        reused.
+        """
+
+        if self.pass_output is not None:
+            self.pass_output.mute = True
+            shutil.rmtree(self.pass_directory, ignore_errors=True)
+            self.pass_output = None
+            self.pass_directory = None
+        if self.background_renders is not None:
+            self.__show_background__(True)
+            self.background_renders = None
+
+    def __composites_background__(self):
+        """
+        :return: Whether the background is rendered alone and the images are composited over it, see
+            __background_pixels__
+        :rtype: bool
+        """
+
+        return False
+
+    def __show_background__(self, shown):
+        """
+        Switches between rendering the whole image and rendering the image without the background with a transparent
+        film. Only called if __composites_background__ is True.
+
+        :param shown: Whether the camera sees the background
+        """
+
+        pass
+
+    def __background_pixels__(self, combination):
+        """
+        Returns the render of the background of a combination. Only called if __composites_background__ is True.
+
+        :param combination: The combination of the image
+        :return: The linear premultiplied RGBA pixels of the form (height, width, 4) with the bottom row first or None
+            if the image is not composited, None by default
+        :rtype: numpy.ndarray
+        """
+
+        return None
+
+    def __sweep_groups__(self, indices):
+        """
+        Splits images into groups which only differ in the values of the swept attributes. The first combination of a
+        group is the one which is rendered, with relight the one with the highest light energy, because scaling the
+        light down also scales the noise down.
+
+        :param indices: A list of image indices
+        :return: A tuple of the form (list of groups with at least two combinations, list of the remaining indices)
+        :rtype: tuple of list
+        """
+
+        swept = self.__sweep_attributes__()
+        groups = {}
+        for index in indices:
+            combination = self.enumerator.combination(index)
+            key = (combination.class_index,) + tuple(sorted(
+                (name, value) for name, value in combination.values.items() if name not in swept))
+            groups.setdefault(key, []).append(combination)
+        if self.relight:
+            for group in groups.values():
+                energies = self.classes[group[0].class_index].light_energies
+                group.sort(key=lambda combination: -energies[combination.values['lighting']])
+        return ([group for group in groups.values() if len(group) > 1],
+                sorted(group[0].index for group in groups.values() if len(group) == 1))
+
+    def __swept_pixels__(self, passes, base, combination):
+        """
+        Computes the image of a combination from the passes of the render of base, see relight and recolor in
+        src_common/compositing.py.
+
+        :param passes: The passes returned by __render_passes__
+        :param base: The rendered combination
+        :param combination: A combination which only differs from base in the swept attributes
+        :return: The linear premultiplied RGBA pixels of the form (height, width, 4) with the bottom row first
+        :rtype: numpy.ndarray
+        """
+
+        c_class = self.classes[base.class_index]
+        combined = passes['combined']
+        scale = None
+        energy = c_class.light_energies[combination.values['lighting']]
+        base_energy = c_class.light_energies[base.values['lighting']]
+        if self.relight and energy != base_energy:
+            relit = compositing_module.relight(combined, passes['light_group'], energy / base_energy)
+            scale = compositing_module.light_scale(relit, combined)
+            combined = relit
+        if self.recolor and combination.values['color'] != base.values['color']:
+            combined = compositing_module.recolor(
+                combined, passes['diffuse_direct'], passes['diffuse_indirect'], passes['ramp_weight'][..., 0],
+                c_class.colors[base.values['color']], c_class.colors[combination.values['color']], scale)
+        return combined
+
+    def __render_sweep_group__(self, group):
+        """
+        Renders the first combination of a group once with the passes and computes the images of all combinations of
+        the group from them, see __swept_pixels__. If the background is composited they are composited over it.
+        The whole group is measured as one entry of the profiler.
+
+        :param group: A list of combinations which only differ in the swept attributes
+        """
+
+        base = group[0]
+        self.profiler.start_image(base.index, self.classes[base.class_index].name, len(group))
+        with self.profiler.phase('scene_update'):
+            changed = self.__apply_combination__(base)
+        with self.profiler.phase('depsgraph_update'):
+            bpy.context.view_layer.update()
+        with self.profiler.phase('render'):
+            passes = self.__render_passes__()
+        backgrounds = [None] * len(group)
+        if self.background_renders is not None:
+            with self.profiler.phase('background'):
+                backgrounds = [self.__background_pixels__(combination) for combination in group]
+        with self.profiler.phase('write'):
+            for combination, background in zip(group, backgrounds):
+                pixels = self.__swept_pixels__(passes, base, combination)
+                if background is not None:
+                    pixels = compositing_module.over(pixels, background)
+                self.__write_pixels__(combination, pixels)
+        with self.profiler.phase('record'):
+            if self.writer is not None:
+                for written in self.writer.done():
+                    self.__record__(written.key, written)
+        self.profiler.end_image(changed + ['swept'])
+
+    def compare_sweeps(self, number_of_images=4):
+        """
+        Checks the recoloring and relighting against real renders: for a sample of combinations spread over every
+        class the image of every other value of each swept attribute is computed from the passes and compared with a
+        render of this value. Both are converted without dithering, so only the error of the computation is measured.
+        If the passes are not open, recoloring and relighting are both checked.
+
+        :param number_of_images: The amount of sampled combinations
+        :return: A dictionary of the form {(image index, attribute name, value index): (PSNR, largest difference of a
+            pixel value)}
+        :rtype: dict
+        """
+
+        opened = self.pass_output is None
+        flags = self.recolor, self.relight
+        if opened:
+            self.recolor = self.relight = True
+            self.__open_passes__()
+            if self.pass_output is None:
+                self.recolor, self.relight = flags
+                return {}
+
+        swept = self.__sweep_attributes__()
+        settings = self.scene.render.image_settings
+        max_value = 65535 if settings.color_depth == '16' else 255
+        results = {}
+        self.current_class = None
+        for index in planner_module.stratified_indices(self.enumerator, number_of_images):
+            base = self.enumerator.combination(index)
+            c_class = self.classes[base.class_index]
+            self.__apply_combination__(base)
+            passes = self.__render_passes__()
+            for name in swept:
+                for value in range(len(getattr(c_class, 'colors' if name == 'color' else 'light_energies'))):
+                    if value == base.values[name]:
+                        continue
+                    combination = enumerator_module.Combination(base.index, base.class_index,
+                                                                dict(base.values, **{name: value}))
+                    computed = self.__swept_pixels__(passes, base, combination)
+                    self.__apply_combination__(combination)
+                    rendered = self.__render_passes__()['combined']
+                    height, width = computed.shape[:2]
+                    image, reference = [pixels_module.to_image(pixels, width, height, settings.color_mode,
+                                                               settings.color_depth).astype(np.int64)
+                                        for pixels in (computed, rendered)]
+                    results[index, name, value] = (image_metrics_module.psnr(image, reference, max_value),
+                                                   int(np.abs(image - reference).max()))
+        self.current_class = None
+        if opened:
+            self.__close_passes__()
+            self.recolor, self.relight = flags
+
+        for name in swept:
+            keys = [key for key in results if key[1] == name]
+            if not keys:
+                print('\nNo class has more than one value of ' + name + ', nothing to compare.')
+                continue
+            worst = min(keys, key=lambda key: results[key][0])
+            print('\nComputed ' + name + ' compared to rendering: mean PSNR ' +
+                  str(round(float(np.mean([results[key][0] for key in keys])), 2)) + ' dB, worst image ' +
+                  str(worst[0]) + ' with value ' + str(worst[2]) + ': ' + str(round(results[worst][0], 2)) +
+                  ' dB, largest pixel difference ' + str(max(results[key][1] for key in keys)))
+        return results
+
+    def __render_pixels__(self):
+        """
+        Reads the last rendered image from the Viewer node.
+
+        :return: The image in the color mode and color depth of the output settings, see to_image in
+            src_common/pixels.py
+        :rtype: numpy.ndarray
+        """
+
+        image = bpy.data.images['Viewer Node']
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        settings = self.scene.render.image_settings
+        return pixels_module.to_image(pixels, width, height, settings.color_mode, settings.color_depth)
+
+    def __flush_writer__(self):
+        """
+        Waits until the background writer wrote all images and records them.
+        """
+
+        if self.writer is not None:
+            for written in self.writer.flush():
+                self.__record__(written.key, written)
+
+    def __close_writer__(self):
+        """
+        Records the remaining images of the background writer and stops it.
+        """
+
+        if self.writer is not None:
+            for written in self.writer.close():
+                self.__record__(written.key, written)
+            self.writer = None
+
+    def __batches__(self, indices):
+        """
+        Splits images into batches which can be rendered as one animation. A batch contains consecutive indices of one
+        class with the same values of the static attributes and at most batch_size images. The images of a batch are
+        written by Blender, so while the background is composited every image is its own batch.
+
+        :param indices: A sorted list of image indices
+        :return: A list of lists of combinations
+        :rtype: list of list
+        """
+
+        batches = []
+        last_index, last_key = None, None
+        for index in indices:
+            combination = self.enumerator.combination(index)
+            key = (combination.class_index,) + tuple(
+                combination.values[attribute.name.lower()] for attribute in self.STATIC_ATTRIBUTES)
+            if (index - 1 == last_index and key == last_key and len(batches[-1]) < self.batch_size
+                    and index <= MAX_FRAME and self.background_renders is None):
+                batches[-1].append(combination)
+            else:
+                batches.append([combination])
+            last_index, last_key = index, key
+        return batches
+
+    def __render_indices__(self, indices, heartbeat=None):
+        """
+        Renders the images with the given indices. If a traversal order was calibrated the images are rendered in this
+        order, with interleave the classes are rendered in turn. If batch_size is greater than 1 consecutive images are
+        rendered as keyframe batches.
+
+        :param indices: A sorted list of image indices
+        :param heartbeat: A function called after every image or batch which returns False if the rendering should stop
+        :return: False if the heartbeat stopped the rendering and True otherwise
+        :rtype: bool
+        """
+
+        if self.pass_output is not None and self.__sweep_attributes__():
+            groups, indices = self.__sweep_groups__(indices)
+            if self.interleave:
+                bases = {group[0].index: group for group in groups}
+                groups = [bases[index] for index in self.enumerator.interleaved(sorted(bases), self.interleave)]
+            for group in groups:
+                self.__render_sweep_group__(group)
+                if heartbeat is not None and not heartbeat():
+                    self.__flush_writer__()
+                    return False
+        if self.traversal_order is not None:
+            indices = self.enumerator.ordered(indices, self.traversal_order)
+        if self.interleave:
+            indices = self.enumerator.interleaved(indices, self.interleave)
+        for batch in self.__batches__(indices):
+            if len(batch) > 1:
+                self.__render_batch__(batch)
+            else:
+                self.__render_image__(batch[0])
+            if heartbeat is not None and not heartbeat():
+                self.__flush_writer__()
+                return False
+        self.__flush_writer__()
+        return True
+
+    def render(self):
+        """
+        Prepares the needed folder structure and renders all remaining images for the dataset.
+
+        :return: True if the dataset was successfully crated and False otherwise
+        :rtype: bool
+        """
+
+        if not self.__create_folder_structure__():
+            return False
+        user_input = self.__ask__(
+            '\nImages to render: ' + str(len(self.pending)) + '. [Stop(S), Continue(C), Plan(P)]  ', 'C')
+        if user_input == 'P' and self.pending:
+            self.plan(images=len(self.pending))
+            user_input = self.__ask__('\nContinue? [Stop(S), Continue(C)]  ', 'C')
+        if user_input != 'C':
+            return False
+
+        if self.cost_aware and self.traversal_order is None:
+            self.calibrate_change_costs()
+        if self.warm_up:
+            self.warm_up_materials()
+        self.__open_shards__()
+        self.__open_cache__()
+        self.__open_writer__()
+        self.__open_passes__()
+        self.profiler.start(self.__remaining_per_class__(self.pending), self.trace_filepath)
+        self.__render_indices__(self.pending)
+        self.__close_writer__()
+        self.__close_passes__()
+        self.__close_shards__()
+        self.manifest.close()
+        self.profiler.close()
+        print('\n' + self.profiler.summary())
+        print('\n' + self.scene_state.report())
+        self.__close_cache__()
+        return True
+
+    def __remaining_per_class__(self, indices):
+        """
+        Counts the images of each class in a sorted list of indices.
+
+        :param indices: A sorted list of image indices
+        :return: A dictionary of the form {class name: amount of images} in class order
+        :rtype: dict
+        """
+
+        remaining = {}
+        for class_index, c_class in enumerate(self.classes):
+            start, end = self.enumerator.class_range(class_index)
+            remaining[c_class.name] = bisect.bisect_left(indices, end) - bisect.bisect_left(indices, start)
+        return remaining
+
+    def render_range(self, start, end, heartbeat=None):
+        """
+        Renders the images with a global index from start to end (exclusive) which are missing or corrupt according to
+        the manifest. The folder structure and the manifest must already exist.
+
+        :param start: The index of the first image
+        :param end: The index after the last image
+        :param heartbeat: A function called after every image or batch which returns False if the rendering should stop
+        :return: False if the heartbeat stopped the rendering and True otherwise
+        :rtype: bool
+        """
+
+        return self.__render_indices__(self.manifest.missing_indices(range(start, end)), heartbeat)
+
+    def benchmark_batching(self, number_of_images=64, batch_size=16):
+        """
+        Renders the first images of the dataset into a temporary folder, once as single stills and once as keyframe
+        batches, and prints the images per hour of both modes. The first image is rendered once beforehand so that
+        neither mode pays for loading the scene.
+
+        :param number_of_images: The amount of images rendered in each mode
+        :param batch_size: The batch size of the batched mode
+        :return: A tuple of the images per hour of the form (stills, batches)
+        :rtype: tuple of float
+        """
+
+        filepath, manifest, saved_batch_size = self.filepath, self.manifest, self.batch_size
+        indices = list(range(min(number_of_images, self.total_images)))
+        images_per_hour = []
+        with tempfile.TemporaryDirectory() as directory:
+            self.filepath = directory
+            for class_name in self.class_names:
+                os.mkdir(os.path.join(directory, class_name))
+            self.manifest = manifest_module.Manifest(directory)
+            self.batch_size = 1
+            self.__render_indices__(indices[:1])
+            for size in (1, batch_size):
+                self.batch_size = size
+                self.current_class = None
+                start_time = time.time()
+                self.__render_indices__(indices)
+                images_per_hour.append(len(indices) / (time.time() - start_time) * 3600)
+            self.manifest.close()
+        self.filepath, self.manifest, self.batch_size = filepath, manifest, saved_batch_size
+
+        print('\nStills: ' + str(round(images_per_hour[0])) + ' images/h | Batches of ' + str(batch_size) + ': ' +
+              str(round(images_per_hour[1])) + ' images/h | Speedup: ' +
+              str(round(images_per_hour[1] / images_per_hour[0], 2)))
+        return tuple(images_per_hour)
+
+    def calibrate_change_costs(self, repetitions=3):
+        """
+        Measures how much a change of each attribute slows down the next render. Starting from the first image of the
+        dataset one attribute at a time is changed back and forth and the renders with one sample are timed against
+        renders without any change. Sets the traversal order so that the most expensive attribute changes least often.
+
+        :param repetitions: How often each attribute is changed in both directions
+        :return: A dictionary of the form {attribute name: additional seconds per change}
+        :rtype: dict
+        """
+
+        samples = self.scene.cycles.samples
+        self.scene.cycles.samples = 1
+        base = self.enumerator.combination(0)
+
+        def seconds(values):
+            start_time = time.time()
+            self.__apply_combination__(enumerator_module.Combination(base.index, base.class_index, values))
+            bpy.ops.render.render()
+            return time.time() - start_time
+
+        self.current_class = None
+        seconds(base.values)
+        unchanged = np.mean([seconds(base.values) for _ in range(2 * repetitions)])
+        costs = {}
+        for name, size in self.enumerator.value_sizes(base.class_index).items():
+            if size < 2:
+                costs[name] = 0.0
+                continue
+            changed = dict(base.values)
+            changed[name] = (base.values[name] + 1) % size
+            timings = []
+            for _ in range(repetitions):
+                timings.append(seconds(changed))
+                timings.append(seconds(base.values))
+            costs[name] = max(0.0, float(np.mean(timings) - unchanged))
+        self.scene.cycles.samples = samples
+
+        self.traversal_order = sorted(costs, key=lambda name: -costs[name])
+        print('\nChange costs (s): ' + ', '.join(name + ' ' + str(round(costs[name], 3))
+                                                 for name in self.traversal_order))
+        return costs
+
+    def warm_up_materials(self):
+        """
+        Renders every material of the static attributes once with one sample before the rendering starts, so that the
+        image textures are loaded and the shaders compiled before the first image which uses them. Every material is
+        rendered a second time to show how much faster a render with an already prepared material is. The times of
+        both renders are printed per material.
+
+        :return: A dictionary of the form {material name: (seconds of the first render, seconds of the second render)}
+        :rtype: dict
+        """
+
+        samples = self.scene.cycles.samples
+        self.scene.cycles.samples = 1
+        warm_ups = []
+        for class_index, c_class in enumerate(self.classes):
+            base = self.enumerator.combination(self.enumerator.class_range(class_index)[0])
+            for attribute in self.STATIC_ATTRIBUTES:
+                for value_index, value in enumerate(getattr(c_class, self.ATTRIBUTES[attribute][1])):
+                    # textures are stored together with their color ramp
+                    material = value[0] if isinstance(value, tuple) else value
+                    if all(material != other for other, _ in warm_ups):
+                        values = dict(base.values)
+                        values[attribute.name.lower()] = value_index
+                        warm_ups.append((material, enumerator_module.Combination(base.index, class_index, values)))
+
+        def seconds(material, combination):
+            start_time = time.time()
+            for node in material.node_tree.nodes:
+                if node.type == 'TEX_IMAGE' and node.image is not None and not node.image.has_data:
+                    # reading a pixel loads the image file
+                    node.image.pixels[0]
+            self.__apply_combination__(combination)
+            bpy.ops.render.render()
+            return time.time() - start_time
+
+        self.current_class = None
+        first = [seconds(material, combination) for material, combination in warm_ups]
+        second = [seconds(material, combination) for material, combination in warm_ups]
+        self.current_class = None
+        self.scene.cycles.samples = samples
+
+        times = {material.name: (first[index], second[index]) for index, (material, _) in enumerate(warm_ups)}
+        print('\nMaterial warm-up (s, first render / prepared render):')
+        for name, (first_seconds, second_seconds) in sorted(times.items(), key=lambda item: -item[1][0]):
+            print('  ' + name + ' ' + str(round(first_seconds, 2)) + ' / ' + str(round(second_seconds, 2)))
+        print('Saved in the first renders: ' + str(round(sum(first) - sum(second), 2)) + ' s')
+        return times
+
+    def render_worker(self, queue, worker, range_size):
+        """
+        Claims image ranges from the queue and renders them until no range is pending. Used by every worker of a Farm.
+
+        :param queue: The WorkQueue shared by all workers
+        :param worker: The name of this worker
+        :param range_size: The amount of images per range if the queue still has to be filled
+        """
+
+        for class_name in self.class_names:
+            os.makedirs(os.path.join(self.filepath, class_name), exist_ok=True)
+        if self.samples is not None:
+            sampling_module.save_sample(self.filepath, self.samples, self.budget, self.sampling, self.seed)
+        self.manifest = manifest_module.Manifest(self.filepath)
+        queue.fill(self.total_images, range_size)
+        if self.cost_aware and self.traversal_order is None:
+            self.calibrate_change_costs()
+        if self.warm_up:
+            self.warm_up_materials()
+
+        self.__open_shards__(worker)
+        self.__open_cache__()
+        self.__open_writer__()
+        self.__open_passes__()
+        trace_filepath = None
+        if self.trace_filepath is not None:
+            trace_filepath = os.path.splitext(self.trace_filepath)[0] + '_' + worker + '.jsonl'
+        self.profiler.start(self.__remaining_per_class__(self.manifest.missing_indices(range(self.total_images), None)),
+                            trace_filepath)
+        rendered = []
+        claimed = queue.claim(worker)
+        while claimed is not None:
+            range_id, start, end = claimed
+            print('\n' + worker + ' renders images ' + str(start) + ' to ' + str(end - 1))
+            if self.render_range(start, end, lambda: queue.renew(range_id, worker)):
+                rendered.append(claimed)
+            else:
+                print('\n' + worker + ' lost the lease of images ' + str(start) + ' to ' + str(end - 1))
+            rendered = self.__complete_ranges__(queue, worker, rendered)
+            claimed = queue.claim(worker)
+        self.__close_writer__()
+        self.__close_passes__()
+        self.__close_shards__()
+        self.__complete_ranges__(queue, worker, rendered)
+        self.manifest.close()
+        self.profiler.close()
+        print('\n' + self.profiler.summary())
+        print('\n' + self.scene_state.report())
+        self.__close_cache__()
+
+    def __complete_ranges__(self, queue, worker, ranges):
+        """
+        Completes the rendered ranges whose images are all recorded in the manifest. Images in the open shard are only
+        recorded when the shard is completed, so the leases of their ranges are renewed instead.
+
+        :param queue: The WorkQueue shared by all workers
+        :param worker: The name of this worker
+        :param ranges: A list of tuples of the form (range id, start, end)
+        :return: The ranges which are not completed yet
+        :rtype: list of tuple
+        """
+
+        unrecorded = [int(sample.key) for sample in self.shard_writer.samples] if self.shard_writer is not None else []
+        waiting = []
+        for range_id, start, end in ranges:
+            if any(start <= index < end for index in unrecorded):
+                queue.renew(range_id, worker)
+                waiting.append((range_id, start, end))
+            else:
+                queue.complete(range_id, worker)
+        return waiting
+
+    def benchmark_cpu(self, number_of_images, result_filepath, start_filepath):
+        """
+        Renders a sample of combinations spread over the whole dataset into a temporary folder for CpuTuner. After the
+        first render, which loads the scene and compiles the kernels, the file result_filepath.ready is created and the
+        rendering waits until the file start_filepath exists, so all instances of a measurement render at the same
+        time. The amount of images and the end time are written to result_filepath.
+
+        :param number_of_images: The amount of sampled combinations
+        :param result_filepath: The path of the JSON file with the result
+        :param start_filepath: The path of the file which starts the measurement
+        """
+
+        indices = np.unique(np.linspace(0, self.total_images - 1, number_of_images).round().astype(int))
+        combinations = [self.enumerator.combination(index) for index in indices]
+        with tempfile.TemporaryDirectory() as directory:
+            self.__apply_combination__(combinations[0])
+            self.scene.render.filepath = os.path.join(directory, 'warm_up')
+            bpy.ops.render.render(write_still=True)
+            open(result_filepath + '.ready', 'w').close()
+            while not os.path.exists(start_filepath):
+                time.sleep(0.1)
+
+            start_time = time.time()
+            for combination in combinations:
+                self.__apply_combination__(combination)
+                self.scene.render.filepath = os.path.join(directory, str(combination.index))
+                bpy.ops.render.render(write_still=True)
+            end_time = time.time()
+        with open(result_filepath, 'w') as file:
+            json.dump({'images': len(combinations), 'seconds': end_time - start_time, 'end': end_time}, file)
+        print('\nBenchmark: ' + str(round(len(combinations) / (end_time - start_time), 3)) + ' images/s')
+
+    def benchmark_suite(self, result_filepath=None, number_of_images=12, repetitions=3):
+        """
+        Times a fixed sequence of combinations and every single attribute transition with the reference settings of
+        src_common/benchmark.py and saves the result as JSON. The sequence contains images spread over every class and
+        is rendered repetitions times. A transition changes one attribute of the first image of a class and back, so a
+        slower Class or Camera shows up in the scene update or depsgraph update time of its attribute. The results of
+        two commits or hosts are compared with src_common/benchmark.py.
+
+        :param result_filepath: The path of the result, None saves it in the folder benchmarks named after the
+            pipeline, the host and the commit
+        :param number_of_images: The amount of images of the sequence
+        :param repetitions: How often the sequence is rendered and each transition is measured
+        :return: The result
+        :rtype: dict
+        """
+
+        reference = benchmark_module.REFERENCE_SETTINGS
+        quality, resolution_percentage, seed = self.quality, self.scene.render.resolution_percentage, \
+            self.scene.cycles.seed
+        self.set_quality(reference['quality'])
+        self.scene.render.resolution_percentage = reference['resolution_percentage']
+        self.scene.cycles.seed = reference['seed']
+        metrics = {}
+
+        def timed(combination, prefix, filepath=None):
+            start_time = time.perf_counter()
+            self.__apply_combination__(combination)
+            update_time = time.perf_counter()
+            bpy.context.view_layer.update()
+            depsgraph_time = time.perf_counter()
+            bpy.ops.render.render()
+            render_time = time.perf_counter()
+            phases = {'scene_update': update_time - start_time, 'depsgraph_update': depsgraph_time - update_time,
+                      'render': render_time - depsgraph_time}
+            if filepath is not None:
+                bpy.data.images['Render Result'].save_render(filepath, scene=self.scene)
+                phases['write'] = time.perf_counter() - render_time
+            for phase, seconds in phases.items():
+                metrics.setdefault(prefix + '/' + phase, []).append(seconds)
+            metrics.setdefault(prefix, []).append(time.perf_counter() - start_time)
+
+        combinations = [self.enumerator.combination(index)
+                        for index in planner_module.stratified_indices(self.enumerator, number_of_images)]
+        with tempfile.TemporaryDirectory() as directory:
+            # the first render compiles the kernels and loads the scene, it should not be timed
+            self.current_class = None
+            timed(combinations[0], 'warm_up')
+            for _ in range(repetitions):
+                self.current_class = None
+                start_time = time.perf_counter()
+                for combination in combinations:
+                    timed(combination, 'image', os.path.join(directory, str(combination.index) +
+                                                             self.scene.render.file_extension))
+                metrics.setdefault('sequence', []).append(time.perf_counter() - start_time)
+
+            for class_index in range(len(self.classes)):
+                base = self.enumerator.combination(self.enumerator.class_range(class_index)[0])
+                timed(base, 'warm_up')
+                for attribute, size in sorted(self.enumerator.value_sizes(class_index).items()):
+                    if size < 2:
+                        continue
+                    values = dict(base.values)
+                    values[attribute] = (base.values[attribute] + 1) % size
+                    changed = enumerator_module.Combination(base.index, class_index, values)
+                    for _ in range(repetitions):
+                        timed(changed, 'transition/' + attribute)
+                        timed(base, 'transition/' + attribute)
+        metrics = {metric: benchmark_module.summarize(seconds) for metric, seconds in metrics.items()
+                   if not metric.startswith('warm_up')}
+
+        result = {'pipeline': self.PIPELINE,
+                  'environment': benchmark_module.environment(bpy.app.version_string, bpy.data.filepath),
+                  'settings': dict(reference, device=self.scene.cycles.device, samples=self.scene.cycles.samples,
+                                   resolution=(self.scene.render.resolution_x, self.scene.render.resolution_y),
+                                   images=len(combinations), repetitions=repetitions,
+                                   classes=[c_class.name for c_class in self.classes]),
+                  'metrics': metrics}
+        if result_filepath is None:
+            result_filepath = benchmark_module.result_filepath(result['pipeline'], result['environment'])
+        benchmark_module.save_result(result_filepath, result)
+
+        self.current_class = None
+        self.set_quality(quality)
+        self.scene.render.resolution_percentage = resolution_percentage
+        self.scene.cycles.seed = seed
+        transitions = sorted((summary['median'], metric[len('transition/'):]) for metric, summary in metrics.items()
+                             if metric.startswith('transition/') and metric.count('/') == 1)
+        print('\nBenchmark: ' + str(round(metrics['sequence']['median'], 2)) + ' s per sequence of ' +
+              str(len(combinations)) + ' images, slowest transitions: ' +
+              ', '.join(attribute + ' ' + str(round(seconds, 3)) + ' s'
+                        for seconds, attribute in reversed(transitions[-3:])))
+        print('Saved in ' + result_filepath)
+        return result
+
+    def set_threads(self, threads):
+        """
+        Sets the amount of render threads. Needed when several Blender instances share the CPU.
+
+        :param threads: The amount of threads, 0 lets Cycles decide
+        """
+
+        if threads > 0:
+            self.scene.render.threads_mode = 'FIXED'
+            self.scene.render.threads = threads
+        else:
+            self.scene.render.threads_mode = 'AUTO'
+
+
+def read_image(filepath):
+    """
+    Reads an image with Blender.
+
+    :param filepath: The path of the image
+    :return: The pixels as array of the form (height, width, channels) with values from 0 to 1
+    :rtype: numpy.ndarray
+    """
+
+    image = bpy.data.images.load(filepath)
+    pixels = np.empty(len(image.pixels), dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    pixels = pixels.reshape(image.size[1], image.size[0], image.channels)
+    bpy.data.images.remove(image)
+    return pixels
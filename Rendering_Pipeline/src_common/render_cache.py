@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+# The Cycles options which change the rendered image, read if the Blender version has them
+CYCLES_OPTIONS = ('device', 'samples', 'use_adaptive_sampling', 'adaptive_threshold', 'use_denoising', 'denoiser',
+                  'max_bounces', 'diffuse_bounces', 'glossy_bounces', 'transmission_bounces', 'volume_bounces',
+                  'transparent_max_bounces', 'time_limit', 'seed', 'use_animated_seed', 'filter_width',
+                  'sample_clamp_direct', 'sample_clamp_indirect')
+
+
+def plain(value, digits=6):
+    """
+    Converts a value of a Blender property into a JSON serializable value, floats are rounded so that the hash does
+    not depend on the last bits of a computation.
+
+    :param value: The value
+    :param digits: The decimal places of floats
+    :return: The converted value
+    """
+
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, (bool, int, str)) or value is None:
+        return value
+    if hasattr(value, 'name') and hasattr(value, 'as_pointer'):
+        return value.name
+    try:
+        return [plain(item, digits) for item in value]
+    except TypeError:
+        return str(value)
+
+
+def material_fingerprint(material):
+    """
+    Describes everything of a material which changes the rendered image: for every node its type, the values of the
+    unlinked inputs, the color ramp and the image.
+
+    :param material: The Blender material
+    :return: A JSON serializable description
+    :rtype: dict
+    """
+
+    if not material.use_nodes:
+        return {'diffuse_color': plain(material.diffuse_color)}
+    nodes = {}
+    for node in material.node_tree.nodes:
+        description = {'type': node.type, 'inputs': [plain(socket.default_value) for socket in node.inputs
+                                                     if not socket.is_linked and hasattr(socket, 'default_value')]}
+        if getattr(node, 'color_ramp', None) is not None:
+            description['ramp'] = [(plain(element.position), plain(element.color))
+                                   for element in node.color_ramp.elements]
+        if getattr(node, 'image', None) is not None:
+            description['image'] = node.image.filepath or node.image.name
+        nodes[node.name] = description
+    links = sorted((link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier)
+                   for link in material.node_tree.links)
+    return {'nodes': nodes, 'links': links}
+
+
+def scene_fingerprint(scene, extra=None):
+    """
+    Describes the applied state of a scene: the transform, the materials and the light or camera data of every
+    rendered object, the world and the render options. Two renders of scenes with the same fingerprint give the same
+    image.
+
+    :param scene: The Blender scene
+    :param extra: A dictionary with further values which change the image, e.g. the hash of the blend file
+    :return: A JSON serializable description
+    :rtype: dict
+    """
+
+    objects = {}
+    materials = {}
+    for scene_object in scene.objects:
+        if scene_object.hide_render:
+            continue
+        description = {'type': scene_object.type, 'matrix': plain(scene_object.matrix_world),
+                       'materials': [slot.material.name if slot.material is not None else None
+                                     for slot in scene_object.material_slots]}
+        if scene_object.type == 'LIGHT':
+            light = scene_object.data
+            description['light'] = {'type': light.type, 'energy': plain(light.energy), 'color': plain(light.color)}
+        elif scene_object.type == 'CAMERA':
+            camera = scene_object.data
+            description['camera'] = {'type': camera.type, 'lens': plain(camera.lens), 'shift': (
+                plain(camera.shift_x), plain(camera.shift_y)), 'clip': (plain(camera.clip_start),
+                                                                       plain(camera.clip_end))}
+        elif scene_object.type == 'MESH':
+            description['mesh'] = scene_object.data.name
+        for slot in scene_object.material_slots:
+            if slot.material is not None and slot.material.name not in materials:
+                materials[slot.material.name] = material_fingerprint(slot.material)
+        objects[scene_object.name] = description
+
+    render = scene.render
+    view = scene.view_settings
+    image_settings = render.image_settings
+    return {
+        'objects': objects,
+        'materials': materials,
+        'world': material_fingerprint(scene.world) if scene.world is not None else None,
+        'camera': scene.camera.name if scene.camera is not None else None,
+        'render': {'engine': render.engine, 'resolution': (render.resolution_x, render.resolution_y,
+                                                           render.resolution_percentage),
+                   'film_transparent': render.film_transparent, 'dither': plain(render.dither_intensity)},
+        'cycles': {name: plain(getattr(scene.cycles, name)) for name in CYCLES_OPTIONS if hasattr(scene.cycles, name)},
+        'view': {'transform': view.view_transform, 'look': view.look, 'exposure': plain(view.exposure),
+                 'gamma': plain(view.gamma)},
+        'output': {'format': image_settings.file_format, 'color_mode': image_settings.color_mode,
+                   'color_depth': image_settings.color_depth, 'compression': image_settings.compression,
+                   'quality': image_settings.quality},
+        'extra': extra if extra is not None else {},
+    }
+
+
+def state_key(fingerprint):
+    """
+    :param fingerprint: A fingerprint returned by scene_fingerprint
+    :return: The SHA-256 hash of the fingerprint
+    :rtype: str
+    """
+
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+
+class RenderCache:
+    """
+    A local cache of rendered images which is shared by all datasets. The images are stored once under the hash of
+    their content, an index in a SQLite database maps the hash of the scene state of a render to its image. Images
+    are hardlinked from and into the cache, so a cached image takes no additional space in a dataset on the same drive.
+    On another drive the image is copied instead.
+    """
+
+    OBJECTS_NAME = 'objects'
+
+    def __init__(self, filepath):
+        """
+        Initializes an instance of RenderCache and creates the cache if it does not exist.
+
+        :param filepath: The path of the cache folder
+        """
+
+        os.makedirs(os.path.join(filepath, self.OBJECTS_NAME), exist_ok=True)
+        self.filepath = filepath
+        self.connection = sqlite3.connect(os.path.join(filepath, 'index.sqlite'), timeout=60, isolation_level=None)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS states (state_key TEXT PRIMARY KEY, sha256 TEXT, extension TEXT, '
+            'file_size INTEGER, created_at REAL)')
+        self.hits = 0
+        self.misses = 0
+
+    def __object_filepath__(self, sha256, extension):
+        """
+        :param sha256: The hash of the content of an image
+        :param extension: The file extension of the image including the dot
+        :return: The path of the image in the cache
+        :rtype: str
+        """
+
+        return os.path.join(self.filepath, self.OBJECTS_NAME, sha256[:2], sha256 + extension)
+
+    @staticmethod
+    def __link__(source, destination):
+        """
+        Hardlinks a file, or copies it if a hardlink is not possible.
+
+        :param source: The path of the existing file
+        :param destination: The path of the new file, an existing file is replaced
+        """
+
+        # several workers can store the same image at the same time
+        temporary = destination + '.' + str(os.getpid()) + '.link'
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        try:
+            os.link(source, temporary)
+        except OSError:
+            shutil.copyfile(source, temporary)
+        os.replace(temporary, destination)
+
+    def lookup(self, key):
+        """
+        Looks up the image of a scene state.
+
+        :param key: The state key of the render
+        :return: A tuple of the form (path, size, SHA-256 hash) or None if the state is not cached
+        :rtype: tuple
+        """
+
+        row = self.connection.execute('SELECT sha256, extension, file_size FROM states WHERE state_key = ?',
+                                      (key,)).fetchone()
+        # an object which was deleted or changed is rendered again
+        if row is None or not os.path.isfile(self.__object_filepath__(row[0], row[1])) or \
+                os.path.getsize(self.__object_filepath__(row[0], row[1])) != row[2]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.__object_filepath__(row[0], row[1]), row[2], row[0]
+
+    def fetch(self, key, filepath):
+        """
+        Places the cached image of a scene state at filepath.
+
+        :param key: The state key of the render
+        :param filepath: The path of the image in the dataset
+        :return: A tuple of the form (size, SHA-256 hash) or None if the state is not cached
+        :rtype: tuple
+        """
+
+        cached = self.lookup(key)
+        if cached is None:
+            return None
+        self.__link__(cached[0], filepath)
+        return cached[1], cached[2]
+
+    def store(self, key, sha256, filepath=None, data=None, extension=None):
+        """
+        Adds the image of a scene state to the cache, either from a file or from the encoded image.
+
+        :param key: The state key of the render
+        :param sha256: The SHA-256 hash of the image
+        :param filepath: The path of the rendered image
+        :param data: The encoded image if there is no file
+        :param extension: The file extension including the dot, taken from filepath if None
+        """
+
+        if extension is None:
+            extension = os.path.splitext(filepath)[1]
+        object_filepath = self.__object_filepath__(sha256, extension)
+        if not os.path.isfile(object_filepath):
+            os.makedirs(os.path.dirname(object_filepath), exist_ok=True)
+            if data is not None:
+                temporary = object_filepath + '.' + str(os.getpid()) + '.tmp'
+                with open(temporary, 'wb') as file:
+                    file.write(data)
+                os.replace(temporary, object_filepath)
+            else:
+                self.__link__(filepath, object_filepath)
+        self.connection.execute('INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?, ?)',
+                                (key, sha256, extension, os.path.getsize(object_filepath), time.time()))
+
+    def report(self):
+        """
+        :return: The hits and misses of this session
+        :rtype: str
+        """
+
+        lookups = self.hits + self.misses
+        return ('Render cache: ' + str(self.hits) + ' hits, ' + str(self.misses) + ' misses' +
+                (' (' + str(round(100 * self.hits / lookups, 1)) + '% hits)' if lookups else ''))
+
+    def close(self):
+        """
+        Closes the index of the cache.
+        """
+
+        self.connection.close()
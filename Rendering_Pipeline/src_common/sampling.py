@@ -0,0 +1,102 @@
+import json
+import os
+import random
+
+# The file in the dataset folder which records the sampled combinations
+SAMPLE_NAME = 'sample.json'
+
+METHODS = ('lhs', 'stratified')
+
+
+def latin_hypercube(sizes, count, rng):
+    """
+    Draws combinations with a Latin hypercube: every attribute is split into count equal strata with one value drawn
+    from each, and the strata of the attributes are combined in random order. So every value of every attribute
+    appears equally often (up to one), independent of how many attributes there are.
+
+    :param sizes: A list of tuples of the form (attribute name, number of values)
+    :param count: The amount of combinations
+    :param rng: A random.Random instance
+    :return: A list of dictionaries of the form {attribute name: value index}
+    :rtype: list of dict
+    """
+
+    columns = []
+    for name, size in sizes:
+        column = [min(size - 1, int((stratum + rng.random()) * size / count)) for stratum in range(count)]
+        rng.shuffle(column)
+        columns.append((name, column))
+    return [{name: column[row] for name, column in columns} for row in range(count)]
+
+
+def sample_class(enumerator, class_index, budget, method='lhs', seed=0):
+    """
+    Draws the combinations of a class without duplicates. A class with no more images than the budget is used as a
+    whole.
+
+    :param enumerator: The Enumerator of the full dataset
+    :param class_index: The index of the class
+    :param budget: The amount of images of the class
+    :param method: 'lhs' for a Latin hypercube over all DEA, NDEA and camera attributes or 'stratified' for one random
+        image out of each of budget equal parts of the class (the slowest changing attributes are covered evenly)
+    :param seed: The seed of the random numbers, the same seed draws the same combinations
+    :return: A list of dictionaries of the form {attribute name: value index}
+    :rtype: list of dict
+    """
+
+    if method not in METHODS:
+        raise ValueError('Unknown sampling method ' + str(method) + ', use one of ' + str(METHODS))
+    start, end = enumerator.class_range(class_index)
+    if budget >= end - start:
+        return [enumerator.combination(index).values for index in range(start, end)]
+
+    rng = random.Random(seed * 1000003 + class_index)
+    if method == 'stratified':
+        return [enumerator.combination(start + int((stratum + rng.random()) * (end - start) / budget)).values
+                for stratum in range(budget)]
+
+    sizes = sorted(enumerator.value_sizes(class_index).items())
+    combinations = []
+    seen = set()
+    # duplicates are replaced by a new hypercube for the missing combinations
+    while len(combinations) < budget:
+        for values in latin_hypercube(sizes, budget - len(combinations), rng):
+            key = tuple(sorted(values.items()))
+            if key not in seen:
+                seen.add(key)
+                combinations.append(values)
+    return combinations
+
+
+def save_sample(filepath, samples, budget, method, seed):
+    """
+    Records the sampled combinations in the file SAMPLE_NAME of the dataset folder.
+
+    :param filepath: The path of the dataset folder
+    :param samples: For every class a list of dictionaries of the form {attribute name: value index}
+    :param budget: The amount of images per class
+    :param method: The sampling method
+    :param seed: The seed of the random numbers
+    """
+
+    # the workers of a farm write the same sample at the same time
+    temporary_filepath = os.path.join(filepath, SAMPLE_NAME) + '.' + str(os.getpid()) + '.tmp'
+    with open(temporary_filepath, 'w') as file:
+        json.dump({'budget': budget, 'method': method, 'seed': seed, 'classes': samples}, file)
+    os.replace(temporary_filepath, os.path.join(filepath, SAMPLE_NAME))
+
+
+def load_sample(filepath):
+    """
+    Loads the sampled combinations of a dataset.
+
+    :param filepath: The path of the dataset folder
+    :return: For every class a list of dictionaries of the form {attribute name: value index} or None if the dataset
+        was not sampled
+    :rtype: list of list
+    """
+
+    if not os.path.isfile(os.path.join(filepath, SAMPLE_NAME)):
+        return None
+    with open(os.path.join(filepath, SAMPLE_NAME)) as file:
+        return json.load(file)['classes']
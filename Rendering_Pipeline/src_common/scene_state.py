@@ -0,0 +1,110 @@
+def comparable(value):
+    """
+    Converts a value so that it can be compared with the last written value. Numbers from NumPy become Python numbers
+    and sequences become tuples, Blender datablocks stay as they are.
+
+    :param value: The value of a property
+    :return: The converted value
+    """
+
+    if hasattr(value, 'as_pointer'):
+        return value
+    if hasattr(value, 'tolist'):
+        value = value.tolist()
+    if isinstance(value, (tuple, list)):
+        return tuple(comparable(element) for element in value)
+    return value
+
+
+class SceneState:
+    """
+    Sits between the classes which change the scene and Blender. It remembers the last value written to each property
+    and only passes a write on to Blender if the value changed, because every write can tag the depsgraph for an update.
+    All writes to the properties managed by a SceneState must go through it, otherwise invalidate must be called.
+    """
+
+    def __init__(self):
+        """
+        Initializes an instance of SceneState.
+        """
+
+        self.values = {}
+        self.writes = {}
+        self.skipped = {}
+
+    def __write__(self, key, name, value, write):
+        """
+        Writes a value if it differs from the last written value.
+
+        :param key: The key of the property
+        :param name: The name of the property used for the counters
+        :param value: The new value
+        :param write: A function which writes the value to Blender
+        :return: True if the value was written and False if it was skipped
+        :rtype: bool
+        """
+
+        value = comparable(value)
+        if key in self.values and self.values[key] == value:
+            self.skipped[name] = self.skipped.get(name, 0) + 1
+            return False
+        write(value)
+        self.values[key] = value
+        self.writes[name] = self.writes.get(name, 0) + 1
+        return True
+
+    def set(self, target, name, value):
+        """
+        Sets a property of a Blender struct, e.g. set(shape, 'location.z', 1).
+
+        :param target: The struct which owns the property
+        :param name: The name of the property, nested properties are separated by dots
+        :param value: The new value
+        :return: True if the value was written and False if it was skipped
+        :rtype: bool
+        """
+
+        def write(new_value):
+            owner = target
+            parts = name.split('.')
+            for part in parts[:-1]:
+                owner = getattr(owner, part)
+            setattr(owner, parts[-1], new_value)
+
+        return self.__write__((target.as_pointer(), name), name, value, write)
+
+    def set_item(self, target, name, index, value):
+        """
+        Sets an element of a collection property of a Blender struct, e.g. set_item(shape.data, 'materials', 0,
+        material).
+
+        :param target: The struct which owns the collection
+        :param name: The name of the collection
+        :param index: The index of the element
+        :param value: The new value
+        :return: True if the value was written and False if it was skipped
+        :rtype: bool
+        """
+
+        def write(new_value):
+            getattr(target, name)[index] = new_value
+
+        return self.__write__((target.as_pointer(), name, index), name, value, write)
+
+    def invalidate(self):
+        """
+        Forgets all written values. Must be called if the managed properties were changed without this SceneState.
+        """
+
+        self.values = {}
+
+    def report(self):
+        """
+        :return: A summary of the writes and the skipped redundant writes per property
+        :rtype: str
+        """
+
+        names = sorted(set(self.writes) | set(self.skipped))
+        return 'Scene writes: ' + str(sum(self.writes.values())) + ', skipped: ' + str(sum(self.skipped.values())) + \
+            ''.join('\n  ' + name + ': ' + str(self.writes.get(name, 0)) + ' written, ' +
+                    str(self.skipped.get(name, 0)) + ' skipped' for name in names)
@@ -0,0 +1,152 @@
+import hashlib
+import io
+import json
+import os
+import tarfile
+import time
+from collections import namedtuple
+
+SHARDS_NAME = 'shards'
+
+ShardSample = namedtuple('ShardSample', ['shard', 'key', 'class_name', 'files'])
+ShardSample.__doc__ = """
+A sample which was written to a completed shard.
+
+:param shard: The file name of the shard
+:param key: The key of the sample, all files of a sample are named key.extension
+:param class_name: The name of the class of the sample
+:param files: A dictionary of the form {extension: (size, SHA-256 hash)}
+"""
+
+
+def shard_names(filepath):
+    """
+    Lists the completed shards of a folder. A shard is completed when its index file exists, shards which were not
+    closed are ignored.
+
+    :param filepath: The path of the folder containing the shards
+    :return: A sorted list of the file names of the completed shards
+    :rtype: list of str
+    """
+
+    return sorted(name[:-len('.json')] + '.tar' for name in os.listdir(filepath)
+                  if name.endswith('.json') and os.path.isfile(os.path.join(filepath, name[:-len('.json')] + '.tar')))
+
+
+def read_index(filepath, shard):
+    """
+    Reads the index file of a completed shard.
+
+    :param filepath: The path of the folder containing the shards
+    :param shard: The file name of the shard
+    :return: A dictionary of the form {'samples': amount, 'size': bytes, 'classes': {class name: amount}}
+    :rtype: dict
+    """
+
+    with open(os.path.join(filepath, shard[:-len('.tar')] + '.json')) as file:
+        return json.load(file)
+
+
+def read_samples(shard_filepath):
+    """
+    Reads the samples of a shard sequentially.
+
+    :param shard_filepath: The path of the shard
+    :return: A generator of tuples of the form (key, {extension: bytes})
+    """
+
+    with tarfile.open(shard_filepath, 'r|') as archive:
+        key, files = None, {}
+        for member in archive:
+            if not member.isfile():
+                continue
+            member_key, extension = member.name.split('.', 1)
+            if member_key != key and files:
+                yield key, files
+                files = {}
+            key = member_key
+            files[extension] = archive.extractfile(member).read()
+        if files:
+            yield key, files
+
+
+class ShardWriter:
+    """
+    Writes samples into tar shards in the layout of WebDataset: all files of a sample are stored one after another as
+    key.extension. A new shard is started when the current one reaches max_size. When a shard is closed an index file
+    with the same name and the amount of samples per class is written next to it, so a shard without index file was
+    interrupted and is overwritten by the next writer with the same prefix.
+    """
+
+    def __init__(self, filepath, prefix='shard', max_size=1 << 30):
+        """
+        Initializes an instance of ShardWriter. The numbering continues after the last completed shard.
+
+        :param filepath: The path of the folder for the shards
+        :param prefix: The prefix of the shard names, writers running at the same time need different prefixes
+        :param max_size: The size in bytes after which a new shard is started
+        """
+
+        os.makedirs(filepath, exist_ok=True)
+        self.filepath = filepath
+        self.prefix = prefix
+        self.max_size = max_size
+        self.number = max([int(name[len(prefix) + 1:-len('.json')]) for name in os.listdir(filepath)
+                           if name.startswith(prefix + '-') and name.endswith('.json')], default=0)
+        self.shard = None
+        self.archive = None
+        self.samples = []
+
+    def write(self, key, class_name, files):
+        """
+        Appends a sample to the current shard.
+
+        :param key: The key of the sample, must not contain dots
+        :param class_name: The name of the class of the sample
+        :param files: A dictionary of the form {extension: bytes}
+        :return: The samples of the shard which was completed by this write, otherwise an empty list
+        :rtype: list of ShardSample
+        """
+
+        completed = []
+        if self.archive is not None and self.archive.offset + sum(map(len, files.values())) > self.max_size:
+            completed = self.close()
+        if self.archive is None:
+            self.number += 1
+            self.shard = self.prefix + '-' + str(self.number).zfill(6) + '.tar'
+            self.archive = tarfile.open(os.path.join(self.filepath, self.shard), 'w')
+
+        sample_files = {}
+        for extension, data in files.items():
+            info = tarfile.TarInfo(key + '.' + extension)
+            info.size = len(data)
+            info.mtime = time.time()
+            self.archive.addfile(info, io.BytesIO(data))
+            sample_files[extension] = (len(data), hashlib.sha256(data).hexdigest())
+        self.samples.append(ShardSample(self.shard, key, class_name, sample_files))
+        return completed
+
+    def close(self):
+        """
+        Completes the current shard by writing its index file.
+
+        :return: The samples of the completed shard
+        :rtype: list of ShardSample
+        """
+
+        if self.archive is None:
+            return []
+        self.archive.close()
+        classes = {}
+        for sample in self.samples:
+            classes[sample.class_name] = classes.get(sample.class_name, 0) + 1
+        index_filepath = os.path.join(self.filepath, self.shard[:-len('.tar')] + '.json')
+        with open(index_filepath + '.tmp', 'w') as file:
+            json.dump({'samples': len(self.samples), 'size': os.path.getsize(os.path.join(self.filepath, self.shard)),
+                       'classes': classes}, file)
+        os.replace(index_filepath + '.tmp', index_filepath)
+
+        completed = self.samples
+        self.archive = None
+        self.samples = []
+        return completed
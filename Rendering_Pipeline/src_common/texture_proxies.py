@@ -0,0 +1,125 @@
+import hashlib
+import math
+import os
+
+import numpy as np
+
+# The smallest edge of a proxy, smaller textures lose too much when the camera comes closer than expected
+MINIMUM_SIZE = 64
+
+
+def uv_area(uvs, loop_starts, loop_totals):
+    """
+    Computes the area a mesh covers in its UV map with the shoelace formula.
+
+    :param uvs: An array of the form (loops, 2) with the UV coordinates of every loop
+    :param loop_starts: The index of the first loop of every polygon
+    :param loop_totals: The amount of loops of every polygon
+    :return: The area in UV units, overlapping polygons are counted several times
+    :rtype: float
+    """
+
+    if len(loop_starts) == 0:
+        return 0.0
+    uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 2)
+    loop_starts = np.asarray(loop_starts)
+    following = np.arange(len(uvs)) + 1
+    # the last loop of a polygon is followed by its first loop
+    following[loop_starts + np.asarray(loop_totals) - 1] = loop_starts
+    cross = uvs[:, 0] * uvs[following, 1] - uvs[following, 0] * uvs[:, 1]
+    order = np.argsort(loop_starts)
+    return float(np.abs(np.add.reduceat(cross, loop_starts[order])).sum() / 2)
+
+
+def pixels_per_unit(distance, resolution, camera_type, angle, ortho_scale):
+    """
+    :param distance: The distance between the camera and the closest point of an object
+    :param resolution: The larger edge of the rendered image in pixels
+    :param camera_type: The type of the Blender camera, 'PERSP' or 'ORTHO'
+    :param angle: The field of view of a perspective camera in radians
+    :param ortho_scale: The visible width of an orthographic camera
+    :return: How many pixels one unit of length covers on the image at this distance
+    :rtype: float
+    """
+
+    if camera_type == 'ORTHO':
+        return resolution / ortho_scale
+    return resolution / (2 * max(distance, 1e-6) * math.tan(angle / 2))
+
+
+def texels_needed(length_per_uv, pixels, oversampling=2.0):
+    """
+    :param length_per_uv: The length on the object which one unit of the texture coordinates spans
+    :param pixels: The pixels per unit of length at the closest camera position, see pixels_per_unit
+    :param oversampling: The texels per pixel, 2 keeps the texture sharp when it is filtered
+    :return: The edge length of a texture which gives at least oversampling texels per pixel
+    :rtype: float
+    """
+
+    return length_per_uv * pixels * oversampling
+
+
+def proxy_size(width, height, texels):
+    """
+    Computes the size of a proxy: both edges are scaled by the same power of two so the aspect ratio is kept, until
+    the larger edge is as small as possible but not below texels or MINIMUM_SIZE.
+
+    :param width: The width of the original texture
+    :param height: The height of the original texture
+    :param texels: The needed edge length returned by texels_needed
+    :return: A tuple of the form (width, height), the original size if it cannot be reduced
+    :rtype: tuple of int
+    """
+
+    factor = 1
+    while max(width, height) // (factor * 2) >= max(texels, MINIMUM_SIZE):
+        factor *= 2
+    return max(1, width // factor), max(1, height // factor)
+
+
+def source_key(filepath=None, data=None):
+    """
+    :param filepath: The path of the texture file
+    :param data: The content of a packed texture if there is no file
+    :return: The first 16 characters of the SHA-256 hash of the texture, a changed texture gets a new proxy
+    :rtype: str
+    """
+
+    sha256 = hashlib.sha256()
+    if data is not None:
+        sha256.update(data)
+    else:
+        with open(filepath, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                sha256.update(chunk)
+    return sha256.hexdigest()[:16]
+
+
+def proxy_filepath(directory, name, key, width, height, extension):
+    """
+    :param directory: The folder of the proxies
+    :param name: The name of the original texture
+    :param key: The key returned by source_key
+    :param width: The width of the proxy
+    :param height: The height of the proxy
+    :param extension: The file extension including the dot
+    :return: The path of the proxy in the cache
+    :rtype: str
+    """
+
+    name = ''.join(character if character.isalnum() or character in '-_' else '_'
+                   for character in os.path.splitext(name)[0])
+    return os.path.join(directory, name + '_' + key + '_' + str(width) + 'x' + str(height) + extension)
+
+
+def memory_size(width, height, channels, is_float):
+    """
+    :param width: The width of an image
+    :param height: The height of an image
+    :param channels: The amount of channels
+    :param is_float: Whether Blender keeps the image as float buffer
+    :return: The bytes of the image in memory
+    :rtype: int
+    """
+
+    return width * height * channels * (4 if is_float else 1)
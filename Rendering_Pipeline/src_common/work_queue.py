@@ -0,0 +1,214 @@
+import argparse
+import os
+import socket
+import sqlite3
+import time
+
+
+class WorkQueue:
+    """
+    A shared on-disk queue of image index ranges. The queue is stored in a SQLite database so that several Blender
+    processes can claim ranges concurrently. A claimed range is leased to a worker for lease_time seconds, if the worker
+    does not complete or renew the lease in time the range is handed out again. Because every image is saved under its
+    global index a range which is rendered twice overwrites the same files and no images are duplicated.
+    """
+
+    PENDING = 'pending'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, filepath, lease_time=600, max_attempts=5):
+        """
+        Initializes an instance of WorkQueue and creates the database if it does not exist.
+
+        :param filepath: The path of the database file
+        :param lease_time: Seconds a claimed range stays leased without a renewal
+        :param max_attempts: How often a range is handed out before it is marked as failed
+        """
+
+        self.filepath = filepath
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(filepath, timeout=60, isolation_level=None)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS ranges (id INTEGER PRIMARY KEY, start_index INTEGER, end_index INTEGER, '
+            'state TEXT, worker TEXT, lease_expires REAL, attempts INTEGER DEFAULT 0)')
+
+    def fill(self, total_images, range_size):
+        """
+        Splits the images from 0 to total_images into ranges of range_size images. Nothing happens if the queue was
+        already filled, so every worker can call this method with the same arguments.
+
+        :param total_images: The total amount of images of the dataset
+        :param range_size: The amount of images per range
+        """
+
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            if self.connection.execute('SELECT COUNT(*) FROM ranges').fetchone()[0] == 0:
+                self.connection.executemany(
+                    'INSERT INTO ranges (start_index, end_index, state) VALUES (?, ?, ?)',
+                    [(start, min(start + range_size, total_images), self.PENDING)
+                     for start in range(0, total_images, range_size)])
+            self.connection.execute('COMMIT')
+        except sqlite3.Error:
+            self.connection.execute('ROLLBACK')
+            raise
+
+    def claim(self, worker):
+        """
+        Leases the next pending range to the worker. Expired leases are returned to the queue beforehand.
+
+        :param worker: The name of the worker
+        :return: A tuple of the form (range id, start, end) or None if no range is pending
+        :rtype: tuple of int
+        """
+
+        now = time.time()
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            self.__expire_leases__(now)
+            row = self.connection.execute(
+                'SELECT id, start_index, end_index FROM ranges WHERE state = ? ORDER BY id LIMIT 1',
+                (self.PENDING,)).fetchone()
+            if row is not None:
+                self.connection.execute(
+                    'UPDATE ranges SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?',
+                    (self.LEASED, worker, now + self.lease_time, row[0]))
+            self.connection.execute('COMMIT')
+        except sqlite3.Error:
+            self.connection.execute('ROLLBACK')
+            raise
+        return row
+
+    def __expire_leases__(self, now):
+        """
+        Returns all ranges with an expired lease to the queue or marks them as failed if they were handed out too often.
+        Must be called inside a transaction.
+
+        :param now: The current time
+        """
+
+        self.connection.execute(
+            'UPDATE ranges SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL '
+            'WHERE state = ? AND lease_expires < ?',
+            (self.max_attempts, self.FAILED, self.PENDING, self.LEASED, now))
+
+    def renew(self, range_id, worker):
+        """
+        Extends the lease of a range.
+
+        :param range_id: The id of the range
+        :param worker: The name of the worker holding the lease
+        :return: True if the worker still holds the lease and False otherwise
+        :rtype: bool
+        """
+
+        cursor = self.connection.execute(
+            'UPDATE ranges SET lease_expires = ? WHERE id = ? AND worker = ? AND state = ?',
+            (time.time() + self.lease_time, range_id, worker, self.LEASED))
+        return cursor.rowcount > 0
+
+    def complete(self, range_id, worker):
+        """
+        Marks a range as done.
+
+        :param range_id: The id of the range
+        :param worker: The name of the worker holding the lease
+        :return: True if the worker still held the lease and False otherwise
+        :rtype: bool
+        """
+
+        cursor = self.connection.execute(
+            'UPDATE ranges SET state = ?, lease_expires = NULL WHERE id = ? AND worker = ? AND state = ?',
+            (self.DONE, range_id, worker, self.LEASED))
+        return cursor.rowcount > 0
+
+    def release(self, worker):
+        """
+        Returns all ranges leased by a worker to the queue. Used when a worker is known to be dead.
+
+        :param worker: The name of the worker
+        :return: The amount of released ranges
+        :rtype: int
+        """
+
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = self.connection.execute(
+                'UPDATE ranges SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, '
+                'lease_expires = NULL WHERE worker = ? AND state = ?',
+                (self.max_attempts, self.FAILED, self.PENDING, worker, self.LEASED))
+            self.connection.execute('COMMIT')
+        except sqlite3.Error:
+            self.connection.execute('ROLLBACK')
+            raise
+        return cursor.rowcount
+
+    def progress(self):
+        """
+        Counts the ranges and images per state.
+
+        :return: A dictionary of the form {state: (ranges, images)}
+        :rtype: dict
+        """
+
+        rows = self.connection.execute(
+            'SELECT state, COUNT(*), SUM(end_index - start_index) FROM ranges GROUP BY state')
+        return {state: (ranges, images) for state, ranges, images in rows}
+
+    def has_work(self):
+        """
+        :return: True if the queue was not filled yet or if ranges are pending or leased and False otherwise
+        :rtype: bool
+        """
+
+        progress = self.progress()
+        return not progress or self.PENDING in progress or self.LEASED in progress
+
+    def close(self):
+        """
+        Closes the connection to the database of the queue.
+        """
+
+        self.connection.close()
+
+
+def default_worker_name():
+    """
+    :return: A worker name which is unique on the network
+    :rtype: str
+    """
+
+    return socket.gethostname() + '_' + str(os.getpid())
+
+
+def parse_worker_arguments(argv):
+    """
+    Parses the arguments Blender passes to the script after '--'. A worker gets the queue, a job is rendered in one
+    session if only the job file is given and an instance started by CpuTuner gets the benchmark arguments. With
+    --benchmark-suite the benchmark suite of src_common/benchmark.py is rendered instead of a dataset.
+
+    :param argv: The arguments of the process, usually sys.argv
+    :return: The parsed arguments or None if the script was started without arguments
+    :rtype: argparse.Namespace
+    """
+
+    if '--' not in argv:
+        return None
+    parser = argparse.ArgumentParser(prog='render worker')
+    parser.add_argument('--queue', help='path of the queue database')
+    parser.add_argument('--job', help='path of a job file with the datasets to render')
+    parser.add_argument('--dataset', type=int, default=0, help='index of the dataset of the job a worker renders')
+    parser.add_argument('--worker', default=default_worker_name(), help='name of the worker')
+    parser.add_argument('--range-size', type=int, default=50, help='images per claimed range')
+    parser.add_argument('--lease-time', type=float, default=600, help='seconds until an unrenewed lease expires')
+    parser.add_argument('--threads', type=int, default=0, help='render threads, 0 lets Cycles decide')
+    parser.add_argument('--tile-size', type=int, default=0, help='tile size, 0 keeps the tile size of the scene')
+    parser.add_argument('--benchmark', type=int, default=0, help='images to render for CpuTuner instead of a dataset')
+    parser.add_argument('--benchmark-result', help='path of the JSON file with the benchmark result')
+    parser.add_argument('--benchmark-start', help='path of the file which signals the start of the benchmark')
+    parser.add_argument('--benchmark-suite', nargs='?', const='',
+                        help='render the benchmark suite instead of a dataset and save the result at this path')
+    return parser.parse_args(argv[argv.index('--') + 1:])
@@ -4,7 +4,8 @@ import math as m
 
 class Camera:
     """
-        This class contains the camera for the scene and is used to change the position of it.
+        This class contains the camera for the scene and is used to change the position of it. The changes are
+        written through the SceneState which is assigned by Render.
     """
 
     def __init__(self, heights, betas, gammas):
@@ -33,26 +34,38 @@ class Camera:
         self.current_beta = 0
         self.current_gamma = -1
 
-    def next_perspective(self):
-        """
-       Sets the next perspective. If the method is called and there is no next perspective the method will be reset.
-
-       :return: False when there is no next perspective and otherwise True
-       :rtype: bool
-       """
-
-        self.current_gamma += 1
-        if self.current_gamma >= len(self.gammas):
-            self.current_gamma = 0
-            self.current_beta += 1
-            if self.current_beta >= len(self.betas):
-                self.current_beta = 0
-                self.current_height += 1
-                if self.current_height >= len(self.heights):
-                    self.current_height = 0
-                    self.current_gamma = -1
-                    return False
-        self.camera.location.z = self.heights[self.current_height]
-        self.axis.rotation_euler.x = m.radians(self.betas[self.current_beta])
-        self.axis.rotation_euler.z = m.radians(self.gammas[self.current_gamma])
-        return True
+        self.scene_state = None
+
+    def set_perspective(self, height_index, beta_index, gamma_index):
+        """
+        Sets the perspective with the given height, beta and gamma.
+
+        :param height_index: The index of the height
+        :param beta_index: The index of the beta value
+        :param gamma_index: The index of the gamma value
+        """
+
+        self.current_height = height_index
+        self.current_beta = beta_index
+        self.current_gamma = gamma_index
+        self.scene_state.set(self.camera, 'location.z', self.heights[height_index])
+        self.scene_state.set(self.axis, 'rotation_euler.x', m.radians(self.betas[beta_index]))
+        self.scene_state.set(self.axis, 'rotation_euler.z', m.radians(self.gammas[gamma_index]))
+
+    def insert_keyframes(self, frame):
+        """
+        Inserts keyframes for the height and the rotation of the axis.
+
+        :param frame: The frame of the keyframes
+        """
+
+        self.camera.keyframe_insert('location', frame=frame)
+        self.axis.keyframe_insert('rotation_euler', frame=frame)
+
+    def clear_keyframes(self):
+        """
+        Removes the animation data of the camera and the axis.
+        """
+
+        self.camera.animation_data_clear()
+        self.axis.animation_data_clear()
@@ -1,19 +1,22 @@
 class Class:
     """
     This class contains for a class to classify all needed values of the attributes and is used to modify the scene
-    based on those values. Initially all shapes should be hidden.
+    based on those values. Initially all shapes should be hidden. All changes of the scene are written through a
+    SceneState, so values which are already set are not written again.
     """
 
-    def __init__(self, name, lights, background_planes):
+    def __init__(self, name, lights, background_planes, scene_state):
         """
         Initializes an instance of Class.
 
         :param name: The name of the class
         :param lights: The lights for which the light energies should be set
         :param background_planes: A list of planes for which the background texture should be set
+        :param scene_state: The SceneState shared by all classes and the camera
         """
 
         self.name = name
+        self.scene_state = scene_state
         self.lights = lights
         self.background_planes = background_planes
 
@@ -30,105 +33,122 @@ class Class:
         self.light_energies = None
         self.light_energy_index = -1
 
-    def next_background(self):
+    def reset(self):
         """
-        Sets the next background texture. If the method is called and there is no next background the method will be
-        reset.
+        Forgets which values are set, so that the next setters apply all values of this class again. Needed when
+        another class changed the shared objects in the meantime.
+        """
+
+        self.shape_index = -1
+        self.texture_index = -1
+        self.color_index = -1
+        self.scale_index = -1
+        self.background_index = -1
+        self.light_energy_index = -1
+
+    def set_background(self, index):
+        """
+        Sets the background texture with the given index.
 
-        :return: False when there is no next background and otherwise True
-        :rtype: bool
+        :param index: The index of the background texture
         """
 
-        self.background_index += 1
-        if self.background_index >= len(self.backgrounds):
-            self.background_index = -1
-            return False
+        self.background_index = index
         for background_plane in self.background_planes:
-            background_plane.data.materials[0] = self.backgrounds[self.background_index]
-        return True
+            self.scene_state.set_item(background_plane.data, 'materials', 0, self.backgrounds[index])
 
-    def next_shape(self):
+    def set_shape(self, index):
         """
-        Disables hide for the next shape and hides the last shape. If the method is called and there is  no next
-        shape the method will be reset.
+        Disables hide for the shape with the given index and hides the last shape. The set texture and scale are
+        applied to the new shape.
 
-        :return: False when there is no next shape and otherwise True
-        :rtype: bool
+        :param index: The index of the shape
         """
 
-        self.shapes[self.shape_index].hide_render = True
-        self.shape_index += 1
-        if self.shape_index >= len(self.shapes):
-            self.shape_index = -1
-            return False
-        self.shapes[self.shape_index].hide_render = False
-        return True
+        if self.shape_index >= 0:
+            self.scene_state.set(self.shapes[self.shape_index], 'hide_render', True)
+        self.shape_index = index
+        self.scene_state.set(self.shapes[index], 'hide_render', False)
+        if self.texture_index >= 0:
+            self.set_texture(self.texture_index)
+        if self.scale_index >= 0:
+            self.set_scale(self.scale_index)
 
-    def next_scale(self):
+    def set_scale(self, index):
         """
-        Sets the next scale and adjusts the position. If the method is called and there is no next scale the method
-        will be reset.
+        Sets the scale with the given index and adjusts the position of the visible shape. Hidden shapes are scaled
+        when they become visible.
 
-        :return: False when there is no next scale and otherwise True
-        :rtype: bool
+        :param index: The index of the scale
         """
 
-        self.scale_index += 1
-        if self.scale_index >= len(self.scales):
-            self.scale_index = -1
-            return False
-        new_scale = self.scales[self.scale_index]
-        for shape in self.shapes:
-            shape.location.z = self.shapes[self.shape_index].dimensions.z / shape.scale.z * new_scale / 2
-            shape.scale = (new_scale, new_scale, new_scale)
-        return True
+        self.scale_index = index
+        if self.shape_index < 0:
+            return
+        new_scale = self.scales[index]
+        shape = self.shapes[self.shape_index]
+        self.scene_state.set(shape, 'location.z', shape.dimensions.z / shape.scale.z * new_scale / 2)
+        self.scene_state.set(shape, 'scale', (new_scale, new_scale, new_scale))
 
-    def next_texture(self):
+    def set_texture(self, index):
         """
-        Sets the next texture. If the method is called and there is no next texture the method will be reset.
+        Sets the texture with the given index on the visible shape and applies the set color to it.
 
-        :return: False when there is no next texture and otherwise True
-        :rtype: bool
+        :param index: The index of the texture
         """
 
-        self.texture_index += 1
-        if self.texture_index >= len(self.textures):
-            self.texture_index = -1
-            return False
-        for shape in self.shapes:
-            shape.data.materials[0] = self.textures[self.texture_index][0]
-        return True
+        self.texture_index = index
+        if self.shape_index >= 0:
+            self.scene_state.set_item(self.shapes[self.shape_index].data, 'materials', 0, self.textures[index][0])
+        if self.color_index >= 0:
+            self.set_color(self.color_index)
 
-    def next_color(self):
+    def set_color(self, index):
         """
-        Sets the next color. If the method is called and there is no next color the method will be reset.
+        Sets the color with the given index on the set texture. Other textures get the color when they are set.
 
-        :return: False when there is no next color and otherwise True
-        :rtype: bool
+        :param index: The index of the color
         """
 
-        self.color_index += 1
-        if self.color_index >= len(self.colors):
-            self.color_index = -1
-            return False
-        for texture in self.textures:
-            texture[1].elements[0].color = self.colors[self.color_index]
-        return True
+        self.color_index = index
+        if self.texture_index >= 0:
+            self.scene_state.set(self.textures[self.texture_index][1].elements[0], 'color', self.colors[index])
 
-    def next_lighting(self):
+    def set_lighting(self, index):
         """
-        Sets the next lighting. If the method is called and there is no next lighting the
-        method will be reset.
+        Sets the light energy with the given index.
 
-        :return: False when there is no next lighting and otherwise True
-        :rtype: bool
+        :param index: The index of the light energy
         """
 
-        self.light_energy_index += 1
-        if self.light_energy_index >= len(self.light_energies):
-            self.light_energy_index = -1
-            return False
+        self.light_energy_index = index
         for light in self.lights:
-            light.data.energy = self.light_energies[self.light_energy_index]
-        return True
+            self.scene_state.set(light.data, 'energy', self.light_energies[index])
 
+    def insert_keyframes(self, frame):
+        """
+        Inserts keyframes for all properties which are changed by the attributes that can be animated.
+
+        :param frame: The frame of the keyframes
+        """
+
+        for shape in self.shapes:
+            shape.keyframe_insert('hide_render', frame=frame)
+            shape.keyframe_insert('location', frame=frame)
+            shape.keyframe_insert('scale', frame=frame)
+        for texture in self.textures:
+            texture[1].elements[0].keyframe_insert('color', frame=frame)
+        for light in self.lights:
+            light.data.keyframe_insert('energy', frame=frame)
+
+    def clear_keyframes(self):
+        """
+        Removes the animation data of all objects, materials and lights which are keyframed by insert_keyframes.
+        """
+
+        for shape in self.shapes:
+            shape.animation_data_clear()
+        for texture in self.textures:
+            texture[0].node_tree.animation_data_clear()
+        for light in self.lights:
+            light.data.animation_data_clear()
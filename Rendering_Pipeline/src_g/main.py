@@ -1,5 +1,5 @@
 import os
-import shutil
+import sys
 from enum import Enum
 from importlib import util
 
@@ -23,9 +23,13 @@ def import_file(full_name, path):
 
 
 source_path = 'C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/src_g'
+common_path = os.path.join(os.path.dirname(source_path), 'src_common')
 
 class_module = import_file('class', os.path.join(source_path, 'class.py'))
 camera_module = import_file('camera', os.path.join(source_path, 'camera.py'))
+work_queue_module = import_file('work_queue', os.path.join(common_path, 'work_queue.py'))
+job_spec_module = import_file('job_spec', os.path.join(common_path, 'job_spec.py'))
+render_base_module = import_file('render_base', os.path.join(common_path, 'render_base.py'))
 
 
 class Attribute(Enum):
@@ -41,53 +45,46 @@ class Attribute(Enum):
     LIGHTING = 6
 
 
-class Render:
-    """
-    The class Render contains everything necessary to create a synthetic dataset with traces. Before the method
-    render is used the method initialize_classes should be called. If the usage of GPUs is desired the
-    enable_gpus method must be invoked before the rendering process starts. Alternatively the GPUs can be activated in
-    Blender.
-    """
+# The attributes in enumeration order with the method of Class which sets a value and the name of the list of values.
+# Of the DEA and trace attributes the first one changes least often.
+ATTRIBUTES = {
+    Attribute.BACKGROUND: (class_module.Class.set_background, 'backgrounds'),
+    Attribute.SHAPE: (class_module.Class.set_shape, 'shapes'),
+    Attribute.SCALE: (class_module.Class.set_scale, 'scales'),
+    Attribute.TEXTURE: (class_module.Class.set_texture, 'textures'),
+    Attribute.COLOR: (class_module.Class.set_color, 'colors'),
+    Attribute.LIGHTING: (class_module.Class.set_lighting, 'light_energies'),
+}
 
-    def __init__(self, filepath, class_names, traces, ndea, camera):
-        """
-        Initializes an instance of Render. The traces and ndea should not have the same elements otherwise
-        they are used as ndea.
-
-        :param filepath: The path where the dataset should be saved
-        :param class_names: A list of the class names which define the amount of classes
-        :param traces: A list of the attributes wanted as traces
-        :param ndea: A list of the attributes wanted as non dataset extending attributes
-        :param camera: The camera of the scene
-        """
+# Attributes which swap materials. Their values cannot be keyframed, so a keyframe batch never spans a change of them.
+STATIC_ATTRIBUTES = (Attribute.BACKGROUND, Attribute.TEXTURE)
 
-        self.filepath = filepath
-        self.class_names = class_names
-        self.traces = traces
-        self.ndea = ndea
-        self.functions = []
-        self.ndea_functions = []
+# Attributes which change the geometry of the scene. Persistent render data is only kept while none of them changes.
+GEOMETRY_ATTRIBUTES = (Attribute.SHAPE, Attribute.SCALE)
 
-        self.scene = bpy.context.scene
-        self.camera = camera
 
-        self.classes = []
-        self.shapes = None
-
-        self.scene.render.engine = 'CYCLES'
-        self.scene.cycles.samples = 100
+class Render(render_base_module.RenderBase):
+    """
+    The class Render of the Geometric pipeline creates its classification objects and sets their attributes,
+    the rendering of the dataset is inherited from RenderBase in src_common/render_base.py. Before the method render
+    is used the method initialize_classes should be called. If the usage of GPUs is desired the enable_gpus method
+    must be invoked before the rendering process starts. Alternatively the GPUs can be activated in Blender.
+    Without GPUs enable_cpu applies the CPU settings found by CpuTuner.
+    """
 
-        self.scene.render.resolution_x = 224
-        self.scene.render.resolution_y = 224
+    PIPELINE = 'geometric'
+    BASE_SAMPLES = 100
+    ATTRIBUTES = ATTRIBUTES
+    STATIC_ATTRIBUTES = STATIC_ATTRIBUTES
+    GEOMETRY_ATTRIBUTES = GEOMETRY_ATTRIBUTES
 
-        self.image_counter = 0
-        self.current_path = None
-        self.current_class = None
-        self.ndea_function_index = 0
-        self.ndea_start = 0
-        self.skip = 0
+    def __init__(self, filepath, class_names, traces, ndea, camera, **kwargs):
+        """
+        Initializes an instance of Render, the parameters are described in RenderBase.
+        """
 
-        self.total_images = 0
+        super().__init__(filepath, class_names, traces, ndea, camera, **kwargs)
+        self.shapes = None
 
     def initialize_classes(self, colors, scales, light_energies):
         """
@@ -104,39 +101,20 @@ class Render:
         """
 
         if len(self.traces) <= 0 and len(self.class_names) > 1:
-            user_input = input('\nNo traces given all classes will be the same [Stop(S), Continue(C)]: ')
+            user_input = self.__ask__('\nNo traces given all classes will be the same [Stop(S), Continue(C)]: ', 'C')
             if user_input != 'C':
                 return False
 
-        if Attribute.BACKGROUND in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_background)
-        else:
-            self.functions.append(class_module.Class.next_background)
-        if Attribute.SHAPE in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_shape)
-        else:
-            self.functions.append(class_module.Class.next_shape)
-        if Attribute.SCALE in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_scale)
-        else:
-            self.functions.append(class_module.Class.next_scale)
-        if Attribute.TEXTURE in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_texture)
-        else:
-            self.functions.append(class_module.Class.next_texture)
-        if Attribute.COLOR in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_color)
-        else:
-            self.functions.append(class_module.Class.next_color)
-        if Attribute.LIGHTING in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_lighting)
-        else:
-            self.functions.append(class_module.Class.next_lighting)
+        for attribute in ATTRIBUTES:
+            if attribute in self.ndea:
+                self.ndea_attributes.append(attribute)
+            else:
+                self.dea_attributes.append(attribute)
 
         lights = bpy.data.collections['Lights'].all_objects
         background_planes = bpy.data.collections['Background Planes'].all_objects
         for class_name in self.class_names:
-            self.classes.append(class_module.Class(class_name, lights, background_planes))
+            self.classes.append(class_module.Class(class_name, lights, background_planes, self.scene_state))
 
         self.shapes = np.array(bpy.data.collections['Shapes'].all_objects)
         backgrounds = []
@@ -152,6 +130,9 @@ class Render:
             elif 'Background' in material.name:
                 backgrounds.append(material)
         self.__distribute_traces__(textures, colors, scales, backgrounds, light_energies)
+        if self.proxy_filepath is not None:
+            self.__use_texture_proxies__([(material, self.shapes, max(scales)) for material, _ in textures] +
+                                         [(material, background_planes, None) for material in backgrounds])
         self.__set_total_images__()
         return True
 
@@ -192,178 +173,45 @@ class Render:
             else:
                 c_class.light_energies = light_energies
 
-    def __set_total_images__(self):
-        """
-        Sets total_images to the total amount of images the dataset will contain. Must be called after the classes
-        are fully initialized.
-        """
-
-        total_images = 1
-        for c_class in self.classes:
-            if Attribute.BACKGROUND not in self.ndea:
-                total_images *= len(c_class.backgrounds)
-            if Attribute.SHAPE not in self.ndea:
-                total_images *= len(c_class.shapes)
-            if Attribute.SCALE not in self.ndea:
-                total_images *= len(c_class.scales)
-            if Attribute.TEXTURE not in self.ndea:
-                total_images *= len(c_class.textures)
-            if Attribute.COLOR not in self.ndea:
-                total_images *= len(c_class.colors)
-            if Attribute.LIGHTING not in self.ndea:
-                total_images *= len(c_class.light_energies)
-            self.total_images += total_images * self.camera.number_of_positions
-            total_images = 1
-
-    def __delete_contents__(self):
-        """
-        Deletes all contents at the filepath.
-
-        :return: True when deletion was successful and False otherwise
-        :rtype: bool
-        """
-
-        for filename in os.listdir(self.filepath):
-            file_path = os.path.join(self.filepath, filename)
-            try:
-                if os.path.isfile(file_path) or os.path.islink(file_path):
-                    os.unlink(file_path)
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-            except Exception as e:
-                print('Failed to delete %s. Reason: %s' % (file_path, e))
-                return False
-        return True
-
-    def __create_folder_structure__(self):
-        """
-        Creates the needed folder structure at the filepath location. If the needed structure is already existent the
-        user can resume an unfinished dataset or delete all contents at the filepath location.
-
-        :return: True if the data structure was successfully created and the dataset is not already complete and False
-            is returned otherwise
-        :rtype: bool
-        """
-
-        if os.path.exists(self.filepath) and os.path.isdir(self.filepath):
-            contents = os.listdir(self.filepath)
-            if contents:
-                if self.class_names.sort() == contents.sort():
-                    user_input = input(
-                        '\nFolder ' + self.filepath + ' is not empty. But order structure was found '
-                                                      '[Stop(S), Use existing Content(C), Delete Content(D)]:  ')
-                    if user_input == 'C':
-                        num_files = sum([len(files) for _, _, files in os.walk(self.filepath)])
-                        if num_files >= self.total_images:
-                            print("\nDataset is already complete")
-                            return False
-                        print('\nProgram will start render at image: ' + str(num_files + 1) + '\\' + str(
-                            self.total_images) + '.')
-                        self.skip = num_files
-                        return True
-                else:
-                    user_input = input(
-                        '\nFolder ' + self.filepath + ' is not empty [Stop(S), Delete Content(D)]:  ')
-                if user_input == 'D':
-                    if not self.__delete_contents__():
-                        print('\nDeletion was not successful.')
-                        return False
-                else:
-                    return False
-        else:
-            os.mkdir(self.filepath)
-        for class_name in self.class_names:
-            os.mkdir(os.path.join(self.filepath, class_name))
-        return True
-
     def __hide_all_shapes__(self):
         """
         Hides indirectly all shapes of all classes.
         """
 
         for shape in self.shapes:
-            shape.hide_render = True
+            self.scene_state.set(shape, 'hide_render', True)
 
-    def enable_gpus(self, device_type):
+    def __reset_class__(self, c_class):
         """
-        Enables all GPUs of a specific device type and sets tile size.
+        Hides the shapes of all classes, so only the shape of the next class is shown.
 
-        :param device_type: One of the following: ('CUDA', 'OPTIX', 'HIP', 'ONEAPI')
+        :param c_class: The class which is applied next
         """
 
-        self.scene.cycles.device = 'GPU'
-        self.scene.cycles.tile_size = 256
-        bpy.context.preferences.addons['cycles'].preferences.compute_device_type = device_type
-        bpy.context.preferences.addons['cycles'].preferences.get_devices()
+        self.__hide_all_shapes__()
+        c_class.reset()
 
-    def __ndea_function_caller__(self, i):
+    def __ramp_materials__(self):
         """
-        Creates every combination of ndea values in the order of the ndea_function_index.
-
-        :param i: offset for the current ndea_function_index
-
-        :return: True if the next ndea_function_index is needed and False otherwise
-        :rtype: bool
+        :return: A list of tuples of the form (material, color ramp) with every material whose color ramp is set by
+            the color attribute
+        :rtype: list of tuple
         """
 
-        if i >= len(self.ndea_functions):
-            return True
-
-        else:
-            if not self.ndea_functions[(self.ndea_function_index + i) % len(self.ndea_functions)](self.current_class):
-                self.ndea_functions[(self.ndea_function_index + i) % len(self.ndea_functions)](self.current_class)
-                return self.__ndea_function_caller__(i + 1)
-            return False
+        materials = []
+        for c_class in self.classes:
+            for material, color_ramp in c_class.textures:
+                if color_ramp is not None and all(material != other for other, _ in materials):
+                    materials.append((material, color_ramp))
+        return materials
 
-    def __render_class__(self, functions):
+    def __swept_lights__(self):
         """
-        Renders all remaining images of the current class and saves the images as the current value of image_counter.
-
-        :param functions: a list of all DEA functions and trace functions
+        :return: The lights whose energy is set by the lighting attribute
+        :rtype: list
         """
 
-        if len(functions) > 0:
-            while functions[0](self.current_class):
-                self.__render_class__(functions[1:])
-        else:
-            while self.camera.next_perspective():
-                if len(self.ndea_functions) > 0:
-                    if self.__ndea_function_caller__(0):
-                        self.ndea_function_index = (self.ndea_function_index + 1) % len(self.ndea_functions)
-
-                if self.skip <= 0:
-                    self.scene.render.filepath = os.path.join(self.current_path, str(self.image_counter))
-                    bpy.ops.render.render(write_still=True)
-                    self.image_counter += 1
-                else:
-                    self.skip -= 1
-
-    def render(self):
-        """
-        Prepares the needed folder structure and renders all remaining images for the dataset.
-
-        :return: True if the dataset was successfully crated and False otherwise
-        :rtype: bool
-        """
-
-        if not self.__create_folder_structure__():
-            return False
-        user_input = input(
-            '\nImages to render: ' + str(self.total_images - self.skip) + '. [Stop(S), Continue(C)]  ')
-        if user_input != 'C':
-            return False
-
-        self.image_counter = self.skip
-        for c_class in self.classes:
-            self.__hide_all_shapes__()
-            # initialize all ndea which are not initialized indirectly
-            for ndea_function in self.ndea_functions[1:]:
-                ndea_function(c_class)
-            self.current_class = c_class
-            self.current_path = os.path.join(self.filepath, c_class.name)
-            self.__render_class__(self.functions)
-            self.ndea_function_index = 0
-        return True
+        return list(self.classes[0].lights)
 
 
 def load_random_attribute_values(filepath):
@@ -380,31 +228,127 @@ def load_random_attribute_values(filepath):
     return rav['heights'], rav['betas'], rav['gammas'], rav['scales'], rav['light_energies']
 
 
-if __name__ == '__main__':
-    heights, betas, gammas, scales, light_energies = load_random_attribute_values(
-        'C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/resources_g/random_attributes_values.npz')
-
-    camera = camera_module.Camera(heights=heights,
-                                  betas=betas,
-                                  gammas=gammas)
-
-    render = Render('G:/Datasets/Geometric2/Shape_Texture',
-                    class_names=['Class_0', 'Class_1', 'Class_2', 'Class_3', 'Class_4', 'Class_5'],
-                    traces=[Attribute.SHAPE, Attribute.TEXTURE],
-                    ndea=[Attribute.COLOR],
-                    camera=camera)
+def run_job(job_filepath, worker_arguments=None):
+    """
+    Renders all datasets of a job file one after another without interaction. All datasets are rendered in this
+    Blender session, so the scene, the loaded textures and the compiled kernels are reused. As worker of a Farm only the
+    dataset with the index given in the worker arguments is rendered.
+
+    :param job_filepath: The path of the job file, see load_job in src_common/job_spec.py
+    :param worker_arguments: The parsed worker arguments or None if the datasets are rendered without a Farm
+    :return: True if all datasets were finished and False otherwise
+    :rtype: bool
+    """
 
-    if render.initialize_classes(
-            colors=[(0, 0, 1, 1), (0, 1, 0, 1), (0, 1, 1, 1), (1, 0, 0, 1), (1, 0, 1, 1), (1, 1, 0, 1)],
-            scales=scales,
-            light_energies=light_energies):
+    datasets = job_spec_module.load_job(job_filepath, Render.PIPELINE)
+    if worker_arguments is not None:
+        datasets = [datasets[worker_arguments.dataset]]
+
+    finished = []
+    for dataset in datasets:
+        print('\nDataset ' + dataset['filepath'])
+        heights, betas, gammas, scales, light_energies = load_random_attribute_values(dataset['attribute_values'])
+        render = Render(dataset['filepath'],
+                        class_names=dataset['class_names'],
+                        traces=[Attribute[name] for name in dataset['traces']],
+                        ndea=[Attribute[name] for name in dataset['ndea']],
+                        camera=camera_module.Camera(heights=heights, betas=betas, gammas=gammas),
+                        batch_size=dataset['batch_size'],
+                        quality=dataset['quality'],
+                        cost_aware=dataset['cost_aware'],
+                        sharded=dataset['sharded'],
+                        trace_filepath=dataset['trace_filepath'],
+                        interactive=False,
+                        overwrite=dataset['overwrite'],
+                        warm_up=dataset['warm_up'],
+                        budget=dataset['budget'],
+                        sampling=dataset['sampling'],
+                        seed=dataset['seed'],
+                        async_write=dataset['async_write'],
+                        write_workers=dataset['write_workers'],
+                        cache_filepath=dataset['cache_filepath'],
+                        proxy_filepath=dataset['proxy_filepath'],
+                        proxy_oversampling=dataset['proxy_oversampling'],
+                        recolor=dataset['recolor'],
+                        relight=dataset['relight'],
+                        interleave=dataset['interleave'])
+        if not render.initialize_classes(colors=[tuple(color) for color in dataset['colors']], scales=scales,
+                                         light_energies=light_energies):
+            print('\nInitialization was not successful.')
+            finished.append(False)
+            continue
+        benchmark = worker_arguments is not None and worker_arguments.benchmark > 0
+        if dataset['device'] and not benchmark:
+            render.enable_gpus(dataset['device'])
+            if worker_arguments is not None:
+                render.set_threads(worker_arguments.threads)
+        elif worker_arguments is not None:
+            render.enable_cpu(worker_arguments.threads or None, worker_arguments.tile_size or None)
+        else:
+            render.enable_cpu()
+
+        if dataset['dry_run'] and not benchmark:
+            render.plan(workers=dataset['dry_run_workers'])
+            finished.append(True)
+        elif benchmark:
+            render.benchmark_cpu(worker_arguments.benchmark, worker_arguments.benchmark_result,
+                                 worker_arguments.benchmark_start)
+            finished.append(True)
+        elif worker_arguments is not None:
+            render.render_worker(work_queue_module.WorkQueue(worker_arguments.queue, worker_arguments.lease_time),
+                                 worker_arguments.worker, worker_arguments.range_size)
+            finished.append(True)
+        else:
+            finished.append(render.render())
+    return all(finished)
 
-        # Remove if no GPU is available else set the correct device_type
-        render.enable_gpus('OPTIX')
 
-        if render.render():
-            print('\nDataset finished')
+if __name__ == '__main__':
+    script_arguments = work_queue_module.parse_worker_arguments(sys.argv)
+    if script_arguments is not None and script_arguments.job is not None:
+        if run_job(script_arguments.job, script_arguments if script_arguments.queue is not None or
+                   script_arguments.benchmark > 0 else None):
+            print('\nAll datasets finished')
         else:
-            print('\nCreation of dataset was not finished.')
+            print('\nNot all datasets were finished.')
     else:
-        print('\nInitialization was not successful.')
+        heights, betas, gammas, scales, light_energies = load_random_attribute_values(
+            'C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/resources_g/random_attributes_values.npz')
+
+        camera = camera_module.Camera(heights=heights,
+                                      betas=betas,
+                                      gammas=gammas)
+
+        render = Render('G:/Datasets/Geometric2/Shape_Texture',
+                        class_names=['Class_0', 'Class_1', 'Class_2', 'Class_3', 'Class_4', 'Class_5'],
+                        traces=[Attribute.SHAPE, Attribute.TEXTURE],
+                        ndea=[Attribute.COLOR],
+                        camera=camera)
+
+        if render.initialize_classes(
+                colors=[(0, 0, 1, 1), (0, 1, 0, 1), (0, 1, 1, 1), (1, 0, 0, 1), (1, 0, 1, 1), (1, 1, 0, 1)],
+                scales=scales,
+                light_energies=light_energies):
+
+            # Replace with enable_cpu if no GPU is available else set the correct device_type, CpuTuner always
+            # measures the CPU
+            if script_arguments is not None and script_arguments.benchmark > 0:
+                render.enable_cpu(script_arguments.threads or None, script_arguments.tile_size or None)
+            else:
+                render.enable_gpus('OPTIX')
+
+            if script_arguments is not None and script_arguments.benchmark > 0:
+                render.benchmark_cpu(script_arguments.benchmark, script_arguments.benchmark_result,
+                                     script_arguments.benchmark_start)
+            elif script_arguments is not None and script_arguments.benchmark_suite is not None:
+                render.benchmark_suite(script_arguments.benchmark_suite or None)
+            elif script_arguments is not None and script_arguments.queue is not None:
+                render.set_threads(script_arguments.threads)
+                render.render_worker(work_queue_module.WorkQueue(script_arguments.queue, script_arguments.lease_time),
+                                     script_arguments.worker, script_arguments.range_size)
+            elif render.render():
+                print('\nDataset finished')
+            else:
+                print('\nCreation of dataset was not finished.')
+        else:
+            print('\nInitialization was not successful.')
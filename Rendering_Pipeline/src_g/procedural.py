@@ -0,0 +1,248 @@
+import os
+import time
+from importlib import util
+
+import numpy as np
+
+
+def import_file(full_name, path):
+    """
+    Imports a python file.
+
+    :param full_name: The name of the file
+    :param path: The path to the file
+    :return: The module
+    """
+
+    spec = util.spec_from_file_location(full_name, path)
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+common_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src_common')
+enumerator_module = import_file('enumerator', os.path.join(common_path, 'enumerator.py'))
+
+# The names of the attributes in the enumeration order of ATTRIBUTES in main.py, so an index describes the same
+# combination of values as in the rendered dataset
+ATTRIBUTES = ('BACKGROUND', 'SHAPE', 'SCALE', 'TEXTURE', 'COLOR', 'LIGHTING')
+
+# Stand-ins for the meshes and materials of the blend file. Polygons are given by their amount of corners.
+SHAPES = ('circle', 3, 4, 5, 6, 'cross')
+TEXTURES = ('plain', 'stripes', 'checker', 'dots', 'rings', 'waves')
+BACKGROUNDS = ('plain', 'checker', 'stripes', 'gradient', 'dots', 'rings')
+
+
+def pattern(name, x, y):
+    """
+    Evaluates a procedural pattern.
+
+    :param name: The name of the pattern (one of TEXTURES or BACKGROUNDS)
+    :param x: The x coordinates
+    :param y: The y coordinates
+    :return: The pattern with values from 0 to 1
+    :rtype: numpy.ndarray
+    """
+
+    if name == 'plain':
+        return np.zeros(np.broadcast(x, y).shape, dtype=np.float32)
+    if name == 'stripes':
+        return 0.5 + 0.5 * np.sin(8 * x)
+    if name == 'checker':
+        return (np.floor(3 * x) + np.floor(3 * y)) % 2
+    if name == 'dots':
+        return (np.hypot((3 * x) % 1 - 0.5, (3 * y) % 1 - 0.5) < 0.3).astype(np.float32)
+    if name == 'rings':
+        return 0.5 + 0.5 * np.sin(10 * np.hypot(x, y))
+    if name == 'waves':
+        return 0.5 + 0.5 * np.sin(8 * x + 2 * np.sin(6 * y))
+    return np.clip(0.5 + 0.5 * y, 0, 1)
+
+
+def signed_distance(shape, x, y):
+    """
+    Approximates the signed distance to the outline of a shape with a radius of 1, negative inside.
+
+    :param shape: One of SHAPES
+    :param x: The x coordinates
+    :param y: The y coordinates
+    :return: The signed distances
+    :rtype: numpy.ndarray
+    """
+
+    radius = np.hypot(x, y)
+    if shape == 'circle':
+        return radius - 1
+    if shape == 'cross':
+        horizontal = np.maximum(np.abs(x) - 1, np.abs(y) - 0.35)
+        vertical = np.maximum(np.abs(x) - 0.35, np.abs(y) - 1)
+        return np.minimum(horizontal, vertical)
+    # the radius of a regular polygon with a corner pointing up depends on the angle inside the current sector
+    sector = 2 * np.pi / shape
+    angle = (np.arctan2(x, y) % sector) - sector / 2
+    return radius * np.cos(angle) - np.cos(sector / 2)
+
+
+class ProceduralGenerator:
+    """
+    Draws simplified images of the Geometric scene without Blender. A shape with a texture, whose first color ramp
+    color is the color attribute, lies on a background plane. The camera perspective rotates (gamma) and tilts (beta)
+    the view, the height and the scale change the size of the shape and the light energy the brightness. The traces,
+    NDEA and the enumeration of the combinations are the same as in main.py, so image i shows the combination of image
+    i of a rendered dataset. The backgrounds, shapes, textures and shading of every camera perspective and scale are
+    computed once, the shapes only in the center of the image where the largest shape fits, and the images of a batch
+    are put together from them at once.
+    """
+
+    def __init__(self, class_names, traces, ndea, colors, scales, light_energies, heights, betas, gammas,
+                 shapes=SHAPES, textures=TEXTURES, backgrounds=BACKGROUNDS, resolution=224):
+        """
+        Initializes an instance of ProceduralGenerator. Like in main.py a trace needs a value for every class.
+
+        :param class_names: A list of the class names
+        :param traces: A list of the names of the attributes used as traces (see ATTRIBUTES)
+        :param ndea: A list of the names of the attributes used as non dataset extending attributes
+        :param colors: A list of colors (R, G, B, Alpha)
+        :param scales: A list of scales
+        :param light_energies: A list of light energies
+        :param heights: A list of camera heights
+        :param betas: A list of beta values (rotation around x-axis)
+        :param gammas: A list of gamma values (rotation around z-axis)
+        :param shapes: The stand-ins of the shapes of the blend file in their order (see SHAPES)
+        :param textures: The patterns of the surface textures of the blend file in their order (see TEXTURES)
+        :param backgrounds: The patterns of the backgrounds of the blend file in their order (see BACKGROUNDS)
+        :param resolution: The width and height of the images
+        """
+
+        self.class_names = class_names
+        self.colors = np.asarray(colors, dtype=np.float32)[:, :3]
+        self.scales = np.asarray(scales, dtype=np.float32)
+        self.light_energies = np.asarray(light_energies, dtype=np.float32)
+        self.heights = np.asarray(heights, dtype=np.float32)
+        self.betas = np.radians(np.asarray(betas, dtype=np.float32))
+        self.gammas = np.radians(np.asarray(gammas, dtype=np.float32))
+        self.shapes = tuple(shapes)
+        self.textures = tuple(textures)
+        self.backgrounds = tuple(backgrounds)
+        self.resolution = resolution
+
+        unknown = [attribute for attribute in list(traces) + list(ndea) if attribute not in ATTRIBUTES]
+        if unknown:
+            raise ValueError('Unknown attributes ' + str(unknown) + ', use some of ' + str(ATTRIBUTES))
+        sizes = {'BACKGROUND': len(self.backgrounds), 'SHAPE': len(self.shapes), 'SCALE': len(self.scales),
+                 'TEXTURE': len(self.textures), 'COLOR': len(self.colors), 'LIGHTING': len(self.light_energies)}
+        for attribute in traces:
+            if sizes[attribute] < len(class_names):
+                raise ValueError('The trace ' + attribute + ' has ' + str(sizes[attribute]) + ' values for ' +
+                                 str(len(class_names)) + ' classes')
+        # for every class the indices of its values in the lists above, a trace gives every class one distinct value
+        self.class_values = [{attribute: [index] if attribute in traces else list(range(sizes[attribute]))
+                              for attribute in ATTRIBUTES} for index in range(len(class_names))]
+        dea = [attribute for attribute in ATTRIBUTES if attribute not in ndea]
+        ndea = [attribute for attribute in ATTRIBUTES if attribute in ndea]
+        self.enumerator = enumerator_module.Enumerator(
+            [[(attribute.lower(), len(values[attribute])) for attribute in dea] for values in self.class_values],
+            [[(attribute.lower(), len(values[attribute])) for attribute in ndea] for values in self.class_values],
+            (len(self.heights), len(self.betas), len(self.gammas)))
+        self.total_images = self.enumerator.total_images
+
+        # the view rotates around the center (gamma) and tilting the camera (beta) compresses the vertical axis
+        coordinates = (np.arange(resolution, dtype=np.float32) + 0.5) / resolution * 2 - 1
+        x, y = np.meshgrid(coordinates, -coordinates)
+        gamma = self.gammas[:, np.newaxis, np.newaxis]
+        view_x = x * np.cos(gamma) + y * np.sin(gamma)
+        view_y = -x * np.sin(gamma) + y * np.cos(gamma)
+        stretch = (1 / np.maximum(np.cos(self.betas), 0.2))[:, np.newaxis, np.newaxis, np.newaxis]
+        # the gray backgrounds as RGB of the form (background, beta, gamma, height, width, 3)
+        x, y = np.broadcast_arrays(2 * view_x, 2 * view_y * stretch)
+        backgrounds = np.stack([0.55 + 0.3 * pattern(background, x, y) for background in self.backgrounds])
+        self.background_layers = np.repeat(backgrounds.astype(np.float32)[..., np.newaxis], 3, axis=-1)
+
+        # the shapes reach at most 1.1 times their size from the center plus the soft edge, so they are only drawn in
+        # this window of the images
+        zoom = self.heights.mean() / self.heights
+        size = 0.35 * self.scales[:, np.newaxis] * zoom
+        inside = np.flatnonzero(np.abs(coordinates) < 1.1 * size.max() + 4 / resolution)
+        self.window = slice(inside[0], inside[-1] + 1) if len(inside) else slice(0, 0)
+        # the window in the coordinates of the shape of the form (scale, height, beta, gamma, height, width)
+        size = size[:, :, np.newaxis, np.newaxis, np.newaxis, np.newaxis]
+        x, y = np.broadcast_arrays(view_x[:, self.window, self.window] / size,
+                                   view_y[:, self.window, self.window] * stretch / size)
+        # a soft edge of one pixel width smooths the outline
+        self.coverage_layers = np.stack([np.clip(0.5 - signed_distance(shape, x, y) * size * resolution / 2, 0, 1)
+                                         for shape in self.shapes]).astype(np.float32)
+        # the part of the color mixed with white by the color ramp
+        self.texture_layers = np.stack([0.7 * pattern(texture, x, y) for texture in self.textures]).astype(np.float32)
+        # the light comes from the top left
+        self.shading_layers = np.clip(0.8 + 0.15 * (y - x), 0.4, 1).astype(np.float32)
+
+    def __values__(self, indices):
+        """
+        Looks up the values of the images.
+
+        :param indices: A list of image indices
+        :return: A dictionary of the form {attribute name: array of value indices} with the camera attributes and the
+            class indices
+        :rtype: dict
+        """
+
+        columns = {attribute: [] for attribute in ATTRIBUTES + enumerator_module.CAMERA_ATTRIBUTES + ('class',)}
+        for index in indices:
+            combination = self.enumerator.combination(index)
+            values = self.class_values[combination.class_index]
+            for attribute in ATTRIBUTES:
+                columns[attribute].append(values[attribute][combination.values[attribute.lower()]])
+            for attribute in enumerator_module.CAMERA_ATTRIBUTES:
+                columns[attribute].append(combination.values[attribute])
+            columns['class'].append(combination.class_index)
+        return {attribute: np.asarray(column) for attribute, column in columns.items()}
+
+    def generate(self, indices):
+        """
+        Draws the images with the given indices.
+
+        :param indices: A list of image indices
+        :return: The images as array of the form (images, height, width, 3) with values from 0 to 1 and the class
+            indices
+        :rtype: tuple of numpy.ndarray
+        """
+
+        values = self.__values__(indices)
+        brightness = 0.35 + 0.65 * self.light_energies[values['LIGHTING']] / self.light_energies.max()
+        images = self.background_layers[values['BACKGROUND'], values['camera_beta'], values['camera_gamma']]
+        images *= brightness[:, np.newaxis, np.newaxis, np.newaxis]
+
+        brightness = brightness[:, np.newaxis, np.newaxis]
+        view = (values['SCALE'], values['camera_height'], values['camera_beta'], values['camera_gamma'])
+        coverage = self.coverage_layers[(values['SHAPE'],) + view]
+        lit = self.shading_layers[view]
+        lit *= coverage
+        lit *= brightness
+        white = self.texture_layers[(values['TEXTURE'],) + view]
+        white *= lit
+        lit -= white
+
+        # the color ramp mixes the color of the attribute with white, the shape covers the background
+        window = (slice(None), self.window, self.window)
+        mixed = images[window + (0,)] * (1 - coverage)
+        mixed += white
+        color = self.colors[values['COLOR']][:, :, np.newaxis, np.newaxis]
+        for channel in range(3):
+            images[window + (channel,)] = lit * color[:, channel] + mixed
+        return images, values['class']
+
+
+if __name__ == '__main__':
+    rav = np.load('C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/resources_g/random_attributes_values.npz')
+    generator = ProceduralGenerator(
+        class_names=['Class_0', 'Class_1', 'Class_2', 'Class_3', 'Class_4', 'Class_5'],
+        traces=['SHAPE', 'TEXTURE'],
+        ndea=['COLOR'],
+        colors=[(0, 0, 1, 1), (0, 1, 0, 1), (0, 1, 1, 1), (1, 0, 0, 1), (1, 0, 1, 1), (1, 1, 0, 1)],
+        scales=rav['scales'], light_energies=rav['light_energies'],
+        heights=rav['heights'], betas=rav['betas'], gammas=rav['gammas'])
+
+    start_time = time.time()
+    for start in range(0, min(generator.total_images, 2048), 256):
+        generator.generate(list(range(start, min(start + 256, generator.total_images))))
+    print('Images/s: ' + str(round(min(generator.total_images, 2048) / (time.time() - start_time))))
@@ -21,19 +21,20 @@ class Camera:
         self.current_beta = 0
         self.current_gamma = -1
 
-    def next_perspective(self):
-        self.current_gamma += 1
-        if self.current_gamma >= len(self.gammas):
-            self.current_gamma = 0
-            self.current_beta += 1
-            if self.current_beta >= len(self.betas):
-                self.current_beta = 0
-                self.current_height += 1
-                if self.current_height >= len(self.heights):
-                    self.current_height = 0
-                    self.current_gamma = -1
-                    return False
-        self.camera.location.z = self.heights[self.current_height]
-        self.axis.rotation_euler.x = m.radians(self.betas[self.current_beta])
-        self.axis.rotation_euler.z = m.radians(self.gammas[self.current_gamma])
-        return True
+        self.scene_state = None
+
+    def set_perspective(self, height_index, beta_index, gamma_index):
+        self.current_height = height_index
+        self.current_beta = beta_index
+        self.current_gamma = gamma_index
+        self.scene_state.set(self.camera, 'location.z', self.heights[height_index])
+        self.scene_state.set(self.axis, 'rotation_euler.x', m.radians(self.betas[beta_index]))
+        self.scene_state.set(self.axis, 'rotation_euler.z', m.radians(self.gammas[gamma_index]))
+
+    def insert_keyframes(self, frame):
+        self.camera.keyframe_insert('location', frame=frame)
+        self.axis.keyframe_insert('rotation_euler', frame=frame)
+
+    def clear_keyframes(self):
+        self.camera.animation_data_clear()
+        self.axis.animation_data_clear()
@@ -3,8 +3,9 @@ import math as m
 
 
 class Class:
-    def __init__(self, name, surface_sphere, clouds_sphere, atmos_sphere, background_plane, light):
+    def __init__(self, name, surface_sphere, clouds_sphere, atmos_sphere, background_plane, light, scene_state):
         self.name = name
+        self.scene_state = scene_state
         self.surface_sphere = surface_sphere
         self.clouds_sphere = clouds_sphere
         self.atmos_sphere = atmos_sphere
@@ -27,62 +28,61 @@ class Class:
         self.backgrounds = None
         self.background_index = -1
 
-    def next_scale(self):
-        self.scale_index += 1
-        if self.scale_index >= len(self.scales):
-            self.scale_index = -1
-            return False
-        new_scale = self.scales[self.scale_index]
-        self.surface_sphere.scale = (new_scale, new_scale, new_scale)
-        self.clouds_sphere.scale = (new_scale, new_scale, new_scale)
-        self.atmos_sphere.scale = (new_scale, new_scale, new_scale)
-        return True
+    def reset(self):
+        self.surface_texture_index = -1
+        self.clouds_texture_index = -1
+        self.color_index = -1
+        self.scale_index = -1
+        self.light_direction_index = -1
+        self.light_energy_index = -1
+        self.background_index = -1
 
-    def next_clouds_texture(self):
-        self.clouds_texture_index += 1
-        if self.clouds_texture_index >= len(self.clouds_textures):
-            self.clouds_texture_index = -1
-            return False
-        self.clouds_sphere.data.materials[0] = self.clouds_textures[self.clouds_texture_index][0]
-        return True
+    def set_scale(self, index):
+        self.scale_index = index
+        new_scale = self.scales[index]
+        for sphere in (self.surface_sphere, self.clouds_sphere, self.atmos_sphere):
+            self.scene_state.set(sphere, 'scale', (new_scale, new_scale, new_scale))
 
-    def next_surface_textures(self):
-        self.surface_texture_index += 1
-        if self.surface_texture_index >= len(self.surface_textures):
-            self.surface_texture_index = -1
-            return False
-        self.surface_sphere.data.materials[0] = self.surface_textures[self.surface_texture_index][0]
-        return True
+    def set_clouds_texture(self, index):
+        self.clouds_texture_index = index
+        self.scene_state.set_item(self.clouds_sphere.data, 'materials', 0, self.clouds_textures[index][0])
 
-    def next_color(self):
-        self.color_index += 1
-        if self.color_index >= len(self.colors):
-            self.color_index = -1
-            return False
-        for surface_texture in self.surface_textures:
-            surface_texture[1].elements[0].color = self.colors[self.color_index]
-        return True
+    def set_surface_texture(self, index):
+        self.surface_texture_index = index
+        self.scene_state.set_item(self.surface_sphere.data, 'materials', 0, self.surface_textures[index][0])
+        if self.color_index >= 0:
+            self.set_color(self.color_index)
+
+    def set_color(self, index):
+        self.color_index = index
+        if self.surface_texture_index >= 0:
+            self.scene_state.set(self.surface_textures[self.surface_texture_index][1].elements[0], 'color',
+                                 self.colors[index])
+
+    def set_background(self, index):
+        self.background_index = index
+        self.scene_state.set_item(self.background_plane.data, 'materials', 0, self.backgrounds[index])
 
-    def next_background(self):
-        self.background_index += 1
-        if self.background_index >= len(self.backgrounds):
-            self.background_index = -1
-            return False
-        self.background_plane.data.materials[0] = self.backgrounds[self.background_index]
-        return True
+    def set_lighting(self, index):
+        self.light_energy_index = index
+        self.scene_state.set(self.light.data, 'energy', self.light_energies[index])
 
-    def next_lighting(self):
-        self.light_energy_index += 1
-        if self.light_energy_index >= len(self.light_energies):
-            self.light_energy_index = -1
-            return False
-        self.light.data.energy = self.light_energies[self.light_energy_index]
-        return True
+    def set_light_direction(self, index):
+        self.light_direction_index = index
+        self.scene_state.set(self.light_axis, 'rotation_euler.z', m.radians(self.light_directions[index]))
 
-    def next_light_direction(self):
-        self.light_direction_index += 1
-        if self.light_direction_index >= len(self.light_directions):
-            self.light_direction_index = -1
-            return False
-        self.light_axis.rotation_euler.z = m.radians(self.light_directions[self.light_direction_index])
-        return True
+    def insert_keyframes(self, frame):
+        for sphere in (self.surface_sphere, self.clouds_sphere, self.atmos_sphere):
+            sphere.keyframe_insert('scale', frame=frame)
+        for surface_texture in self.surface_textures:
+            surface_texture[1].elements[0].keyframe_insert('color', frame=frame)
+        self.light.data.keyframe_insert('energy', frame=frame)
+        self.light_axis.keyframe_insert('rotation_euler', frame=frame)
+
+    def clear_keyframes(self):
+        for sphere in (self.surface_sphere, self.clouds_sphere, self.atmos_sphere):
+            sphere.animation_data_clear()
+        for surface_texture in self.surface_textures:
+            surface_texture[0].node_tree.animation_data_clear()
+        self.light.data.animation_data_clear()
+        self.light_axis.animation_data_clear()
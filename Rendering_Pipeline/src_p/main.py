@@ -1,5 +1,5 @@
 import os
-import shutil
+import sys
 from enum import Enum
 from importlib import util
 
@@ -23,9 +23,19 @@ def import_file(full_name, path):
 
 
 source_path = 'C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/src_p'
+common_path = os.path.join(os.path.dirname(source_path), 'src_common')
 
 class_module = import_file('class', os.path.join(source_path, 'class.py'))
 camera_module = import_file('camera', os.path.join(source_path, 'camera.py'))
+work_queue_module = import_file('work_queue', os.path.join(common_path, 'work_queue.py'))
+job_spec_module = import_file('job_spec', os.path.join(common_path, 'job_spec.py'))
+render_base_module = import_file('render_base', os.path.join(common_path, 'render_base.py'))
+# modules of src_common which render_base already loaded
+enumerator_module = render_base_module.enumerator_module
+compositing_module = render_base_module.compositing_module
+pixels_module = render_base_module.pixels_module
+image_metrics_module = render_base_module.image_metrics_module
+planner_module = render_base_module.planner_module
 
 
 class Attribute(Enum):
@@ -42,53 +52,51 @@ class Attribute(Enum):
     BACKGROUND = 7
 
 
-class Render:
-    """
-    The class Render contains everything necessary to create a synthetic dataset with traces. Before the method
-    render is used the method initialize_classification_objects should be called. If the usage of a GPU is desired the
-    enable_gpus method must be invoked before the rendering process starts. Alternatively the GPUs can be activated in
-    Blender.
-    """
+# The attributes in enumeration order with the method of Class which sets a value and the name of the list of values.
+# Of the DEA and trace attributes the first one changes least often.
+ATTRIBUTES = {
+    Attribute.BACKGROUND: (class_module.Class.set_background, 'backgrounds'),
+    Attribute.SCALE: (class_module.Class.set_scale, 'scales'),
+    Attribute.SURFACE_TEXTURE: (class_module.Class.set_surface_texture, 'surface_textures'),
+    Attribute.COLOR: (class_module.Class.set_color, 'colors'),
+    Attribute.LIGHTING: (class_module.Class.set_lighting, 'light_energies'),
+    Attribute.CLOUDS_TEXTURE: (class_module.Class.set_clouds_texture, 'clouds_textures'),
+    Attribute.LIGHT_DIRECTION: (class_module.Class.set_light_direction, 'light_directions'),
+}
 
-    def __init__(self, filepath, class_names, traces, ndea, camera):
-        """
-        Initializes an instance of Render. The traces and ndea should not have the same elements otherwise
-        they are used as ndea.
-
-        :param filepath: The path where the dataset should be saved
-        :param class_names: A list of the class names which define the amount of classes
-        :param traces: A list of the attributes wanted as traces
-        :param ndea: A list of the attributes wanted as non dataset extending attributes
-        :param camera: The camera of the scene
-        """
+# Attributes which swap materials. Their values cannot be keyframed, so a keyframe batch never spans a change of them.
+STATIC_ATTRIBUTES = (Attribute.BACKGROUND, Attribute.SURFACE_TEXTURE, Attribute.CLOUDS_TEXTURE)
 
-        self.filepath = filepath
-        self.class_names = class_names
-        self.traces = traces
-        self.ndea = ndea
-        self.functions = []
-        self.ndea_functions = []
+# Attributes which change the geometry of the scene. Persistent render data is only kept while none of them changes.
+GEOMETRY_ATTRIBUTES = (Attribute.SCALE,)
 
-        self.scene = bpy.context.scene
-        self.camera = camera
 
-        self.classes = []
+class Render(render_base_module.RenderBase):
+    """
+    The class Render of the Planet pipeline creates its classification objects and sets their attributes,
+    the rendering of the dataset is inherited from RenderBase in src_common/render_base.py. Before the method render
+    is used the method initialize_classification_objects should be called. If the usage of a GPU is desired the
+    enable_gpus method must be invoked before the rendering process starts. Alternatively the GPUs can be activated in
+    Blender. Without GPUs enable_cpu applies the CPU settings found by CpuTuner.
+    """
 
-        self.scene.render.engine = 'CYCLES'
-        self.scene.render.resolution_percentage = 100
+    PIPELINE = 'planet'
+    BASE_SAMPLES = 50
+    ATTRIBUTES = ATTRIBUTES
+    STATIC_ATTRIBUTES = STATIC_ATTRIBUTES
+    GEOMETRY_ATTRIBUTES = GEOMETRY_ATTRIBUTES
 
-        self.scene.cycles.samples = 50
-        self.scene.render.resolution_x = 224
-        self.scene.render.resolution_y = 224
+    def __init__(self, filepath, class_names, traces, ndea, camera, composite_background=False, **kwargs):
+        """
+        Initializes an instance of Render, the other parameters are described in RenderBase.
 
-        self.image_counter = 0
-        self.current_path = None
-        self.current_class = None
-        self.ndea_function_index = 0
-        self.ndea_start = 0
-        self.skip = 0
+        :param composite_background: Whether the Background_Plane is rendered once per background and camera position
+            and the planet is rendered with a transparent film and composited over it, see __background_pixels__
+        """
 
-        self.total_images = 0
+        super().__init__(filepath, class_names, traces, ndea, camera, **kwargs)
+        self.scene.render.resolution_percentage = 100
+        self.composite_background = composite_background
 
     def initialize_classification_objects(self, colors, scales, light_energies, light_directions):
         """
@@ -106,38 +114,15 @@ class Render:
         """
 
         if len(self.traces) <= 0 and len(self.class_names) > 1:
-            user_input = input('\nNo traces given all classes will be the same [Stop(S), Continue(C)]: ')
+            user_input = self.__ask__('\nNo traces given all classes will be the same [Stop(S), Continue(C)]: ', 'C')
             if user_input != 'C':
                 return False
 
-        if Attribute.BACKGROUND in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_background)
-        else:
-            self.functions.append(class_module.Class.next_background)
-        if Attribute.SCALE in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_scale)
-        else:
-            self.functions.append(class_module.Class.next_scale)
-        if Attribute.SURFACE_TEXTURE in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_surface_textures)
-        else:
-            self.functions.append(class_module.Class.next_surface_textures)
-        if Attribute.COLOR in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_color)
-        else:
-            self.functions.append(class_module.Class.next_color)
-        if Attribute.LIGHTING in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_lighting)
-        else:
-            self.functions.append(class_module.Class.next_lighting)
-        if Attribute.CLOUDS_TEXTURE in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_clouds_texture)
-        else:
-            self.functions.append(class_module.Class.next_clouds_texture)
-        if Attribute.LIGHT_DIRECTION in self.ndea:
-            self.ndea_functions.append(class_module.Class.next_light_direction)
-        else:
-            self.functions.append(class_module.Class.next_light_direction)
+        for attribute in ATTRIBUTES:
+            if attribute in self.ndea:
+                self.ndea_attributes.append(attribute)
+            else:
+                self.dea_attributes.append(attribute)
 
         light = bpy.data.objects['Light']
         surface_sphere = bpy.data.collections['Planet'].all_objects['Surface']
@@ -147,7 +132,7 @@ class Render:
 
         for class_name in self.class_names:
             self.classes.append(class_module.Class(
-                class_name, surface_sphere, clouds_sphere, atmos_sphere, background_plane, light))
+                class_name, surface_sphere, clouds_sphere, atmos_sphere, background_plane, light, self.scene_state))
 
         surface_textures = []
         clouds_textures = []
@@ -167,6 +152,11 @@ class Render:
 
         self.__distribute_traces__(surface_textures, clouds_textures, backgrounds, colors, scales,
                                    light_energies, light_directions)
+        if self.proxy_filepath is not None:
+            self.__use_texture_proxies__(
+                [(material, [surface_sphere], max(scales)) for material, _ in surface_textures] +
+                [(material, [clouds_sphere], max(scales)) for material, _ in clouds_textures] +
+                [(material, [background_plane], None) for material in backgrounds])
         self.__set_total_images__()
         return True
 
@@ -215,175 +205,138 @@ class Render:
             else:
                 c_class.backgrounds = backgrounds
 
-    def __set_total_images__(self):
+    def __ramp_materials__(self):
         """
-        Sets total_images to the total amount of images the dataset will contain. Must be called after the classes
-         are fully initialized.
+        :return: A list of tuples of the form (material, color ramp) with every material whose color ramp is set by
+            the color attribute
+        :rtype: list of tuple
         """
 
-        total_images = 1
+        materials = []
         for c_class in self.classes:
-            if Attribute.BACKGROUND not in self.ndea:
-                total_images *= len(c_class.backgrounds)
-            if Attribute.SCALE not in self.ndea:
-                total_images *= len(c_class.scales)
-            if Attribute.SURFACE_TEXTURE not in self.ndea:
-                total_images *= len(c_class.surface_textures)
-            if Attribute.COLOR not in self.ndea:
-                total_images *= len(c_class.colors)
-            if Attribute.LIGHTING not in self.ndea:
-                total_images *= len(c_class.light_energies)
-            if Attribute.LIGHT_DIRECTION not in self.ndea:
-                total_images *= len(c_class.light_directions)
-            if Attribute.CLOUDS_TEXTURE not in self.ndea:
-                total_images *= len(c_class.clouds_textures)
-            self.total_images += total_images * self.camera.number_of_positions
-            total_images = 1
-
-    def __delete_contents__(self):
-        """
-        Deletes all contents at filepath.
+            for material, color_ramp in c_class.surface_textures:
+                if color_ramp is not None and all(material != other for other, _ in materials):
+                    materials.append((material, color_ramp))
+        return materials
 
-        :return: True when deletion was successful and False otherwise
-        :rtype: bool
+    def __swept_lights__(self):
+        """
+        :return: The lights whose energy is set by the lighting attribute
+        :rtype: list
         """
 
-        for filename in os.listdir(self.filepath):
-            file_path = os.path.join(self.filepath, filename)
-            try:
-                if os.path.isfile(file_path) or os.path.islink(file_path):
-                    os.unlink(file_path)
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-            except Exception as e:
-                print('Failed to delete %s. Reason: %s' % (file_path, e))
-                return False
-        return True
+        return [self.classes[0].light]
 
-    def __create_folder_structure__(self):
+    def __composites_background__(self):
         """
-        Creates the needed folder structure at the filepath location. If the needed structure is already existent the
-        user can resume a unfinished dataset or delete all contents at the filepath location.
-
-        :return: True if the data structure was successfully created and the dataset is not already complete and False
-            is returned otherwise
+        :return: Whether composite_background is set
         :rtype: bool
         """
 
-        if os.path.exists(self.filepath) and os.path.isdir(self.filepath):
-            contents = os.listdir(self.filepath)
-            if contents:
-                if self.class_names.sort() == contents.sort():
-                    user_input = input(
-                        '\nFolder ' + self.filepath + ' is not empty. But order structure was found '
-                                                      '[Stop(S), Use existing Content(C), Delete Content(D)]:  ')
-                    if user_input == 'C':
-                        num_files = sum([len(files) for _, _, files in os.walk(self.filepath)])
-                        if num_files >= self.total_images:
-                            print("\nDataset is already complete")
-                            return False
-                        print('\nProgram will start render at image: ' + str(num_files + 1) + '\\' + str(
-                            self.total_images) + '.')
-                        self.skip = num_files
-                        return True
-                else:
-                    user_input = input(
-                        '\nFolder ' + self.filepath + ' is not empty [Stop(S), Delete Content(D)]:  ')
-                if user_input == 'D':
-                    if not self.__delete_contents__():
-                        print('\nDeletion was not successful.')
-                        return False
-                else:
-                    return False
-        else:
-            os.mkdir(self.filepath)
-        for class_name in self.class_names:
-            os.mkdir(os.path.join(self.filepath, class_name))
-        return True
+        return self.composite_background
 
-    def enable_gpus(self, device_type):
+    def __show_background__(self, shown):
         """
-        Enables all GPUs of a specific device type and sets tile size.
+        Switches between rendering the whole image and rendering the planet alone with a transparent film. The
+        Background_Plane stays visible to all other rays, so the planet still reflects it.
 
-        :param device_type: One of the following: ('CUDA', 'OPTIX', 'HIP', 'ONEAPI')
+        :param shown: Whether the camera sees the Background_Plane
         """
 
-        self.scene.cycles.device = 'GPU'
-        self.scene.cycles.tile_size = 256
-        bpy.context.preferences.addons['cycles'].preferences.compute_device_type = device_type
-        bpy.context.preferences.addons['cycles'].preferences.get_devices()
+        self.scene.render.film_transparent = not shown
+        self.classes[0].background_plane.visible_camera = shown
 
-    def __ndea_function_caller__(self, i):
+    @staticmethod
+    def __is_lit__(material):
         """
-        Creates every combination of ndea values in the order of the ndea_function_index.
-
-        :param i: offset for the current ndea_function_index
-
-        :return: True if the next ndea_function_index is needed and False otherwise
+        :param material: A material of the Background_Plane
+        :return: Whether the material has a BSDF, so its render depends on the lights
         :rtype: bool
         """
 
-        if i >= len(self.ndea_functions):
-            return True
+        return material.node_tree is not None and any(
+            node.type.startswith('BSDF') or node.type == 'SUBSURFACE_SCATTERING' for node in material.node_tree.nodes)
 
-        else:
-            if not self.ndea_functions[(self.ndea_function_index + i) % len(self.ndea_functions)](
-                    self.current_class):
-                self.ndea_functions[(self.ndea_function_index + i) % len(self.ndea_functions)](self.current_class)
-                return self.__ndea_function_caller__(i + 1)
-            return False
-
-    def __render_class__(self, functions):
+    def __background_pixels__(self, combination):
         """
-        Renders all remaining images of the current class and saves the images as the current value of image_counter.
-
-        :param functions: a list of all DEA functions and trace functions
+        Returns the render of the background of a combination. The Background_Plane does not change with the surface,
+        the clouds, the scale or the color, so it is rendered alone once per background material and camera position
+        (and light if the material is lit) and kept for all further images. The planet is hidden in this render, so
+        the shadow of the planet on the background is missing in the composited images, see
+        compare_background_compositing.
+
+        :param combination: The combination of the image
+        :return: The linear premultiplied RGBA pixels of the form (height, width, 4) with the bottom row first
+        :rtype: numpy.ndarray
         """
 
-        if len(functions) > 0:
-            while functions[0](self.current_class):
-                self.__render_class__(functions[1:])
-        else:
-            while self.camera.next_perspective():
-                if len(self.ndea_functions) > 0:
-                    if not self.ndea_functions[self.ndea_function_index](self.current_class):
-                        self.ndea_functions[self.ndea_function_index](self.current_class)
-                        if len(self.ndea_functions) > 1:
-                            if self.__ndea_function_caller__(1):
-                                self.ndea_function_index = (self.ndea_function_index + 1) % len(self.ndea_functions)
-
-                if self.skip <= 0:
-                    self.scene.render.filepath = os.path.join(self.current_path, str(self.image_counter))
-                    bpy.ops.render.render(write_still=True)
-                    self.image_counter += 1
-                else:
-                    self.skip -= 1
-
-    def render(self):
+        c_class = self.classes[combination.class_index]
+        material = c_class.backgrounds[combination.values['background']]
+        key = (material.name,) + tuple(combination.values[name] for name in enumerator_module.CAMERA_ATTRIBUTES)
+        if self.__is_lit__(material):
+            key += (float(c_class.light_energies[combination.values['lighting']]),
+                    float(c_class.light_directions[combination.values['light_direction']]))
+        if key not in self.background_renders:
+            self.__apply_combination__(combination)
+            spheres = [sphere for sphere in (c_class.surface_sphere, c_class.clouds_sphere, c_class.atmos_sphere)
+                       if not sphere.hide_render]
+            for sphere in spheres:
+                self.scene_state.set(sphere, 'hide_render', True)
+            self.__show_background__(True)
+            self.background_renders[key] = self.__render_passes__()['combined']
+            self.__show_background__(False)
+            for sphere in spheres:
+                self.scene_state.set(sphere, 'hide_render', False)
+        return self.background_renders[key]
+
+    def compare_background_compositing(self, number_of_images=4):
         """
-        Prepares the needed folder structure and renders all remaining images for the dataset.
+        Checks the compositing against real renders: for a sample of combinations spread over every class the planet
+        composited over the background is compared with a render of the whole image. Both are converted without
+        dithering, so only the error of the compositing is measured.
 
-        :return: True if the dataset was successfully crated and False otherwise
-        :rtype: bool
+        :param number_of_images: The amount of sampled combinations
+        :return: A dictionary of the form {image index: (PSNR, largest difference of a pixel value)}
+        :rtype: dict
         """
 
-        if not self.__create_folder_structure__():
-            return False
-        user_input = input(
-            '\nImages to render: ' + str(self.total_images - self.skip) + '. [Stop(S), Continue(C)]  ')
-        if user_input != 'C':
-            return False
+        opened = self.pass_output is None
+        composite_background, self.composite_background = self.composite_background, True
+        self.__open_passes__()
+        self.composite_background = composite_background
+        if self.background_renders is None:
+            print('\nThe background cannot be composited, nothing to compare.')
+            return {}
+
+        settings = self.scene.render.image_settings
+        max_value = 65535 if settings.color_depth == '16' else 255
+        results = {}
+        self.current_class = None
+        for index in planner_module.stratified_indices(self.enumerator, number_of_images):
+            combination = self.enumerator.combination(index)
+            self.__apply_combination__(combination)
+            composited = compositing_module.over(self.__render_passes__()['combined'],
+                                                 self.__background_pixels__(combination))
+            self.__show_background__(True)
+            rendered = self.__render_passes__()['combined']
+            self.__show_background__(False)
+            height, width = composited.shape[:2]
+            image, reference = [pixels_module.to_image(pixels, width, height, settings.color_mode,
+                                                       settings.color_depth).astype(np.int64)
+                                for pixels in (composited, rendered)]
+            results[index] = (image_metrics_module.psnr(image, reference, max_value),
+                              int(np.abs(image - reference).max()))
+        self.current_class = None
+        if opened:
+            self.__close_passes__()
 
-        self.image_counter = self.skip
-        for c_class in self.classes:
-            # initialize all ndea which are not initialized indirectly
-            for ndea_function in self.ndea_functions[1:]:
-                ndea_function(c_class)
-            self.current_class = c_class
-            self.current_path = os.path.join(self.filepath, c_class.name)
-            self.__render_class__(self.functions)
-            self.ndea_function_index = 0
-        return True
+        if results:
+            worst = min(results, key=lambda key: results[key][0])
+            print('\nCompositing compared to rendering: mean PSNR ' +
+                  str(round(float(np.mean([psnr for psnr, _ in results.values()])), 2)) + ' dB, worst image ' +
+                  str(worst) + ': ' + str(round(results[worst][0], 2)) + ' dB, largest pixel difference ' +
+                  str(max(difference for _, difference in results.values())))
+        return results
 
 
 def load_random_attribute_values(filepath):
@@ -391,32 +344,132 @@ def load_random_attribute_values(filepath):
     return rav['heights'], rav['betas'], rav['gammas'], rav['scales'], rav['light_energies'], rav['light_directions']
 
 
+def run_job(job_filepath, worker_arguments=None):
+    """
+    Renders all datasets of a job file one after another without interaction. All datasets are rendered in this
+    Blender session, so the scene, the loaded textures and the compiled kernels are reused. As worker of a Farm only the
+    dataset with the index given in the worker arguments is rendered.
+
+    :param job_filepath: The path of the job file, see load_job in src_common/job_spec.py
+    :param worker_arguments: The parsed worker arguments or None if the datasets are rendered without a Farm
+    :return: True if all datasets were finished and False otherwise
+    :rtype: bool
+    """
+
+    datasets = job_spec_module.load_job(job_filepath, Render.PIPELINE)
+    if worker_arguments is not None:
+        datasets = [datasets[worker_arguments.dataset]]
+
+    finished = []
+    for dataset in datasets:
+        print('\nDataset ' + dataset['filepath'])
+        heights, betas, gammas, scales, light_energies, light_directions = load_random_attribute_values(
+            dataset['attribute_values'])
+        render = Render(dataset['filepath'],
+                        class_names=dataset['class_names'],
+                        traces=[Attribute[name] for name in dataset['traces']],
+                        ndea=[Attribute[name] for name in dataset['ndea']],
+                        camera=camera_module.Camera(heights=heights, betas=betas, gammas=gammas),
+                        batch_size=dataset['batch_size'],
+                        quality=dataset['quality'],
+                        cost_aware=dataset['cost_aware'],
+                        sharded=dataset['sharded'],
+                        trace_filepath=dataset['trace_filepath'],
+                        interactive=False,
+                        overwrite=dataset['overwrite'],
+                        warm_up=dataset['warm_up'],
+                        budget=dataset['budget'],
+                        sampling=dataset['sampling'],
+                        seed=dataset['seed'],
+                        async_write=dataset['async_write'],
+                        write_workers=dataset['write_workers'],
+                        cache_filepath=dataset['cache_filepath'],
+                        proxy_filepath=dataset['proxy_filepath'],
+                        proxy_oversampling=dataset['proxy_oversampling'],
+                        recolor=dataset['recolor'],
+                        relight=dataset['relight'],
+                        composite_background=dataset['composite_background'],
+                        interleave=dataset['interleave'])
+        if not render.initialize_classification_objects(colors=[tuple(color) for color in dataset['colors']],
+                                                        scales=scales, light_energies=light_energies,
+                                                        light_directions=light_directions):
+            print('\nInitialization was not successful.')
+            finished.append(False)
+            continue
+        benchmark = worker_arguments is not None and worker_arguments.benchmark > 0
+        if dataset['device'] and not benchmark:
+            render.enable_gpus(dataset['device'])
+            if worker_arguments is not None:
+                render.set_threads(worker_arguments.threads)
+        elif worker_arguments is not None:
+            render.enable_cpu(worker_arguments.threads or None, worker_arguments.tile_size or None)
+        else:
+            render.enable_cpu()
+
+        if dataset['dry_run'] and not benchmark:
+            render.plan(workers=dataset['dry_run_workers'])
+            finished.append(True)
+        elif benchmark:
+            render.benchmark_cpu(worker_arguments.benchmark, worker_arguments.benchmark_result,
+                                 worker_arguments.benchmark_start)
+            finished.append(True)
+        elif worker_arguments is not None:
+            render.render_worker(work_queue_module.WorkQueue(worker_arguments.queue, worker_arguments.lease_time),
+                                 worker_arguments.worker, worker_arguments.range_size)
+            finished.append(True)
+        else:
+            finished.append(render.render())
+    return all(finished)
+
+
 if __name__ == '__main__':
-    heights, betas, gammas, scales, light_energies, light_directions = load_random_attribute_values(
-        'C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/resources_p/random_attributes_values_no_clouds.npz')
-
-    camera = camera_module.Camera(heights=heights,
-                                  betas=betas,
-                                  gammas=gammas)
-
-    render = Render('G:/Datasets/Planet/LightDirection_No_Clouds',
-                    class_names=['Class_0', 'Class_1', 'Class_2', 'Class_3', 'Class_4', 'Class_5'],
-                    traces=[Attribute.LIGHT_DIRECTION],
-                    ndea=[Attribute.COLOR, Attribute.SURFACE_TEXTURE],
-                    camera=camera)
-
-    if render.initialize_classification_objects(
-            colors=[(0, 0, 1, 1), (0, 1, 0, 1), (0, 1, 1, 1), (1, 0, 0, 1), (1, 0, 1, 1), (1, 1, 0, 1)],
-            scales=scales,
-            light_energies=light_energies,
-            light_directions=light_directions,
-    ):
-        # Remove if no GPU is available else set the correct device_type
-        render.enable_gpus('OPTIX')
-
-        if render.render():
-            print('\nDataset finished')
+    script_arguments = work_queue_module.parse_worker_arguments(sys.argv)
+    if script_arguments is not None and script_arguments.job is not None:
+        if run_job(script_arguments.job, script_arguments if script_arguments.queue is not None or
+                   script_arguments.benchmark > 0 else None):
+            print('\nAll datasets finished')
         else:
-            print('\nCreation of dataset was terminated.')
+            print('\nNot all datasets were finished.')
     else:
-        print('\nInitialization was not successful.')
+        heights, betas, gammas, scales, light_energies, light_directions = load_random_attribute_values(
+            'C:/Users/elias/Desktop/bachelorthesis/Rendering_Pipeline/resources_p/'
+            'random_attributes_values_no_clouds.npz')
+
+        camera = camera_module.Camera(heights=heights,
+                                      betas=betas,
+                                      gammas=gammas)
+
+        render = Render('G:/Datasets/Planet/LightDirection_No_Clouds',
+                        class_names=['Class_0', 'Class_1', 'Class_2', 'Class_3', 'Class_4', 'Class_5'],
+                        traces=[Attribute.LIGHT_DIRECTION],
+                        ndea=[Attribute.COLOR, Attribute.SURFACE_TEXTURE],
+                        camera=camera)
+
+        if render.initialize_classification_objects(
+                colors=[(0, 0, 1, 1), (0, 1, 0, 1), (0, 1, 1, 1), (1, 0, 0, 1), (1, 0, 1, 1), (1, 1, 0, 1)],
+                scales=scales,
+                light_energies=light_energies,
+                light_directions=light_directions,
+        ):
+            # Replace with enable_cpu if no GPU is available else set the correct device_type, CpuTuner always
+            # measures the CPU
+            if script_arguments is not None and script_arguments.benchmark > 0:
+                render.enable_cpu(script_arguments.threads or None, script_arguments.tile_size or None)
+            else:
+                render.enable_gpus('OPTIX')
+
+            if script_arguments is not None and script_arguments.benchmark > 0:
+                render.benchmark_cpu(script_arguments.benchmark, script_arguments.benchmark_result,
+                                     script_arguments.benchmark_start)
+            elif script_arguments is not None and script_arguments.benchmark_suite is not None:
+                render.benchmark_suite(script_arguments.benchmark_suite or None)
+            elif script_arguments is not None and script_arguments.queue is not None:
+                render.set_threads(script_arguments.threads)
+                render.render_worker(work_queue_module.WorkQueue(script_arguments.queue, script_arguments.lease_time),
+                                     script_arguments.worker, script_arguments.range_size)
+            elif render.render():
+                print('\nDataset finished')
+            else:
+                print('\nCreation of dataset was terminated.')
+        else:
+            print('\nInitialization was not successful.')